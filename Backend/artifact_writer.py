@@ -0,0 +1,407 @@
+"""
+Write static API files only when their content changes
+
+Each file's content hash (sha256 of the canonical JSON, ignoring the
+`last_updated` stamp) is recorded in manifest.json. On the next export an
+unchanged file is not touched, so its bytes, mtime and `last_updated` stay
+the same and the daily git commit only picks up real changes.
+
+Files are written atomically (temp file + rename) to the first output
+directory and then hardlinked, or copied where links aren't possible, into
+the others. Directories that resolve to the same place (webapp/public/api is
+a symlink to Docs/api) are only written once.
+
+Every file also gets precompressed .gz and .br siblings, so servers can send
+them without compressing per request.
+
+Large files can be streamed with open_stream(): the array is written item by
+item straight to disk, so memory doesn't grow with the size of the file.
+
+Callers can also store a small `state` dict in the manifest (e.g. the data
+version the files were built from) and keep() files from the last export
+without regenerating them.
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import brotli
+
+MANIFEST_NAME = 'manifest.json'
+
+# mkstemp creates files readable by the owner only; published files are world-readable
+FILE_MODE = 0o644
+
+# Streamed output is handed to the files and the hash in chunks of about this size
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def compressed_siblings(data):
+    """{suffix: bytes} of the precompressed variants of data
+
+    gzip output has a zero mtime so unchanged content compresses to identical bytes.
+    """
+    return {'.gz': gzip.compress(data, compresslevel=9, mtime=0), '.br': brotli.compress(data, quality=11)}
+
+
+def content_hash(payload):
+    """sha256 of a JSON payload, ignoring its last_updated stamp"""
+    if isinstance(payload, dict):
+        payload = {k: v for k, v in payload.items() if k != 'last_updated'}
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def atomic_write(path, data):
+    """Write bytes to path via a temp file in the same directory and a rename"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    os.chmod(tmp, FILE_MODE)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def mirror_file(src, dst):
+    """Hardlink src to dst (copying when the filesystem can't link), replacing dst atomically"""
+    dst = Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.parent / f'.{dst.name}.link.tmp'
+    if tmp.exists():
+        tmp.unlink()
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+class _TempFile:
+    """Temp file next to path, optionally gzip/brotli encoded, renamed over path on commit()"""
+
+    def __init__(self, path, encoding=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self.tmp = tempfile.mkstemp(dir=self.path.parent, prefix=f'.{self.path.name}.', suffix='.tmp')
+        os.chmod(self.tmp, FILE_MODE)
+        self.file = os.fdopen(fd, 'wb')
+        self.encoding = encoding
+        if encoding == 'gzip':
+            self.encoder = gzip.GzipFile(filename='', mode='wb', compresslevel=9, fileobj=self.file, mtime=0)
+        elif encoding == 'br':
+            self.encoder = brotli.Compressor(quality=11)
+
+    def write(self, data):
+        if self.encoding == 'gzip':
+            self.encoder.write(data)
+        elif self.encoding == 'br':
+            self.file.write(self.encoder.process(data))
+        else:
+            self.file.write(data)
+
+    def commit(self):
+        """Finish the file, move it into place and return its size"""
+        if self.encoding == 'gzip':
+            self.encoder.close()
+        elif self.encoding == 'br':
+            self.file.write(self.encoder.finish())
+        self.file.close()
+        os.replace(self.tmp, self.path)
+        return self.path.stat().st_size
+
+    def discard(self):
+        self.file.close()
+        os.unlink(self.tmp)
+
+
+class JsonStream:
+    """
+    A JSON object written incrementally: leading members, one array fed with
+    append(), then trailing members passed to close()
+
+    Output matches json.dumps of the same dict. It is hashed as it is
+    written; the digest covers everything but the final `last_updated`
+    member, and when it matches the manifest the temp files are dropped
+    and the published file is left alone.
+    """
+
+    def __init__(self, writer, name, head, key, compact=False):
+        self.writer = writer
+        self.name = name
+        self.indent = None if compact else writer.indent
+        self.hash = hashlib.sha256()
+        self.count = 0
+        self.buffer = []
+        self.buffered = 0
+        self.files = {'': _TempFile(writer.primary / name)}
+        if writer.compress:
+            self.files['.gz'] = _TempFile(writer.primary / (name + '.gz'), 'gzip')
+            self.files['.br'] = _TempFile(writer.primary / (name + '.br'), 'br')
+
+        self.members = 0
+        self._emit('{')
+        for member, value in head.items():
+            self._member(member, value)
+        self._member(key, None)
+
+    def _newline(self, depth):
+        return '' if self.indent is None else '\n' + ' ' * (self.indent * depth)
+
+    def _dumps(self, value, depth):
+        if self.indent is None:
+            return json.dumps(value, separators=(',', ':'))
+        return json.dumps(value, indent=self.indent).replace('\n', self._newline(depth))
+
+    def _emit(self, text):
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= STREAM_CHUNK_BYTES:
+            self._flush()
+
+    def _flush(self):
+        data = ''.join(self.buffer).encode('utf-8')
+        self.buffer, self.buffered = [], 0
+        if self.hash is not None:
+            self.hash.update(data)
+        for f in self.files.values():
+            f.write(data)
+
+    def _member(self, member, value):
+        """Start a member; a None value leaves the array value to append()/close()"""
+        separator = ': ' if self.indent is not None else ':'
+        self._emit((',' if self.members else '') + self._newline(1) + json.dumps(member) + separator)
+        if value is not None:
+            self._emit(self._dumps(value, 1))
+        self.members += 1
+
+    def append(self, item):
+        self._emit(('[' if not self.count else ',') + self._newline(2) + self._dumps(item, 2))
+        self.count += 1
+
+    def close(self, **tail):
+        """
+        Finish the array and the object and publish the file if its content changed
+
+        Returns:
+            True if the file was written, False if it was left as is
+        """
+        self._emit(self._newline(1) + ']' if self.count else '[]')
+        for member, value in tail.items():
+            self._member(member, value)
+        self._flush()
+        digest = self.hash.hexdigest()
+        self.hash = None
+
+        entry = self.writer._existing_entry(self.name, digest, streamed=True)
+        if entry:
+            for f in self.files.values():
+                f.discard()
+            self.writer._keep(self.name, entry)
+            return False
+
+        last_updated = datetime.now().isoformat()
+        self._member('last_updated', last_updated)
+        self._emit(self._newline(0) + '}')
+        self._flush()
+        sizes = {suffix: f.commit() for suffix, f in self.files.items()}
+        for suffix in self.files:
+            self.writer._publish(self.name + suffix)
+        self.writer._record(self.name, digest, sizes.pop(''), last_updated,
+                            {suffix.lstrip('.') + '_bytes': size for suffix, size in sizes.items()})
+        return True
+
+
+class ArtifactWriter:
+    def __init__(self, output_dirs, indent=2, compress=True):
+        """
+        Args:
+            output_dirs: Directories to publish to; the first one holds the manifest
+            indent: json.dump indent for written files (None for compact output)
+            compress: Also write .gz/.br siblings of every file
+        """
+        self.indent = indent
+        self.compress = compress
+        self.output_dirs = []
+        seen = set()
+        for out_dir in output_dirs:
+            out_dir = Path(out_dir)
+            out_dir.mkdir(parents=True, exist_ok=True)
+            resolved = out_dir.resolve()
+            if resolved not in seen:
+                seen.add(resolved)
+                self.output_dirs.append(out_dir)
+        self.primary = self.output_dirs[0]
+        self.mirrors = self.output_dirs[1:]
+        self.previous, self.previous_state = self._load_manifest()
+        self.state = {}
+        self.entries = {}
+        self.written = []
+        self.unchanged = []
+        self.removed = []
+
+    def _load_manifest(self):
+        try:
+            with open(self.primary / MANIFEST_NAME, encoding='utf-8') as f:
+                manifest = json.load(f)
+            return manifest.get('files', {}), manifest.get('state', {})
+        except (OSError, ValueError):
+            return {}, {}
+
+    def _existing_entry(self, name, digest, streamed=False):
+        """Manifest entry for a file already on disk with this content, or None"""
+        path = self.primary / name
+        if not path.exists():
+            return None
+        previous = self.previous.get(name)
+        if previous:
+            if previous.get('sha256') == digest and previous.get('bytes') == path.stat().st_size:
+                return previous
+            return None
+        if streamed:
+            # Stream digests cover the serialized bytes, which can't be checked without the manifest
+            return None
+        # No manifest yet (first run): compare against the file itself
+        try:
+            with open(path, encoding='utf-8') as f:
+                existing = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if content_hash(existing) != digest:
+            return None
+        last_updated = existing.get('last_updated') if isinstance(existing, dict) else None
+        return {'sha256': digest, 'bytes': path.stat().st_size, 'last_updated': last_updated}
+
+    def _publish(self, name):
+        for mirror in self.mirrors:
+            mirror_file(self.primary / name, mirror / name)
+
+    def _write_siblings(self, name, data):
+        """Write the compressed siblings of a file, returning their sizes for the manifest"""
+        sizes = {}
+        for suffix, compressed in compressed_siblings(data).items():
+            atomic_write(self.primary / (name + suffix), compressed)
+            self._publish(name + suffix)
+            sizes[suffix.lstrip('.') + '_bytes'] = len(compressed)
+        return sizes
+
+    def _write_file(self, name, data):
+        """Write data and its compressed siblings, returning the sibling sizes"""
+        atomic_write(self.primary / name, data)
+        self._publish(name)
+        return self._write_siblings(name, data) if self.compress else {}
+
+    def _ensure_siblings(self, name, entry):
+        """Create compressed siblings missing next to an unchanged file (e.g. from older exports)"""
+        if not self.compress:
+            return entry
+        wanted = ['.gz', '.br']
+        if all((self.primary / (name + suffix)).exists() for suffix in wanted) and \
+                all(suffix.lstrip('.') + '_bytes' in entry for suffix in wanted):
+            return entry
+        return {**entry, **self._write_siblings(name, (self.primary / name).read_bytes())}
+
+    def write_json(self, name, payload, compact=False):
+        """
+        Write payload to every output directory unless its content is unchanged
+
+        A `last_updated` timestamp is added to dict payloads when the file is
+        (re)written; unchanged files keep the one they have.
+
+        Args:
+            name: Path relative to the output directories, may include subdirectories
+            payload: JSON-serializable data
+            compact: Write without indentation or spaces after separators
+
+        Returns:
+            True if the file was written, False if it was left as is
+        """
+        digest = content_hash(payload)
+        entry = self._existing_entry(name, digest)
+        if entry:
+            self._keep(name, entry)
+            return False
+
+        last_updated = datetime.now().isoformat()
+        if isinstance(payload, dict):
+            payload = {**payload, 'last_updated': last_updated}
+        if compact:
+            data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        else:
+            data = json.dumps(payload, indent=self.indent).encode('utf-8')
+        self._record(name, digest, len(data), last_updated, self._write_file(name, data))
+        return True
+
+    def open_stream(self, name, head, key, compact=False):
+        """
+        Start writing a JSON object whose `key` array is streamed
+
+        Call append() for each array item, then close(**trailing_members).
+        The object's members are `head`, then `key`, then the trailing ones.
+        """
+        return JsonStream(self, name, head, key, compact)
+
+    def keep(self, names):
+        """
+        Keep files from the last export as they are, without regenerating them
+
+        Returns:
+            False (keeping nothing) if any of them is missing from the manifest or disk
+        """
+        def on_disk(name):
+            path = self.primary / name
+            return name in self.previous and path.exists() and path.stat().st_size == self.previous[name].get('bytes')
+
+        names = list(names)
+        if not all(on_disk(name) for name in names):
+            return False
+        for name in names:
+            self._keep(name, self.previous[name])
+        return True
+
+    def _keep(self, name, entry):
+        """Record a file left unchanged on disk"""
+        self.entries[name] = self._ensure_siblings(name, entry)
+        self.unchanged.append(name)
+        for mirror in self.mirrors:
+            if not (mirror / name).exists():
+                mirror_file(self.primary / name, mirror / name)
+
+    def _record(self, name, digest, size, last_updated, sibling_sizes):
+        """Record a file that was just written"""
+        self.entries[name] = {'sha256': digest, 'bytes': size, 'last_updated': last_updated, **sibling_sizes}
+        self.written.append(name)
+
+    def finish(self):
+        """Delete files dropped since the last export and write the manifest if anything changed"""
+        for name in sorted(set(self.previous) - set(self.entries)):
+            for out_dir in self.output_dirs:
+                path = out_dir / name
+                for stale in (path, out_dir / (name + '.gz'), out_dir / (name + '.br')):
+                    if stale.exists():
+                        stale.unlink()
+                # Drop directories left empty by removed shards
+                parent = path.parent
+                while parent != out_dir and parent.is_dir() and not any(parent.iterdir()):
+                    parent.rmdir()
+                    parent = parent.parent
+            self.removed.append(name)
+
+        if self.entries != self.previous or self.state != self.previous_state or \
+                not (self.primary / MANIFEST_NAME).exists():
+            manifest = {'files': dict(sorted(self.entries.items()))}
+            if self.state:
+                manifest['state'] = self.state
+            self._write_file(MANIFEST_NAME, json.dumps(manifest, indent=2).encode('utf-8'))
+
+        return {'written': len(self.written), 'unchanged': len(self.unchanged), 'removed': len(self.removed)}
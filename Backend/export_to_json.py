@@ -1,9 +1,43 @@
 #!/usr/bin/env python3
-import sqlite3
+"""
+Export the nutrition database to the static JSON API (Docs/api)
+
+Besides one file per hall, menus are sharded into compact
+<hall>/<iso-date>/<meal>.json files listed in index.json, so a client
+showing one meal on one day downloads only that slice. Each per-hall file
+also has a columnar, dictionary-encoded <hall>.cols.json variant, and every
+file gets precompressed .gz/.br siblings.
+
+When scrapers/precompute.py has run, shards also carry the per-goal food
+rankings and summaries.json holds the per-meal summaries. Plans pre-generated
+by meal-planning/plan_catalog.py are published as meal-plans/<hall>/<meal>.json.
+
+Each hall is read from the database in chunks and streamed into its hall
+file, columnar file and shards in a single pass, so memory use doesn't grow
+with the amount of menu history.
+
+Only files whose content changed are rewritten; see artifact_writer.py. The
+manifest also records the data version of the export (scrapers/data_version.py),
+so halls whose menus and rankings haven't changed since are kept without being
+read from the database at all.
+"""
+import argparse
 import json
-import os
+import re
+import sqlite3
+import statistics
+import sys
+import zlib
+from itertools import groupby
 from pathlib import Path
-from datetime import datetime
+
+from artifact_writer import ArtifactWriter
+
+SCRAPERS_DIR = Path(__file__).parent / 'scrapers'
+if str(SCRAPERS_DIR) not in sys.path:
+    sys.path.append(str(SCRAPERS_DIR))
+
+from data_version import changed_since, current_version  # noqa: E402
 
 # Paths
 db_path = Path(__file__).parent / 'data' / 'nutrition_data.db'
@@ -11,69 +45,422 @@ docs_api_dir = Path(__file__).parent.parent / 'Docs' / 'api'
 webapp_api_dir = Path(__file__).parent.parent / 'webapp' / 'public' / 'api'
 output_dirs = [docs_api_dir, webapp_api_dir]
 
-# Create output directories
-for out_dir in output_dirs:
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-print('Exporting database to JSON files...')
-
-# Connect to database
-conn = sqlite3.connect(db_path)
-conn.row_factory = sqlite3.Row  # This enables column access by name
-cursor = conn.cursor()
-
-# Export dining halls list
-cursor.execute('SELECT DISTINCT dining_hall FROM nutrition_data ORDER BY dining_hall')
-halls = [row['dining_hall'] for row in cursor.fetchall()]
-
-for out_dir in output_dirs:
-    with open(out_dir / 'dining-halls.json', 'w') as f:
-        json.dump({'dining_halls': halls, 'count': len(halls), 'last_updated': datetime.now().isoformat()}, f, indent=2)
-print(f'✓ Exported {len(halls)} dining halls')
-
-# Export foods for each dining hall
-for hall in halls:
-    filename = hall.replace(' ', '-').replace('/', '-').lower() + '.json'
-
-    cursor.execute('''
-        SELECT DISTINCT
-            name, category, serving_size, calories, protein,
-            total_fat, total_carbohydrate, dietary_fiber, sugars, sodium,
-            meal_type, date
-        FROM nutrition_data
-        WHERE dining_hall = ?
-        ORDER BY date DESC, meal_type, category, name
-    ''', (hall,))
-
-    foods = [dict(row) for row in cursor.fetchall()]
-
-    output = {
-        'dining_hall': hall,
-        'foods': foods,
-        'count': len(foods),
-        'last_updated': datetime.now().isoformat()  # Set at export time
+# A change to these invalidates every exported hall
+EXPORTER_SOURCES = [Path(__file__), Path(__file__).parent / 'artifact_writer.py']
+
+# Shard path, relative to the API directory
+SHARD_PATH = '{hall}/{date}/{meal}.json'
+MEAL_PLANS_PATH = 'meal-plans/{hall}/{meal}.json'
+SHARD_FOOD_FIELDS = ['name', 'category', 'serving_size', 'calories', 'protein',
+                     'total_fat', 'total_carbohydrate', 'dietary_fiber', 'sugars', 'sodium']
+
+
+# Rows fetched from the database at a time while streaming a hall
+FETCH_SIZE = 500
+
+# Low-cardinality columns stored as indexes into a string table in the columnar variant
+DICTIONARY_COLUMNS = ['category', 'serving_size', 'meal_type', 'date', 'service_date']
+COLUMNAR_SUFFIX = '.cols.json'
+
+
+def hall_filename(hall):
+    return hall.replace(' ', '-').replace('/', '-').lower() + '.json'
+
+
+def columnar_filename(filename):
+    return filename[:-len('.json')] + COLUMNAR_SUFFIX
+
+
+class ColumnarEncoder:
+    """
+    Columnar, dictionary encoding of food dicts, one row at a time
+
+    Key names are listed once in `columns` and each food becomes a row array.
+    Values of DICTIONARY_COLUMNS are indexes into `strings[column]`, and
+    whole-number floats are written as ints. Decode with:
+        row_dict = {c: strings[c][v] if c in strings and v is not None else v for c, v in zip(columns, row)}
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.tables = {c: {} for c in DICTIONARY_COLUMNS if c in self.columns}
+
+    def encode(self, food):
+        row = []
+        for column in self.columns:
+            value = food[column]
+            if column in self.tables and value is not None:
+                value = self.tables[column].setdefault(value, len(self.tables[column]))
+            elif isinstance(value, float) and value.is_integer():
+                value = int(value)
+            row.append(value)
+        return row
+
+    def strings(self):
+        return {c: list(t) for c, t in self.tables.items()}
+
+
+def encode_columnar(foods):
+    """Columnar form of a list of food dicts: {'columns', 'rows', 'strings'}"""
+    encoder = ColumnarEncoder(foods[0] if foods else [])
+    rows = [encoder.encode(food) for food in foods]
+    return {'columns': encoder.columns, 'rows': rows, 'strings': encoder.strings()}
+
+
+class ShardWriter:
+    """
+    Writes one compact file per (date, meal) of a hall
+
+    Foods must arrive grouped by service_date and meal_type (the export
+    query's order), so only the meal being written is held in memory.
+    """
+
+    def __init__(self, writer, hall, hall_code, rankings=None):
+        self.writer = writer
+        self.hall = hall
+        self.hall_code = hall_code
+        self.rankings = rankings or {}
+        self.dir = slugify(hall_code or hall)
+        self.dates = {}
+        self.key = None
+        self.date = None
+        self.foods = []
+
+    def add(self, food):
+        if not food['service_date']:
+            return
+        key = (food['service_date'], food['meal_type'])
+        if key != self.key:
+            self._flush()
+            self.key, self.date = key, food['date']
+        self.foods.append({k: food[k] for k in SHARD_FOOD_FIELDS})
+
+    def _flush(self):
+        if not self.foods:
+            return
+        service_date, meal_type = self.key
+        day = self.dates.setdefault(service_date, {'service_date': service_date, 'date': self.date, 'meals': {}})
+        day['meals'][meal_type] = slugify(meal_type)
+        shard = {
+            'dining_hall': self.hall,
+            'date': self.date,
+            'service_date': service_date,
+            'meal_type': meal_type,
+            'foods': self.foods,
+        }
+        if self.key in self.rankings:
+            # Positions in `foods`, best first
+            positions = {}
+            for i, food in enumerate(self.foods):
+                positions.setdefault(food['name'], i)
+            shard['rankings'] = {goal: [positions[name] for name in names if name in positions]
+                                 for goal, names in self.rankings[self.key].items()}
+        shard['count'] = len(self.foods)
+        self.writer.write_json(SHARD_PATH.format(hall=self.dir, date=service_date, meal=day['meals'][meal_type]),
+                               shard, compact=True)
+        self.foods = []
+
+    def close(self):
+        """Write the last shard and return the hall's index entry"""
+        self._flush()
+        filename = hall_filename(self.hall)
+        dates = [self.dates[d] for d in sorted(self.dates)]
+        for day in dates:
+            day['meals'] = dict(sorted(day['meals'].items()))
+        return {'dining_hall': self.hall, 'hall_code': self.hall_code, 'dir': self.dir, 'file': filename,
+                'columnar': columnar_filename(filename), 'dates': dates}
+
+
+def slugify(value):
+    """Lowercase URL-safe slug: "Deli & Bagel Bar" -> "deli-bagel-bar"""
+    return re.sub(r'[^a-z0-9]+', '-', value.lower()).strip('-')
+
+
+def since_filter(since):
+    """SQL clause and params for the optional service_date range filter (ISO, so comparisons are chronological)"""
+    return ('AND service_date >= ?', (since,)) if since else ('', ())
+
+
+def export_dining_halls(cursor, writer):
+    """Write dining-halls.json and return the (id, name, code) rows of every hall"""
+    cursor.execute('SELECT id, dining_hall, hall_code FROM dining_halls ORDER BY dining_hall')
+    hall_rows = cursor.fetchall()
+    halls = [row['dining_hall'] for row in hall_rows]
+    writer.write_json('dining-halls.json', {'dining_halls': halls, 'count': len(halls)})
+    print(f'✓ Exported {len(halls)} dining halls')
+    return hall_rows
+
+
+def iter_rows(cursor, size=FETCH_SIZE):
+    """Yield a query's rows, fetching `size` at a time"""
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+def load_rankings(cursor, hall_id, since=None):
+    """{(service_date, meal_type): {goal: [food names, best first]}} from scrapers/precompute.py, if it has run"""
+    since_clause, since_params = since_filter(since)
+    try:
+        cursor.execute(f'''
+            SELECT r.service_date, r.meal_type, r.ranking, f.name
+            FROM food_rankings r
+            JOIN json_each(r.food_ids) j
+            JOIN food_items f ON f.id = j.value
+            WHERE r.hall_id = ? AND r.service_date != '' {since_clause}
+            ORDER BY r.service_date, r.meal_type, r.ranking, j.key
+        ''', (hall_id,) + since_params)
+    except sqlite3.OperationalError:  # no food_rankings table
+        return {}
+    rankings = {}
+    for service_date, meal_type, ranking, name in cursor.fetchall():
+        rankings.setdefault((service_date, meal_type), {}).setdefault(ranking, []).append(name)
+    return rankings
+
+
+def export_hall(cursor, writer, hall_id, hall, hall_code, since=None):
+    """Stream a hall's foods into its hall file, columnar file and shards, and return its index entry"""
+    rankings = load_rankings(cursor, hall_id, since)
+    since_clause, since_params = since_filter(since)
+
+    # Deduplicate the slim appearance rows first, then join nutrition once per food
+    cursor.execute(f'''
+        SELECT
+            f.name, a.category, NULLIF(f.serving_size, '') AS serving_size, f.calories, f.protein,
+            f.total_fat, f.total_carbohydrate, f.dietary_fiber, f.sugars, f.sodium,
+            a.meal_type, a.date, a.service_date
+        FROM (
+            SELECT DISTINCT food_id, category, meal_type, date, service_date
+            FROM menu_appearances
+            WHERE hall_id = ? {since_clause}
+        ) a
+        JOIN food_items f ON f.id = a.food_id
+        ORDER BY a.service_date DESC, a.meal_type, a.category, f.name
+    ''', (hall_id,) + since_params)
+    columns = [d[0] for d in cursor.description]
+
+    filename = hall_filename(hall)
+    hall_file = writer.open_stream(filename, {'dining_hall': hall}, 'foods')
+    columnar = ColumnarEncoder(columns)
+    columnar_file = writer.open_stream(columnar_filename(filename), {'dining_hall': hall, 'columns': columns},
+                                       'rows', compact=True)
+    shards = ShardWriter(writer, hall, hall_code, rankings)
+    for row in iter_rows(cursor):
+        food = dict(row)
+        hall_file.append(food)
+        columnar_file.append(columnar.encode(food))
+        shards.add(food)
+
+    count = hall_file.count
+    changed = hall_file.close(count=count)
+    columnar_file.close(strings=columnar.strings(), count=count)
+    print(f'✓ Exported {count} foods for {hall}' + ('' if changed else ' (unchanged)'))
+    return shards.close()
+
+
+def ranking_digests(cursor):
+    """Checksum of each hall's food_rankings rows, by hall name ({} before precompute.py has run)"""
+    try:
+        cursor.execute('''
+            SELECT h.dining_hall, r.service_date, r.meal_type, r.ranking, r.food_ids
+            FROM food_rankings r JOIN dining_halls h ON h.id = r.hall_id
+            ORDER BY h.dining_hall, r.service_date, r.meal_type, r.ranking
+        ''')
+    except sqlite3.OperationalError:
+        return {}
+    digests = {}
+    for hall, rows in groupby(iter_rows(cursor), key=lambda row: row[0]):
+        digests[hall] = f"{zlib.crc32('|'.join(':'.join(tuple(row)[1:]) for row in rows).encode('utf-8')):08x}"
+    return digests
+
+
+def export_state(cursor, db_file, since=None):
+    """What the exported files were built from, stored in the manifest"""
+    source = b''.join(path.read_bytes() for path in EXPORTER_SOURCES)
+    return {
+        'data_version': current_version(db_file),
+        'since': since,
+        'source': f'{zlib.crc32(source):08x}',
+        'rankings': ranking_digests(cursor),
     }
 
+
+def reusable_halls(writer, db_file, state):
+    """Index entries, by hall name, of halls unchanged since the export recorded in the manifest"""
+    previous = writer.previous_state
+    if not previous or (previous.get('since'), previous.get('source')) != (state['since'], state['source']) \
+            or previous.get('data_version', 0) > state['data_version']:
+        return {}
+    try:
+        index = json.loads((writer.primary / 'index.json').read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    changed = {hall for hall, _, _, _ in changed_since(previous['data_version'], db_file)}
+    return {h['dining_hall']: h for h in index.get('halls', [])
+            if h['dining_hall'] not in changed
+            and previous.get('rankings', {}).get(h['dining_hall']) == state['rankings'].get(h['dining_hall'])}
+
+
+def hall_files(writer, entry):
+    """Every file exported for a hall: its hall file, columnar file and shards"""
+    shard_prefix = entry['dir'] + '/'
+    return [entry['file'], entry['columnar']] + [name for name in writer.previous if name.startswith(shard_prefix)]
+
+
+def export_index(writer, halls):
+    """Write index.json: which halls, dates and meals have shards"""
+    writer.write_json('index.json', {'path': SHARD_PATH, 'halls': halls}, compact=True)
+    shards = sum(len(d['meals']) for h in halls for d in h['dates'])
+    print(f'✓ Exported {shards} menu shards for {len(halls)} halls')
+
+
+def export_summaries(cursor, writer, since=None):
+    """Write summaries.json: item counts and macro averages per hall, date and meal (from precompute.py)"""
+    since_clause, since_params = since_filter(since)
+    try:
+        cursor.execute(f'''
+            SELECT h.dining_hall, h.hall_code, s.service_date, s.meal_type, s.items, s.categories,
+                   s.avg_calories, s.avg_protein, s.avg_fat, s.avg_carbs, s.max_protein
+            FROM meal_summaries s JOIN dining_halls h ON h.id = s.hall_id
+            WHERE 1 = 1 {since_clause}
+            ORDER BY h.dining_hall, s.service_date, s.meal_type
+        ''', since_params)
+    except sqlite3.OperationalError:  # no meal_summaries table
+        return
+    halls = {}
+    for row in cursor.fetchall():
+        summary = {k: round(row[k], 1) if isinstance(row[k], float) else row[k]
+                   for k in ('items', 'categories', 'avg_calories', 'avg_protein', 'avg_fat', 'avg_carbs', 'max_protein')}
+        hall_dir = slugify(row['hall_code'] or row['dining_hall'])
+        halls.setdefault(hall_dir, {}).setdefault(row['service_date'], {})[row['meal_type']] = summary
+    writer.write_json('summaries.json', {'halls': halls}, compact=True)
+    print(f'✓ Exported meal summaries for {len(halls)} halls')
+
+
+def export_meal_plans(cursor, writer):
+    """
+    Write meal-plans/<hall>/<meal>.json from the plan catalog: plans[goal][diet][calories] = [variants]
+
+    Only a catalog built from the current data version is published (server.js checks the same);
+    after a load without a rebuild there are no plan files, and the stale ones are removed.
+    """
+    try:
+        cursor.execute('''
+            SELECT hall_code, meal_type, goal, diet, calories, plan FROM meal_plan_catalog
+            WHERE (SELECT version FROM consumer_versions WHERE consumer = 'meal_plan_catalog')
+                  = (SELECT IFNULL(MAX(version), 0) FROM data_version)
+            ORDER BY hall_code, meal_type, goal, diet, calories, variant
+        ''')
+    except sqlite3.OperationalError:  # no meal_plan_catalog table
+        return
+    files = 0
+    for (hall_code, meal_type), rows in groupby(cursor.fetchall(), key=lambda r: (r['hall_code'], r['meal_type'])):
+        plans = {}
+        for row in rows:
+            plans.setdefault(row['goal'], {}).setdefault(row['diet'], {}).setdefault(str(row['calories']), []).append(
+                json.loads(row['plan']))
+        writer.write_json(MEAL_PLANS_PATH.format(hall=slugify(hall_code), meal=slugify(meal_type)),
+                          {'hall_code': hall_code, 'meal_type': meal_type, 'plans': plans}, compact=True)
+        files += 1
+    print(f'✓ Exported {files} meal plan catalog files')
+
+
+def export_available_meals(cursor, writer, since=None):
+    """Write available-meals.json: every meal type and date on the menus"""
+    since_clause, since_params = since_filter(since)
+    cursor.execute(f'''
+        SELECT DISTINCT meal_type, date, service_date FROM menu_appearances
+        WHERE 1 = 1 {since_clause}
+        ORDER BY service_date DESC, meal_type
+    ''', since_params)
+    meals = [dict(row) for row in cursor.fetchall()]
+    writer.write_json('available-meals.json', {'meals': meals, 'count': len(meals)})
+    print(f'✓ Exported {len(meals)} available meal times')
+
+
+def export_all(db_file=db_path, dirs=output_dirs, since=None, writer=None, exported=None, full=False):
+    """
+    Export every API file and return the writer's written/unchanged/removed counts
+
+    Args:
+        writer: ArtifactWriter to write through (default: a new one for `dirs`)
+        exported: Index entries, by hall name, of halls already exported through
+            `writer` (see pipeline.py); those halls aren't exported again
+        full: Re-export every hall, even those unchanged since the last export
+    """
+    writer = writer or ArtifactWriter(dirs)
+    exported = exported or {}
+
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row  # This enables column access by name
+    cursor = conn.cursor()
+    try:
+        writer.state = export_state(cursor, db_file, since)
+        reusable = {} if full else reusable_halls(writer, db_file, writer.state)
+        index = []
+        for hall_id, hall, hall_code in export_dining_halls(cursor, writer):
+            if hall in exported:
+                index.append(exported[hall])
+            elif hall in reusable and writer.keep(hall_files(writer, reusable[hall])):
+                index.append(reusable[hall])
+                print(f'✓ {hall} unchanged since data version {writer.previous_state["data_version"]}')
+            else:
+                index.append(export_hall(cursor, writer, hall_id, hall, hall_code, since))
+        export_index(writer, index)
+        export_summaries(cursor, writer, since)
+        export_meal_plans(cursor, writer)
+        export_available_meals(cursor, writer, since)
+    finally:
+        conn.close()
+
+    stats = writer.finish()
+    report_sizes(writer, index)
+    return stats
+
+
+def report_sizes(writer, index):
+    """Print total and per-request payload sizes of each layout, raw and precompressed"""
+    shard_names = [SHARD_PATH.format(hall=h['dir'], date=d['service_date'], meal=slug)
+                   for h in index for d in h['dates'] for slug in d['meals'].values()]
+    layouts = [
+        ('Per-hall files', [h['file'] for h in index]),
+        ('Per-hall columnar', [h['columnar'] for h in index]),
+        ('Shards', shard_names),
+        ('index.json', ['index.json']),
+    ]
+
+    def kb(n):
+        return f'{n / 1024:.1f} KB'
+
+    print(f"\n{'Payload sizes':<18} {'files':>5} {'total':>10} {'median':>10} {'max':>10} {'total .gz':>10} {'total .br':>10}")
+    for label, names in layouts:
+        entries = [writer.entries[name] for name in names if name in writer.entries]
+        if not entries:
+            continue
+        raw = [e['bytes'] for e in entries]
+        compressed = [kb(sum(e.get(key, 0) for e in entries)) if all(key in e for e in entries) else '-'
+                      for key in ('gz_bytes', 'br_bytes')]
+        print(f'{label:<18} {len(raw):>5} {kb(sum(raw)):>10} {kb(statistics.median(raw)):>10} '
+              f'{kb(max(raw)):>10} {compressed[0]:>10} {compressed[1]:>10}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export the nutrition database to static JSON files')
+    parser.add_argument('--since', help='Only export menus on or after this ISO date (YYYY-MM-DD)')
+    parser.add_argument('--full', action='store_true', help='Re-export halls that are unchanged since the last export')
+    args = parser.parse_args()
+
+    print('Exporting database to JSON files...')
+    stats = export_all(since=args.since, full=args.full)
+
+    print(f"\n✅ Export finished: {stats['written']} written, {stats['unchanged']} unchanged, "
+          f"{stats['removed']} removed")
+    print('📁 JSON files saved to:')
     for out_dir in output_dirs:
-        with open(out_dir / filename, 'w') as f:
-            json.dump(output, f, indent=2)
-    print(f'✓ Exported {len(foods)} foods for {hall}')
-
-# Export all available meal types and dates
-cursor.execute('SELECT DISTINCT meal_type, date FROM nutrition_data ORDER BY date DESC, meal_type')
-meals = [dict(row) for row in cursor.fetchall()]
-
-for out_dir in output_dirs:
-    with open(out_dir / 'available-meals.json', 'w') as f:
-        json.dump({'meals': meals, 'count': len(meals), 'last_updated': datetime.now().isoformat()}, f, indent=2)
-print(f'✓ Exported {len(meals)} available meal times')
-
-conn.close()
-
-print('\n✅ All data exported successfully!')
-print('📁 JSON files saved to:')
-for out_dir in output_dirs:
-    print(f'  - {out_dir}')
-print('\nYour API endpoints will be:')
-print('  https://infoshubhjain.github.io/Project-Harvest/api/dining-halls.json')
-print('  https://infoshubhjain.github.io/Project-Harvest/api/[hall-name].json')
+        print(f'  - {out_dir}')
+    print('\nYour API endpoints will be:')
+    print('  https://infoshubhjain.github.io/Project-Harvest/api/dining-halls.json')
+    print('  https://infoshubhjain.github.io/Project-Harvest/api/[hall-name].json')
+    print('  https://infoshubhjain.github.io/Project-Harvest/api/manifest.json')
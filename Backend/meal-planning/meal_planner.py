@@ -1,47 +1,219 @@
 """
 Meal Planning Algorithm
 Generates optimized meal plans based on calorie targets and nutritional goals
+
+The planner works on plain item dicts. For a database it reads them from the
+memory-mapped snapshot written by scrapers/precompute.py (see
+planner_snapshot.py) when that is current, so a one-off `--json` run doesn't
+import pandas or read SQLite; pandas and numpy are only imported when they are
+needed. After a load_to_db.py run without precompute.py the snapshot is stale
+and the planner falls back to SQLite.
 """
+import math
+import os
+import re
 import sqlite3
-import pandas as pd
+import sys
 import random
-import numpy as np
 from datetime import datetime
 from collections import defaultdict
 
+# Shared data-file readers live next to the scrapers
+SCRAPERS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scrapers')
+if SCRAPERS_DIR not in sys.path:
+    sys.path.append(SCRAPERS_DIR)
+
+from data_version import changed_since, current_version  # noqa: E402
+from planner_snapshot import load_snapshot  # noqa: E402
+
+# Nutritional goals (Protein/Fat/Carb splits); scrapers/precompute.py ranks foods for each
+GOALS = {
+    'balanced': {'p': 0.30, 'f': 0.30, 'c': 0.40, 'desc': 'Balanced Diet (30/30/40)'},
+    'weight_loss': {'p': 0.40, 'f': 0.25, 'c': 0.35, 'desc': 'Weight Loss (High Protein)'},
+    'bulking': {'p': 0.30, 'f': 0.20, 'c': 0.50, 'desc': 'Bulking (High Carb/Calorie)'},
+    'keto': {'p': 0.25, 'f': 0.70, 'c': 0.05, 'desc': 'Keto (High Fat, Low Carb)'},
+}
+
+
+def macro_densities(calories, protein, fat, carbs):
+    """Share of calories from protein, fat and carbs, or None without calories"""
+    if not calories or calories <= 0:
+        return None
+    return protein * 4 / calories, fat * 9 / calories, carbs * 4 / calories
+
+
+def score_food(calories, protein, fat, carbs, fiber, goal_config):
+    """
+    Score a food based on nutritional value and a goal from GOALS
+    """
+    densities = macro_densities(calories, protein, fat, carbs)
+    if densities is None:
+        return 0
+    p_density, f_density, c_density = densities
+    score = 0.0
+
+    # Score based on proximity to goal ratios
+    # We reward items that help us hit the target ratio
+
+    # Protein Score
+    if p_density >= goal_config['p']:
+        score += 30  # Excellent protein source
+    elif p_density >= goal_config['p'] * 0.5:
+        score += 15  # Decent protein source
+
+    # Fat Score
+    # For Keto, we want high fat. For others, we usually want moderate fat.
+    if goal_config['f'] > 0.5: # Keto
+        if f_density >= 0.5: score += 20
+    else: # Normal
+        if f_density <= 0.35: score += 20 # Low saturated fat usually preferred
+
+    # Carb Score
+    if goal_config['c'] < 0.1: # Keto/Low Carb
+        if c_density < 0.1: score += 30 # Low carb is good
+        elif c_density > 0.3: score -= 20 # High carb is bad
+    else:
+        if 0.3 <= c_density <= 0.6: score += 10 # Moderate carbs good for energy
+
+    # Fiber is always good
+    score += min(fiber * 3, 15)
+
+    return score
+
+
+def is_missing(value):
+    """True for None and NaN, like pd.isna for a single value"""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def contains(value, pattern):
+    """Case-insensitive regex search that is False for missing values, like str.contains(case=False, na=False)"""
+    return isinstance(value, str) and re.search(pattern, value, re.IGNORECASE) is not None
+
+
+def sample_items(items, n=1):
+    """
+    n distinct random items
+
+    Draws from numpy's global RandomState exactly like DataFrame.sample did,
+    so plans seeded with np.random.seed are unchanged.
+    """
+    import numpy as np
+    return [items[i] for i in np.random.choice(len(items), size=n, replace=False)]
+
 
 class MealPlanner:
-    def __init__(self, db_file='nutrition_data.db', excel_file=None):
+    def __init__(self, db_file='nutrition_data.db', excel_file=None, data_file=None, use_snapshot=True):
         """
         Initialize meal planner
 
         Args:
             db_file: Path to SQLite database (optional)
             excel_file: Path to Excel file to use instead of database
+            data_file: Path to a Parquet, Arrow, CSV or Excel scrape output to use instead of database
+            use_snapshot: Read the database's planner snapshot when it is current
         """
         self.db_file = db_file
         self.excel_file = excel_file
+        self.data_file = data_file or excel_file
         self.data = None
-        
-        # Define nutritional goals (Protein/Fat/Carb splits)
-        self.GOALS = {
-            'balanced': {'p': 0.30, 'f': 0.30, 'c': 0.40, 'desc': 'Balanced Diet (30/30/40)'},
-            'weight_loss': {'p': 0.40, 'f': 0.25, 'c': 0.35, 'desc': 'Weight Loss (High Protein)'},
-            'bulking': {'p': 0.30, 'f': 0.20, 'c': 0.50, 'desc': 'Bulking (High Carb/Calorie)'},
-            'keto': {'p': 0.25, 'f': 0.70, 'c': 0.05, 'desc': 'Keto (High Fat, Low Carb)'},
-        }
+        self.loaded_range = (None, None)
+        self.data_version = None
+        self.use_snapshot = use_snapshot
+        self.snapshot = None
+        self.GOALS = GOALS
 
-    def load_data(self):
-        """Load nutrition data from Excel or database"""
-        if self.excel_file:
-            # print(f"Loading data from Excel: {self.excel_file}")
-            self.data = pd.read_excel(self.excel_file)
+    def load_data(self, start_date=None, end_date=None):
+        """
+        Load nutrition data from a scrape output file or database
+
+        Args:
+            start_date, end_date: Optional ISO dates (YYYY-MM-DD, inclusive). The
+                database is read with a range scan on service_date, so only those
+                days are loaded.
+        """
+        if self.data_file:
+            from data_files import read_data_file, service_dates
+            data = read_data_file(self.data_file)
+            data['service_date'] = service_dates(data)
+            if start_date:
+                data = data[data['service_date'] >= start_date]
+            if end_date:
+                data = data[data['service_date'] <= end_date]
+            self.data = data
         else:
             # print(f"Loading data from database: {self.db_file}")
-            conn = sqlite3.connect(self.db_file)
-            self.data = pd.read_sql_query("SELECT * FROM nutrition_data", conn)
+            query = "SELECT * FROM nutrition_data WHERE 1 = 1"
+            params = []
+            if start_date:
+                query += " AND service_date >= ?"
+                params.append(start_date)
+            if end_date:
+                query += " AND service_date <= ?"
+                params.append(end_date)
+            query += " ORDER BY id"  # the snapshot's order
+            # Read the version first, so a load that lands mid-read is picked up by refresh()
+            self.data_version = current_version(self.db_file)
+            self.data = self._read_database(query, params)
+        self.loaded_range = (start_date, end_date)
+
+    def _read_database(self, query, params):
+        import pandas as pd
+
+        conn = sqlite3.connect(self.db_file)
+        try:
+            return pd.read_sql_query(query, conn, params=params)
+        finally:
             conn.close()
 
+    def refresh(self):
+        """
+        Re-read only the halls and dates that changed in the database since it was loaded
+
+        Uses the data_version stamps written by load_to_db.py, so when nothing
+        changed this costs one tiny query.
+
+        Returns:
+            True if any data was re-read
+        """
+        if self.data_file or self.data is None:
+            return False
+        import pandas as pd
+
+        version = current_version(self.db_file)
+        if version == self.data_version:
+            return False
+        if self.data_version is None or version < self.data_version:
+            # Unknown or replaced database: start over
+            self.load_data(*self.loaded_range)
+            return True
+
+        start_date, end_date = self.loaded_range
+        changed = [(hall, service_date) for hall, service_date, _, _ in changed_since(self.data_version, self.db_file)
+                   if (not start_date or service_date >= start_date) and (not end_date or service_date <= end_date)]
+        self.data_version = version
+        if not changed:
+            return False
+
+        loaded = pd.MultiIndex.from_arrays([self.data['dining_hall'], self.data['service_date'].fillna('')])
+        values = ', '.join(['(?, ?)'] * len(changed))
+        fresh = self._read_database(
+            f"SELECT * FROM nutrition_data WHERE (dining_hall, IFNULL(service_date, '')) IN (VALUES {values})",
+            [value for key in changed for value in key])
+        self.data = (pd.concat([self.data[~loaded.isin(changed)], fresh], ignore_index=True)
+                     .sort_values('id', kind='stable').reset_index(drop=True))
+        return True
+
+    @staticmethod
+    def to_service_date(date):
+        """ISO date for "2026-02-13" or "Friday, February 13, 2026", None if it is neither"""
+        for fmt in ('%Y-%m-%d', '%A, %B %d, %Y'):
+            try:
+                return datetime.strptime(date.strip(), fmt).date().isoformat()
+            except ValueError:
+                continue
+        return None
+
     def get_current_meal_type(self):
         """Automatically determine meal type based on current time"""
         current_hour = datetime.now().hour
@@ -57,10 +229,26 @@ class MealPlanner:
                 return "Breakfast"
             return "Lunch"
 
+    def _current_snapshot(self):
+        """The memory-mapped planner snapshot while it matches the database, else None"""
+        if not self.use_snapshot or self.data_file or self.data is not None:
+            return None
+        if self.snapshot is None or self.snapshot.data_version != current_version(self.db_file):
+            self.snapshot = load_snapshot(self.db_file)
+        return self.snapshot
+
     def filter_available_items(self, dining_hall, meal_type, date=None):
-        """Filter items available for specific dining hall and meal"""
-        if self.data is None:
-            self.load_data()
+        """Items (dicts) available for specific dining hall and meal"""
+        service_date = self.to_service_date(date) if date else None
+        snapshot = self._current_snapshot()
+        if snapshot is not None:
+            return snapshot.filter(dining_hall, meal_type, service_date, date)
+
+        wanted_range = (service_date, service_date)
+        if self.data is None or (self.loaded_range != (None, None) and self.loaded_range != wanted_range):
+            self.load_data(*wanted_range)
+        else:
+            self.refresh()
 
         # Filter by dining hall (partial match)
         filtered = self.data[self.data['dining_hall'].str.contains(dining_hall, case=False, na=False, regex=False)]
@@ -69,7 +257,9 @@ class MealPlanner:
         filtered = filtered[filtered['meal_type'] == meal_type]
 
         # Filter by date if provided
-        if date:
+        if service_date:
+            filtered = filtered[filtered['service_date'] == service_date]
+        elif date:
             filtered = filtered[filtered['date'].str.contains(date, case=False, na=False)]
 
         # Remove items with missing critical nutrition data
@@ -80,53 +270,39 @@ class MealPlanner:
             (filtered['total_fat'].notna())
         ]
 
-        return filtered.copy()
+        return filtered.to_dict('records')
 
-    def categorize_items(self, items_df):
+    def categorize_items(self, items):
         """Categorize items into food groups"""
-        categories = {
-            'protein': items_df[items_df['category'].str.contains(
-                'entree|protein|chicken|beef|fish|pork|turkey|tofu|egg',
-                case=False, na=False
-            )],
-            'carbs': items_df[items_df['category'].str.contains(
-                'grain|rice|pasta|bread|potato|starch|cereal',
-                case=False, na=False
-            )],
-            'vegetables': items_df[items_df['category'].str.contains(
-                'vegetable|veggie|salad|greens',
-                case=False, na=False
-            )],
-            'other': items_df  # All items as fallback
+        category_patterns = {
+            'protein': 'entree|protein|chicken|beef|fish|pork|turkey|tofu|egg',
+            'carbs': 'grain|rice|pasta|bread|potato|starch|cereal',
+            'vegetables': 'vegetable|veggie|salad|greens',
+        }
+        name_keywords = {
+            'protein': ['chicken', 'beef', 'pork', 'fish', 'salmon', 'turkey', 'egg', 'tofu', 'bean', 'lentil'],
+            'carbs': ['rice', 'pasta', 'bread', 'potato', 'noodle', 'tortilla', 'quinoa', 'oat'],
+            'vegetables': ['broccoli', 'carrot', 'spinach', 'lettuce', 'tomato', 'pepper', 'green', 'salad', 'veggie'],
         }
 
-        # Also categorize by name if category is missing
-        for idx, row in items_df.iterrows():
-            name_lower = str(row['name']).lower()
-
-            if any(word in name_lower for word in ['chicken', 'beef', 'pork', 'fish', 'salmon',
-                                                     'turkey', 'egg', 'tofu', 'bean', 'lentil']):
-                if idx not in categories['protein'].index:
-                    categories['protein'] = pd.concat([categories['protein'], items_df.loc[[idx]]])
-
-            if any(word in name_lower for word in ['rice', 'pasta', 'bread', 'potato', 'noodle',
-                                                     'tortilla', 'quinoa', 'oat']):
-                if idx not in categories['carbs'].index:
-                    categories['carbs'] = pd.concat([categories['carbs'], items_df.loc[[idx]]])
-
-            if any(word in name_lower for word in ['broccoli', 'carrot', 'spinach', 'lettuce',
-                                                     'tomato', 'pepper', 'green', 'salad', 'veggie']):
-                if idx not in categories['vegetables'].index:
-                    categories['vegetables'] = pd.concat([categories['vegetables'], items_df.loc[[idx]]])
+        categories = {}
+        for group, pattern in category_patterns.items():
+            by_category = [item for item in items if contains(item['category'], pattern)]
+            # Also categorize by name if category is missing
+            listed = {id(item) for item in by_category}
+            by_name = [item for item in items if id(item) not in listed
+                       and any(word in str(item['name']).lower() for word in name_keywords[group])]
+            categories[group] = by_category + by_name
+        categories['other'] = items  # All items as fallback
 
         return categories
 
-    def filter_by_dietary_restrictions(self, items_df, vegetarian=False, vegan=False):
+    def filter_by_dietary_restrictions(self, items, vegetarian=False, vegan=False):
         """
         Filter items based on dietary restrictions
         """
         if not vegetarian and not vegan:
-            return items_df
+            return items
 
         # Keywords to exclude
         meat_keywords = [
@@ -143,18 +319,16 @@ class MealPlanner:
             'ranch', 'caesar'
         ]
         
-        filtered = items_df.copy()
-        
         # 1. Filter out meat (for both Veg and Vegan)
         pattern = '|'.join(meat_keywords)
-        filtered = filtered[~filtered['name'].str.contains(pattern, case=False, na=False)]
-        filtered = filtered[~filtered['category'].str.contains('Meat|Fish|Poultry', case=False, na=False)]
+        filtered = [item for item in items
+                    if not contains(item['name'], pattern) and not contains(item['category'], 'Meat|Fish|Poultry')]
         
         # 2. Filter out dairy/eggs (for Vegan only)
         if vegan:
             pattern_vegan = '|'.join(dairy_egg_keywords)
-            filtered = filtered[~filtered['name'].str.contains(pattern_vegan, case=False, na=False)]
-            filtered = filtered[~filtered['category'].str.contains('Dairy|Egg', case=False, na=False)]
+            filtered = [item for item in filtered
+                        if not contains(item['name'], pattern_vegan) and not contains(item['category'], 'Dairy|Egg')]
             
         return filtered
 
@@ -162,47 +336,9 @@ class MealPlanner:
         """
         Score an item based on nutritional value and current goal
         """
-        score = 0.0
-        calories = float(item['calories'])
-        protein = float(item['protein'])
-        fat = float(item['total_fat'])
-        carbs = float(item['total_carbohydrate'])
-        fiber = float(item['dietary_fiber']) if pd.notna(item['dietary_fiber']) else 0
-
-        if calories <= 0: return 0
-
-        # Calculate density (per 100 cal)
-        p_density = (protein * 4) / calories
-        f_density = (fat * 9) / calories
-        c_density = (carbs * 4) / calories
-
-        # Score based on proximity to goal ratios
-        # We reward items that help us hit the target ratio
-        
-        # Protein Score
-        if p_density >= goal_config['p']:
-            score += 30  # Excellent protein source
-        elif p_density >= goal_config['p'] * 0.5:
-            score += 15  # Decent protein source
-
-        # Fat Score
-        # For Keto, we want high fat. For others, we usually want moderate fat.
-        if goal_config['f'] > 0.5: # Keto
-            if f_density >= 0.5: score += 20
-        else: # Normal
-            if f_density <= 0.35: score += 20 # Low saturated fat usually preferred
-            
-        # Carb Score
-        if goal_config['c'] < 0.1: # Keto/Low Carb
-            if c_density < 0.1: score += 30 # Low carb is good
-            elif c_density > 0.3: score -= 20 # High carb is bad
-        else:
-            if 0.3 <= c_density <= 0.6: score += 10 # Moderate carbs good for energy
-
-        # Fiber is always good
-        score += min(fiber * 3, 15)
-
-        return score
+        fiber = 0 if is_missing(item['dietary_fiber']) else float(item['dietary_fiber'])
+        return score_food(float(item['calories']), float(item['protein']), float(item['total_fat']),
+                          float(item['total_carbohydrate']), fiber, goal_config)
 
     def generate_random_meal(self, categories, target_calories, goal_config, max_items=5):
         """
@@ -212,16 +348,16 @@ class MealPlanner:
         current_cals = 0
         
         # Ensure we get a main protein
-        if not categories['protein'].empty:
-            main = categories['protein'].sample(n=1).iloc[0]
+        if categories['protein']:
+            main = sample_items(categories['protein'])[0]
             selected_items.append(main)
             current_cals += main['calories']
             
         # Ensure we get a vegetable
-        if not categories['vegetables'].empty:
-            veg = categories['vegetables'].sample(n=1).iloc[0]
+        if categories['vegetables']:
+            veg = sample_items(categories['vegetables'])[0]
             # Avoid duplicates
-            if veg['name'] != selected_items[0]['name']:
+            if not selected_items or veg['name'] != selected_items[0]['name']:
                 selected_items.append(veg)
                 current_cals += veg['calories']
                 
@@ -233,9 +369,9 @@ class MealPlanner:
             # Pick a random category based on what we might need
             # Simple logic: just pick random for now
             cat_name = random.choice(['protein', 'carbs', 'vegetables', 'other'])
-            if categories[cat_name].empty: continue
+            if not categories[cat_name]: continue
             
-            item = categories[cat_name].sample(n=1).iloc[0]
+            item = sample_items(categories[cat_name])[0]
             
             # Skip duplicates
             if any(s['name'] == item['name'] for s in selected_items):
@@ -299,7 +435,7 @@ class MealPlanner:
                 
                 # Handle fiber safely
                 fiber_val = item.get('dietary_fiber', 0)
-                if pd.isna(fiber_val): fiber_val = 0
+                if is_missing(fiber_val): fiber_val = 0
                 new_item['dietary_fiber'] = round(float(fiber_val) / item['servings'] * rounded_servings, 1)
                 
                 discrete_items.append(new_item)
@@ -332,7 +468,7 @@ class MealPlanner:
                 new_item['total_carbohydrate'] = round(item['total_carbohydrate'] * cont_scale, 1)
                 
                 fiber_val = item.get('dietary_fiber', 0)
-                if pd.isna(fiber_val): fiber_val = 0
+                if is_missing(fiber_val): fiber_val = 0
                 new_item['dietary_fiber'] = round(float(fiber_val) * cont_scale, 1)
                 
                 final_items.append(new_item)
@@ -371,7 +507,7 @@ class MealPlanner:
         c_ratio = (total_c * 4) / total_cals
         
         # Euclidean distance from goal vector
-        dist = np.sqrt(
+        dist = math.sqrt(
             (p_ratio - goal_config['p'])**2 +
             (f_ratio - goal_config['f'])**2 +
             (c_ratio - goal_config['c'])**2
@@ -429,10 +565,9 @@ class MealPlanner:
         # We can try adding an item from any category
         candidates = []
         for cat in ['protein', 'carbs', 'vegetables', 'other']:
-            if not self.categories[cat].empty:
-                sample = self.categories[cat].sample(n=min(5, len(self.categories[cat])))
-                for idx, row in sample.iterrows():
-                    item = row.to_dict()
+            if self.categories[cat]:
+                for row in sample_items(self.categories[cat], min(5, len(self.categories[cat]))):
+                    item = dict(row)
                     item['servings'] = 1.0
                     candidates.append(item)
                     
@@ -493,10 +628,10 @@ class MealPlanner:
         # 1. Generate initial population (Random Search)
         population = []
         for _ in range(20):
-            items_df = self.generate_random_meal(categories, target_calories, goal_config)
+            meal_items = self.generate_random_meal(categories, target_calories, goal_config)
             items_list = []
-            for row in items_df:
-                item_dict = row.to_dict()
+            for row in meal_items:
+                item_dict = dict(row)
                 item_dict['servings'] = 1.0
                 items_list.append(item_dict)
             
@@ -543,7 +678,7 @@ class MealPlanner:
         for item in best_meal:
             final_items_clean.append({
                 'name': item['name'],
-                'category': item['category'],
+                'category': None if is_missing(item['category']) else item['category'],  # NaN isn't valid JSON
                 'servings': item['servings'],
                 'calories': item['calories'],
                 'protein': item['protein'],
@@ -583,8 +718,6 @@ class MealPlanner:
 if __name__ == "__main__":
     import argparse
     import json
-    import os
-    import sys
 
     # Default paths
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -600,15 +733,18 @@ if __name__ == "__main__":
     parser.add_argument('--hall', type=str, default='ISR')
     parser.add_argument('--meal', type=str)
     parser.add_argument('--goal', type=str, default='balanced', choices=['balanced', 'weight_loss', 'bulking', 'keto'])
-    parser.add_argument('--date', type=str, help='Filter by date (e.g. "Friday, February 13, 2026")')
+    parser.add_argument('--date', type=str, help='Filter by date (e.g. "2026-02-13" or "Friday, February 13, 2026")')
     parser.add_argument('--vegetarian', action='store_true', help='Vegetarian only')
     parser.add_argument('--vegan', action='store_true', help='Vegan only')
     parser.add_argument('--db', type=str, default=default_db)
+    parser.add_argument('--data-file', type=str, help='Read a Parquet/Arrow/CSV/Excel scrape output instead of the database')
     parser.add_argument('--json', action='store_true')
+    parser.add_argument('--no-snapshot', dest='snapshot', action='store_false',
+                        help="Read the database even if the planner snapshot is current")
     
     args = parser.parse_args()
 
-    planner = MealPlanner(db_file=args.db)
+    planner = MealPlanner(db_file=args.db, data_file=args.data_file, use_snapshot=args.snapshot)
     meal_plan = planner.create_meal_plan(
         target_calories=args.calories,
         dining_hall=args.hall,
@@ -0,0 +1,220 @@
+"""
+Pre-generate meal plans for the common /api/meal-plan requests
+
+Run after load_to_db.py:
+
+    python3 plan_catalog.py [--db ../data/nutrition_data.db] [--workers N]
+
+Every combination of MAIN_HALLS x MEALS x GOALS x DIETS x CALORIE_BUCKETS is
+planned VARIANTS times (no date, no protein target) across all cores and
+stored in the meal_plan_catalog table. server.js answers matching requests
+from it, serving a key's variants in rotation so that asking again gives a
+different plan like the live planner does, and only runs the planner for other
+targets; export_to_json.py publishes it as meal-plans/<hall>/<meal>.json.
+
+Each plan's random search is seeded from its key and variant, so unchanged
+menus give identical plans and the table is left as it was. When neither the data version
+(see scrapers/data_version.py), the grid nor the planner code changed since the
+last build, nothing is planned at all; --force rebuilds anyway.
+"""
+import json
+import os
+import random
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+
+from meal_planner import GOALS, MealPlanner
+# scrapers/, which meal_planner puts on sys.path
+from data_version import consumer_version, current_version, set_consumer_version
+from precompute import replace_table
+
+MAIN_HALLS = ['IKE', 'ISR', 'LAR', 'PAR']
+MEALS = ['Breakfast', 'Lunch', 'Dinner']
+DIETS = ['standard', 'vegetarian', 'vegan']
+CALORIE_BUCKETS = [400, 500, 600, 700, 800, 1000]
+
+# Differently seeded plans per request
+VARIANTS = 3
+
+# A rowid table: plans are ~1 KB each, which WITHOUT ROWID would spill into overflow pages (3x the size)
+CATALOG_TABLE = '''
+    CREATE TABLE IF NOT EXISTS meal_plan_catalog (
+        hall_code TEXT NOT NULL,
+        meal_type TEXT NOT NULL,
+        goal TEXT NOT NULL,
+        diet TEXT NOT NULL,
+        calories INTEGER NOT NULL,
+        variant INTEGER NOT NULL DEFAULT 0,
+        plan TEXT NOT NULL,
+        PRIMARY KEY (hall_code, meal_type, goal, diet, calories, variant)
+    )'''
+
+CATALOG_CONSUMER = 'meal_plan_catalog'
+
+# Plans change with this code as well as with the data
+PLANNER_SOURCES = [os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+                   for name in ('meal_planner.py', 'plan_catalog.py')]
+
+# One planner per worker process; they share the memory-mapped planner snapshot
+_planner = None
+
+
+def _init_worker(db_file):
+    global _planner
+    _planner = MealPlanner(db_file=db_file)
+
+
+def plan_seed(key):
+    """Stable 32-bit seed for a grid cell"""
+    return zlib.crc32('|'.join(map(str, key)).encode('utf-8'))
+
+
+def plan_cell(cell):
+    """
+    Plan one grid cell in the current worker
+
+    Args:
+        cell: (hall_code, dining_hall, meal_type, goal, diet, calories, variant)
+
+    Returns:
+        (catalog row, or None if the planner failed, CPU seconds spent)
+    """
+    hall_code, dining_hall, meal_type, goal, diet, calories, variant = cell
+    key = (hall_code, meal_type, goal, diet, calories, variant)
+    seed = plan_seed(key)
+    random.seed(seed)
+    np.random.seed(seed)
+
+    started = time.process_time()
+    try:
+        plan = _planner.create_meal_plan(
+            target_calories=calories,
+            dining_hall=dining_hall,
+            meal_type=meal_type,
+            goal=goal,
+            vegetarian=diet == 'vegetarian',
+            vegan=diet == 'vegan',
+        )
+    except Exception as e:
+        # Left out of the catalog, so the server plans it live and reports the error
+        print(f"✗ {' / '.join(map(str, key))}: {e}")
+        return None, time.process_time() - started
+    return (*key, json.dumps(plan, separators=(',', ':'))), time.process_time() - started
+
+
+def build_grid(conn, halls=MAIN_HALLS, meals=MEALS, goals=GOALS, diets=DIETS, calories=CALORIE_BUCKETS,
+               variants=VARIANTS):
+    """Grid cells for the halls that are in the database"""
+    names = dict(conn.execute('SELECT hall_code, dining_hall FROM dining_halls WHERE hall_code IS NOT NULL'))
+    return [(code, names[code], meal, goal, diet, cal, variant)
+            for code, meal, goal, diet, cal, variant in product(halls, meals, goals, diets, calories, range(variants))
+            if code in names]
+
+
+def create_catalog_table(conn):
+    """Create meal_plan_catalog, replacing a table from before plans had variants (it is rebuilt anyway)"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(meal_plan_catalog)")}
+    if columns and 'variant' not in columns:
+        conn.execute('DROP TABLE meal_plan_catalog')
+    conn.execute(CATALOG_TABLE)
+
+
+def catalog_params(cells):
+    """Fingerprint of the grid and the planner code, stored with the catalog's data version"""
+    source = b''.join(open(path, 'rb').read() for path in PLANNER_SOURCES)
+    return f"{zlib.crc32(json.dumps(cells).encode('utf-8')):08x}-{zlib.crc32(source):08x}"
+
+
+def build_catalog(db_file='../data/nutrition_data.db', workers=None, force=False, **grid):
+    """
+    Plan every grid cell and store the results in meal_plan_catalog
+
+    Args:
+        workers: Worker processes (default: one per core; 1 plans in this process)
+        force: Rebuild even if the catalog is up to date with the data version
+        grid: halls/meals/goals/diets/calories/variants overrides for build_grid
+
+    Returns:
+        Dict with the grid size, CPU and wall seconds, whether the table changed,
+        and whether the build was skipped as up to date
+    """
+    version = current_version(db_file)
+    conn = sqlite3.connect(db_file)
+    try:
+        create_catalog_table(conn)
+        cells = build_grid(conn, **grid)
+        params = catalog_params(cells)
+        if not force and consumer_version(conn, CATALOG_CONSUMER, params) == version:
+            plans = conn.execute('SELECT COUNT(*) FROM meal_plan_catalog').fetchone()[0]
+            return {'plans': plans, 'failed': len(cells) - plans, 'workers': 0, 'cpu_seconds': 0.0,
+                    'wall_seconds': 0.0, 'changed': False, 'skipped': True, 'version': version}
+    finally:
+        conn.close()
+
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    if workers == 1:
+        _init_worker(db_file)
+        results = [plan_cell(cell) for cell in cells]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(db_file,)) as pool:
+            results = list(pool.map(plan_cell, cells, chunksize=max(1, len(cells) // (workers * 4))))
+    wall = time.perf_counter() - started
+
+    rows = [row for row, _ in results if row is not None]
+    conn = sqlite3.connect(db_file)
+    try:
+        changed = replace_table(conn, 'meal_plan_catalog', rows)
+        if consumer_version(conn, CATALOG_CONSUMER, params) != version:
+            set_consumer_version(conn, CATALOG_CONSUMER, version, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+    return {
+        'plans': len(rows),
+        'failed': len(results) - len(rows),
+        'workers': workers,
+        'cpu_seconds': sum(cpu for _, cpu in results),
+        'wall_seconds': wall,
+        'changed': changed,
+        'skipped': False,
+        'version': version,
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    default_db = os.path.join(os.path.dirname(current_dir), 'data', 'nutrition_data.db')
+
+    parser = argparse.ArgumentParser(description='Pre-generate meal plans for common requests')
+    parser.add_argument('--db', default=default_db, help='SQLite database file')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per core)')
+    parser.add_argument('--halls', nargs='+', default=MAIN_HALLS, help='Hall codes')
+    parser.add_argument('--meals', nargs='+', default=MEALS)
+    parser.add_argument('--calories', nargs='+', type=int, default=CALORIE_BUCKETS)
+    parser.add_argument('--variants', type=int, default=VARIANTS, help=f'Plans per request (default: {VARIANTS})')
+    parser.add_argument('--force', action='store_true', help='Rebuild even if the data version is unchanged')
+    args = parser.parse_args()
+
+    grid = {'halls': args.halls, 'meals': args.meals, 'calories': args.calories, 'variants': args.variants}
+    print(f"Grid: {len(args.halls)} halls x {len(args.meals)} meals x {len(GOALS)} goals x "
+          f"{len(DIETS)} diets x {len(args.calories)} calorie targets x {args.variants} variants")
+    stats = build_catalog(args.db, args.workers, args.force, **grid)
+
+    if stats['skipped']:
+        print(f"✓ {stats['plans']} plans already up to date with data version {stats['version']} "
+              f"(--force to rebuild)")
+        raise SystemExit(0)
+    print(f"✓ {stats['plans']} plans {'stored' if stats['changed'] else 'unchanged'}"
+          + (f", {stats['failed']} failed" if stats['failed'] else ''))
+    print(f"  CPU time:  {stats['cpu_seconds']:.1f} s")
+    print(f"  Wall time: {stats['wall_seconds']:.1f} s on {stats['workers']} workers "
+          f"({stats['cpu_seconds'] / max(stats['wall_seconds'], 1e-9):.1f}x)")
@@ -0,0 +1,160 @@
+"""
+Binary snapshot of the meal planner's working set
+
+scrapers/precompute.py writes it next to the database whenever the data
+version moved (the pipeline once per run, after the last hall is loaded):
+
+    nutrition_data.planner.npy   one record per menu row, in id order: the planner's
+                                 nutrients (float64, NaN for NULL) and string codes
+                                 (int32, -1 for NULL)
+    nutrition_data.planner.json  the string tables, row count and data version
+
+MealPlanner memory-maps the .npy file instead of importing pandas and reading
+SQLite, as long as the snapshot's data version (see scrapers/data_version.py)
+matches the database's; otherwise it falls back to the database. A
+standalone load_to_db.py run therefore leaves the snapshot stale, and the
+planner reads SQLite, until precompute.py runs.
+"""
+import json
+import os
+import re
+import sqlite3
+import tempfile
+
+from data_version import current_version  # scrapers/, which meal_planner puts on sys.path
+
+FORMAT = 1
+
+NUMERIC_FIELDS = ['calories', 'protein', 'total_fat', 'total_carbohydrate', 'dietary_fiber']
+STRING_FIELDS = ['dining_hall', 'service_date', 'date', 'meal_type', 'category', 'name']
+FIELDS = NUMERIC_FIELDS + STRING_FIELDS
+
+
+def snapshot_paths(db_file):
+    """(.npy, .json) paths of a database's snapshot"""
+    base = os.path.splitext(str(db_file))[0] + '.planner'
+    return base + '.npy', base + '.json'
+
+
+def _replace(path, write):
+    """Write a file through a temp file in the same directory, then rename it into place"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _read_meta(db_file):
+    try:
+        with open(snapshot_paths(db_file)[1], encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('format') == FORMAT else None
+
+
+def is_current(db_file):
+    """True if the snapshot exists and matches the database's data version"""
+    meta = _read_meta(db_file)
+    return meta is not None and meta['data_version'] == current_version(db_file)
+
+
+def write_snapshot(db_file):
+    """
+    Write the planner snapshot of a database
+
+    Returns:
+        Number of rows in the snapshot
+    """
+    import numpy as np
+
+    conn = sqlite3.connect(db_file)
+    try:
+        # One read transaction, so the rows match the version
+        conn.execute('BEGIN')
+        try:
+            version = conn.execute('SELECT IFNULL(MAX(version), 0) FROM data_version').fetchone()[0]
+        except sqlite3.OperationalError:  # never stamped
+            version = 0
+        rows = conn.execute(f"SELECT {', '.join(FIELDS)} FROM nutrition_data ORDER BY id").fetchall()
+        conn.rollback()
+    finally:
+        conn.close()
+
+    records = np.empty(len(rows), dtype=[(f, '<f8') for f in NUMERIC_FIELDS] + [(f, '<i4') for f in STRING_FIELDS])
+    columns = list(zip(*rows)) if rows else [()] * len(FIELDS)
+    strings = {}
+    for field, values in zip(FIELDS, columns):
+        if field in NUMERIC_FIELDS:
+            records[field] = np.array(values, dtype=np.float64)  # None -> NaN
+        else:
+            table = {}
+            records[field] = [-1 if v is None else table.setdefault(v, len(table)) for v in values]
+            strings[field] = list(table)
+
+    npy_path, meta_path = snapshot_paths(db_file)
+    _replace(npy_path, lambda f: np.save(f, records))
+    meta = {'format': FORMAT, 'data_version': version, 'rows': len(rows), 'strings': strings}
+    _replace(meta_path, lambda f: f.write(json.dumps(meta, separators=(',', ':')).encode('utf-8')))
+    return len(rows)
+
+
+def load_snapshot(db_file):
+    """The database's snapshot, memory-mapped, or None if it is missing or stale"""
+    meta = _read_meta(db_file)
+    if meta is None or meta['data_version'] != current_version(db_file):
+        return None
+    import numpy as np
+    try:
+        records = np.load(snapshot_paths(db_file)[0], mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if len(records) != meta['rows']:
+        return None
+    return PlannerSnapshot(records, meta['strings'], meta['data_version'])
+
+
+class PlannerSnapshot:
+    def __init__(self, records, strings, data_version):
+        self.records = records
+        self.strings = strings
+        self.data_version = data_version
+
+    def _codes(self, field, match):
+        """Codes of the strings in a field's table that match"""
+        return [code for code, value in enumerate(self.strings[field]) if match(value)]
+
+    def filter(self, dining_hall, meal_type, service_date=None, date=None):
+        """
+        Item dicts for a hall (partial, case-insensitive match) and meal, in id order
+
+        Matches MealPlanner's DataFrame filter: a service_date is compared
+        exactly, otherwise `date` is searched for as a case-insensitive pattern.
+        Items without calories, protein or fat are left out.
+        """
+        import numpy as np
+
+        r = self.records
+        hall = dining_hall.upper()
+        mask = np.isin(r['dining_hall'], self._codes('dining_hall', lambda v: hall in v.upper()))
+        mask &= np.isin(r['meal_type'], self._codes('meal_type', lambda v: v == meal_type))
+        if service_date:
+            mask &= np.isin(r['service_date'], self._codes('service_date', lambda v: v == service_date))
+        elif date:
+            pattern = re.compile(date, re.IGNORECASE)
+            mask &= np.isin(r['date'], self._codes('date', lambda v: pattern.search(v) is not None))
+        mask &= (r['calories'] > 0) & ~np.isnan(r['protein']) & ~np.isnan(r['total_fat'])
+
+        rows = r[mask]
+        columns = {}
+        for field in NUMERIC_FIELDS:
+            columns[field] = rows[field].tolist()
+        for field in STRING_FIELDS:
+            table = self.strings[field]
+            columns[field] = [table[code] if code >= 0 else None for code in rows[field].tolist()]
+        return [dict(zip(FIELDS, values)) for values in zip(*(columns[f] for f in FIELDS))]
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Run the daily data pipeline in one command: scrape, load, precompute, export
+
+    python3 pipeline.py [--days 5] [--testing] [--full] [--retain-days 14] [--plans]
+    python3 pipeline.py --data-file scrapers/complete_dining_data_20260210_150753.parquet
+    python3 pipeline.py --hall ISR --date today --meal Dinner      # re-scrape one meal
+
+The stages form a DAG rather than a chain of scripts:
+
+    scrape hall-day ──> load ──> precompute ──> export hall       (per hall and day)
+                        all halls ──> [plan catalog] ──> export index, summaries, plans
+    build images                                                  (independent)
+
+The scraper runs in this process and hands each hall's rows for a day over a
+queue to a publisher process that owns the database and the API files, so a
+hall is loaded, ranked and exported while the scraper moves on. With
+--deadline the most valuable days (today and tomorrow at the main halls) are
+scraped first and the scrape stops in time to publish what it has. The global
+files are written once every hall is in. Nothing is re-read from disk between
+stages; the scrape output file is still written for the archive.
+
+The scrape-spec flags (--hall, --service, --date, --meal, --spec; see
+scrapers/scrape_spec.py) limit what is navigated at all. When they narrow the
+services or meals, only the scraped meals are replaced in the database.
+
+--data-file replays an existing scrape output through the same stages, hall by
+hall, without starting a browser. Per-stage timings are printed at the end.
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+for path in (BACKEND_DIR / 'scrapers', BACKEND_DIR / 'meal-planning', BACKEND_DIR / 'scripts'):
+    if str(path) not in sys.path:
+        sys.path.append(str(path))
+
+from artifact_writer import ArtifactWriter  # noqa: E402
+from data_files import read_data_file, results_to_frame  # noqa: E402
+from export_to_json import db_path, export_all, export_hall, output_dirs  # noqa: E402
+from load_to_db import load_dataframe_to_database, prune_old_dates  # noqa: E402
+from precompute import precompute, refresh_snapshot  # noqa: E402
+from scrape_spec import add_spec_arguments, spec_from_args  # noqa: E402
+
+# Marks the end of the hall queue
+DONE = None
+
+
+class StageTimer:
+    """Wall-clock seconds and run counts per stage"""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.runs = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds, runs=1):
+        with self._lock:
+            self.seconds[name] += seconds
+            self.runs[name] += runs
+
+    def merge(self, timings):
+        """Add timings from another process, as returned by snapshot()"""
+        for name, (seconds, runs) in timings.items():
+            self.add(name, seconds, runs)
+
+    def snapshot(self):
+        return {name: (self.seconds[name], self.runs[name]) for name in self.seconds}
+
+    def report(self, wall_seconds):
+        print(f"\n{'Stage':<20} {'runs':>5} {'seconds':>9}")
+        for name, seconds in self.seconds.items():
+            print(f'{name:<20} {self.runs[name]:>5} {seconds:>9.2f}')
+        busy = sum(self.seconds.values())
+        print(f"{'wall time':<20} {'':>5} {wall_seconds:>9.2f}  "
+              f"({busy / max(wall_seconds, 1e-9):.1f}x stage time overlapped)")
+
+
+def export_hall_by_name(db_file, writer, hall, since=None):
+    """Export one hall's files through `writer`; returns its index entry, or None if it isn't in the database"""
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.cursor()
+        row = cursor.execute('SELECT id, hall_code FROM dining_halls WHERE dining_hall = ?', (hall,)).fetchone()
+        if row is None:
+            return None
+        return export_hall(cursor, writer, row['id'], hall, row['hall_code'], since)
+    finally:
+        conn.close()
+
+
+def publish(halls, db_file=db_path, dirs=output_dirs, retain_days=None, plans=False, since=None, timer=None,
+            replace='day'):
+    """
+    Load, precompute and export each (hall, results) from `halls` as it arrives, then the global files
+
+    Args:
+        halls: Iterable of (hall name, list of result dicts), ending when the scrape is done
+        retain_days: Prune menus older than this first, so per-hall exports are final
+        plans: Also rebuild the meal plan catalog before the global export
+        replace: What a hall's rows replace in the database, 'day' or 'meal' (see load_to_db.py)
+
+    Returns:
+        The ArtifactWriter's written/unchanged/removed counts
+    """
+    timer = timer or StageTimer()
+    db_file = str(db_file)
+    if retain_days is not None:
+        with timer.stage('prune'):
+            removed = prune_old_dates(db_file, retain_days)
+        print(f"✓ Pruned {removed} rows older than {retain_days} days")
+        if removed:
+            with timer.stage('precompute'):
+                precompute(db_file)
+
+    writer = ArtifactWriter(dirs)
+    exported = {}
+    loaded = False
+    for hall, results in halls:
+        if not results:
+            continue
+        with timer.stage('load'):
+            stats = load_dataframe_to_database(results_to_frame(results), db_file, replace=replace)
+        print(f"✓ Loaded {hall}: {stats['inserted']} inserted, {stats['updated']} updated, "
+              f"{stats['unchanged']} unchanged, {stats['removed']} removed")
+        if not (stats['inserted'] or stats['updated'] or stats['removed']):
+            continue  # no new data version; export_all keeps the hall's files from the last export
+        # Rankings are per hall, so this hall's shards are final once it is ranked
+        loaded = True
+        with timer.stage('precompute'):
+            precompute(db_file, halls=[hall])
+        with timer.stage('export hall'):
+            entry = export_hall_by_name(db_file, writer, hall, since)
+        if entry is not None:
+            exported[hall] = entry
+
+    if loaded:
+        # Once for the run rather than per hall; the plan catalog reads the snapshot
+        with timer.stage('precompute'):
+            refresh_snapshot(db_file, analyze=True)
+
+    if plans:
+        from plan_catalog import build_catalog
+        with timer.stage('plan catalog'):
+            catalog = build_catalog(db_file)
+        print(f"✓ {catalog['plans']} plans {'stored' if catalog['changed'] else 'unchanged'}")
+
+    with timer.stage('export global'):
+        return export_all(db_file, since=since, writer=writer, exported=exported)
+
+
+def _publisher(queue, results, db_file, dirs, retain_days, plans, replace):
+    """Publisher process: consume halls from `queue` until DONE and report back on `results`"""
+    timer = StageTimer()
+    try:
+        stats = publish(iter(queue.get, DONE), db_file, dirs, retain_days, plans, timer=timer,
+                        replace=replace)
+        results.put((stats, timer.snapshot(), None))
+    except Exception:
+        results.put((None, timer.snapshot(), traceback.format_exc()))
+
+
+def split_by_hall(df):
+    """(hall, result dicts) for each hall in a scrape output DataFrame, in file order"""
+    for hall, group in df.groupby('dining_hall', sort=False):
+        yield hall, group.to_dict('records')
+
+
+def build_images(timer):
+    """Refresh the Docs/images variants and manifest (see scripts/build_images.py)"""
+    from build_images import build
+
+    with timer.stage('build images'):
+        stats = build()
+    print(f"✓ Images: {stats['built']} built, {stats['skipped']} unchanged")
+
+
+def scrape(args, spec, on_hall_complete, timer):
+    """Run the scraper, passing each finished hall-day to on_hall_complete, and archive the full output"""
+    from nutrition_scraper import NutritionScraperComplete
+
+    scraper = NutritionScraperComplete(testing_mode=args.testing, headless=True, fast_mode=not args.full)
+    if args.save_snapshots:
+        scraper.save_snapshots = True
+    if args.playback:
+        scraper.playback_mode = True
+        scraper.snapshots_dir = args.playback
+    if args.refresh_structure:
+        scraper.structure_cache_ttl = 0
+    if args.base_url:
+        scraper.base_url = args.base_url.rstrip('/')
+    scraper.spec = spec
+    scraper.reuse_listings = not args.refresh_listings
+    if scraper.session is not None:
+        scraper.session.max_units = args.recycle_after or scraper.session.max_units
+        scraper.session.max_rss_mb = args.max_browser_mb or scraper.session.max_rss_mb
+
+    batch_started = [time.perf_counter()]
+
+    def hall_done(hall, results):
+        timer.add('scrape', time.perf_counter() - batch_started[0])
+        on_hall_complete(hall, results)
+        batch_started[0] = time.perf_counter()
+
+    deadline = args.deadline * 60 if args.deadline else None
+    try:
+        all_results = scraper.scrape_all_with_complete_data(args.days, on_hall_complete=hall_done, deadline=deadline)
+    finally:
+        scraper.close()
+
+    if all_results:
+        with timer.stage('write data file'):
+            cwd = os.getcwd()
+            os.chdir(BACKEND_DIR / 'scrapers')  # next to the other scrape outputs
+            try:
+                scraper.export_results(all_results)
+            finally:
+                os.chdir(cwd)
+    return len(all_results)
+
+
+def run(args):
+    """Run every stage; returns the process exit code"""
+    timer = StageTimer()
+    started = time.perf_counter()
+    spec = spec_from_args(args)
+    replace = 'meal' if spec is not None and spec.partial_days else 'day'
+
+    images = None
+    if not args.skip_images:
+        images = threading.Thread(target=build_images, args=(timer,))
+        images.start()
+
+    # Start the publisher before the scraper launches Chrome, so it doesn't inherit the driver
+    queue, results = multiprocessing.Queue(), multiprocessing.Queue()
+    publisher = multiprocessing.Process(target=_publisher,
+                                        args=(queue, results, args.db, args.out, args.retain_days, args.plans,
+                                              replace))
+    publisher.start()
+
+    try:
+        if args.data_file:
+            with timer.stage('read data file'):
+                halls = list(split_by_hall(read_data_file(args.data_file)))
+            for hall in halls:
+                queue.put(hall)
+        else:
+            scrape(args, spec, lambda hall, rows: queue.put((hall, rows)), timer)
+    finally:
+        queue.put(DONE)
+
+    stats, timings, error = results.get()
+    publisher.join()
+    timer.merge(timings)
+    if images:
+        images.join()
+
+    timer.report(time.perf_counter() - started)
+    if error:
+        print(f'✗ Publishing failed:\n{error}')
+        return 1
+    print(f"\n✅ Pipeline finished: {stats['written']} written, {stats['unchanged']} unchanged, "
+          f"{stats['removed']} removed")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Scrape, load, precompute and export dining hall data')
+    parser.add_argument('--days', type=int, default=5, help='Number of days to scrape (default: 5, including today)')
+    parser.add_argument('--testing', action='store_true', help='Enable testing mode (limits halls/days)')
+    parser.add_argument('--full', action='store_true', help='Full scrape (all dining halls/services)')
+    parser.add_argument('--save-snapshots', action='store_true', help='Save page snapshots when selectors fail')
+    parser.add_argument('--playback', help='Directory of HTML snapshots to use instead of live scraping')
+    parser.add_argument('--refresh-structure', action='store_true',
+                        help='Check the cached dining hall structure against the site even if it is fresh')
+    parser.add_argument('--refresh-listings', action='store_true',
+                        help='Scrape every meal, even those whose listing is unchanged since the last run')
+    parser.add_argument('--deadline', type=float, default=None,
+                        help='Scrape time budget in minutes; the most valuable meals are scraped first')
+    parser.add_argument('--recycle-after', type=int, default=None,
+                        help='Restart the browser after this many meals (see scrapers/driver_manager.py)')
+    parser.add_argument('--max-browser-mb', type=int, default=None,
+                        help='Restart the browser when its memory exceeds this many MB')
+    parser.add_argument('--base-url', help='Scrape another NetNutrition site, e.g. scrapers/netnutrition_sim.py')
+    parser.add_argument('--data-file', help='Replay an existing scrape output instead of scraping')
+    parser.add_argument('--db', default=str(db_path), help='SQLite database file')
+    parser.add_argument('--out', nargs='+', default=[str(d) for d in output_dirs], help='API output directories')
+    parser.add_argument('--retain-days', type=int, default=None,
+                        help='Delete menus more than this many days in the past before loading')
+    parser.add_argument('--plans', action='store_true', help='Rebuild the meal plan catalog (meal-planning/plan_catalog.py)')
+    parser.add_argument('--skip-images', action='store_true', help="Don't build the Docs/images variants")
+    add_spec_arguments(parser)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    sys.exit(run(parse_args()))
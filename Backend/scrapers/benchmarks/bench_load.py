@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark the SQLite loader on the archived scrape files
+
+Compares the old row-by-row insert (one cursor.execute per df.iterrows() row)
+with the bulk path in load_to_db.py and reports rows/sec for each, plus the
+time to re-load the same data on top of itself (the daily no-change upsert).
+
+Usage:
+    python3 benchmarks/bench_load.py                # every file in Backend/data/archives
+    python3 benchmarks/bench_load.py --scale 50     # replicate rows for a larger load
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+
+from data_files import read_data_file
+from load_to_db import load_dataframe_to_database
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'archives')
+
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS nutrition_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dining_hall TEXT NOT NULL, service TEXT NOT NULL, date TEXT NOT NULL,
+        meal_type TEXT NOT NULL, category TEXT, name TEXT NOT NULL, serving_size TEXT,
+        calories REAL, total_fat REAL, saturated_fat REAL, trans_fat REAL, cholesterol REAL,
+        sodium REAL, potassium REAL, total_carbohydrate REAL, dietary_fiber REAL, sugars REAL,
+        protein REAL, scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+
+def legacy_load(df, db_file):
+    """The pre-bulk loader: one INSERT and eleven pd.notna checks per row into the flat table"""
+    conn = sqlite3.connect(db_file)
+    conn.execute(LEGACY_SCHEMA)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_dining_hall ON nutrition_data(dining_hall)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_date_meal ON nutrition_data(date, meal_type)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_name ON nutrition_data(name)")
+    cursor = conn.cursor()
+    numeric = ['calories', 'total_fat', 'saturated_fat', 'trans_fat', 'cholesterol', 'sodium',
+               'potassium', 'total_carbohydrate', 'dietary_fiber', 'sugars', 'protein']
+    for _, row in df.iterrows():
+        cursor.execute('''
+            INSERT INTO nutrition_data (
+                dining_hall, service, date, meal_type, category, name,
+                serving_size, calories, total_fat, saturated_fat, trans_fat,
+                cholesterol, sodium, potassium, total_carbohydrate,
+                dietary_fiber, sugars, protein
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', tuple(row.get(c, '') for c in ['dining_hall', 'service', 'date', 'meal_type',
+                                            'category', 'name', 'serving_size']) +
+            tuple(float(row.get(c, 0)) if pd.notna(row.get(c)) else 0.0 for c in numeric))
+    conn.commit()
+    conn.close()
+
+
+def bulk_load(df, db_file):
+    load_dataframe_to_database(df, db_file)
+
+
+def time_loader(loader, df, repeat, preload=False):
+    best = float('inf')
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_file = os.path.join(tmp, 'bench.db')
+            if preload:
+                loader(df, db_file)
+            start = time.perf_counter()
+            loader(df, db_file)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def replicate(df, scale):
+    """Copies of the frame with distinct natural keys (one service per copy)"""
+    copies = []
+    for i in range(scale):
+        copy = df.copy()
+        copy['service'] = copy['service'].astype(str) + f' #{i}'
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark load_to_db against archived scrapes')
+    parser.add_argument('files', nargs='*', help='Data files (default: Backend/data/archives/*.xlsx)')
+    parser.add_argument('--scale', type=int, default=1, help='Replicate each file N times (default: 1)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions, best is reported (default: 3)')
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join(ARCHIVE_DIR, '*.xlsx')))
+    if not files:
+        print(f"No archived data files found in {ARCHIVE_DIR}")
+        return 1
+
+    print(f"{'file':<45} {'rows':>8} {'legacy rows/s':>14} {'bulk rows/s':>12} {'speedup':>8} {'reload rows/s':>14}")
+    for path in files:
+        df = read_data_file(path)
+        if args.scale > 1:
+            df = replicate(df, args.scale)
+        rows = len(df)
+        with contextlib.redirect_stdout(io.StringIO()):
+            legacy = time_loader(legacy_load, df, args.repeat)
+            bulk = time_loader(bulk_load, df, args.repeat)
+            reload = time_loader(bulk_load, df, args.repeat, preload=True)
+        print(f"{os.path.basename(path):<45} {rows:>8} {rows / legacy:>14,.0f} {rows / bulk:>12,.0f} "
+              f"{legacy / bulk:>7.1f}x {rows / reload:>14,.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
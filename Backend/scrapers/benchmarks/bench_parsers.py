@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Benchmark the pure parsing stages on saved pages, html.parser against lxml
+
+Stages (see page_parsers.py and NutritionScraperComplete):
+
+    structure    hall tree from the data-unitoid anchors
+    meals        "Date-Meal" entries of the results panel
+    items        category map and item rows of an open meal
+    values       extract_nutrition_value and parse_nutrition_value over label lines
+
+Pages: the real click_meal failure page in tests/fixtures/ (unit selector
+and meal list of a live scrape), tests/sample_snapshot.html, and a full-size
+page rendered by the NetNutrition simulator (dates, meals, item table and
+label). --store adds every page in the snapshot store (debug_fragments/);
+those differ between machines, so baselines are only saved and checked
+without it.
+
+Each stage is timed in runs of at least MIN_RUN_SECONDS, each followed by a
+run of a fixed pure-Python calibration loop. The stored figure is the median
+of the per-run ratios, so slow patches on a busy machine cancel out and a
+baseline saved on one machine can guard another.
+
+This is a manual tool; nothing runs it automatically. Run it before and after
+changing page_parsers.py or the BeautifulSoup parser:
+
+    python3 benchmarks/bench_parsers.py --save-baseline    # after an intended change
+    python3 benchmarks/bench_parsers.py --check            # exit 1 if a stage got slower
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bs4 import BeautifulSoup
+
+from netnutrition_sim import SimulatedSite
+from nutrition_scraper import NutritionScraperComplete
+from page_parsers import parse_items, parse_meals, parse_structure
+from snapshot_store import SnapshotStore
+
+TESTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'tests')
+SAVED_PAGES = {'click_meal': os.path.join(TESTS_DIR, 'fixtures', '20260210_144913_click_meal.html'),
+               'sample_snapshot': os.path.join(TESTS_DIR, 'sample_snapshot.html')}
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'parser_baseline.json')
+DEFAULT_TOLERANCE = 1.5
+MIN_RUN_SECONDS = 0.05
+
+try:
+    import lxml  # noqa: F401
+    PARSERS = ['html.parser', 'lxml']
+except ImportError:
+    PARSERS = ['html.parser']
+
+
+def simulated_page():
+    """One page with every part the scraper parses, at the size of a busy hall"""
+    site = SimulatedSite(halls=12, services=4, items=60, seed=1)
+    oid = site.halls[0][1][0]
+    day = site.dates()[1]
+    parts = [site.date_selector(oid), site.meal_list(oid, day), site.item_table(oid, day, 'Lunch'),
+             site.label(1)]
+    return site.page().replace('<main id="main"></main>', f'<main id="main">{"".join(parts)}</main>')
+
+
+def load_pages(include_store=False):
+    """{name: HTML} of the benchmark pages"""
+    pages = {}
+    for name, path in SAVED_PAGES.items():
+        with open(path, encoding='utf-8') as f:
+            pages[name] = f.read()
+    pages['simulated'] = simulated_page()
+    if not include_store:
+        return pages
+    store = SnapshotStore()
+    for digest, entry in store.pages():
+        try:
+            pages[f"{entry['failures'][0]['stage']}_{digest[:8]}"] = store.read(digest)
+        except (OSError, ImportError):
+            continue
+    return pages
+
+
+def calibration_work():
+    """A fixed pure-Python string workload, the unit of stored timings"""
+    total = 0
+    for i in range(20000):
+        total += len(f'{i}mg'.upper().strip())
+    return total
+
+
+def per_call(func, number):
+    started = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - started) / number
+
+
+def calls_per_run(func):
+    """Calls that take at least MIN_RUN_SECONDS"""
+    number = 1
+    while per_call(func, number) * number < MIN_RUN_SECONDS:
+        number *= 2
+    return number
+
+
+def measure(func, repeats):
+    """(median seconds per call, median ratio to the calibration loop) over `repeats` runs"""
+    number, unit_number = calls_per_run(func), calls_per_run(calibration_work)
+    seconds, ratios = [], []
+    for _ in range(repeats):
+        elapsed = per_call(func, number)
+        seconds.append(elapsed)
+        ratios.append(elapsed / per_call(calibration_work, unit_number))
+    return statistics.median(seconds), statistics.median(ratios)
+
+
+def value_lines(pages):
+    """Text lines of every nutrition label on the pages"""
+    lines = []
+    for html in pages.values():
+        for label in BeautifulSoup(html, 'html.parser').select("div[role='dialog'], div[class*='modal']"):
+            lines.extend(line for line in label.get_text('\n').split('\n') if line.strip())
+    return lines or ['Calories 250', 'Total Fat 12g', 'Sodium 480mg', 'Protein 21g']
+
+
+def run(pages, repeats):
+    """{'stage/parser': (seconds per call, calibration units)} over all pages"""
+    scraper = NutritionScraperComplete(playback_mode=True)
+    results = {}
+    stages = {'parse': BeautifulSoup, 'structure': parse_structure, 'meals': parse_meals, 'items': parse_items}
+    for parser in PARSERS:
+        for stage, parse in stages.items():
+            results[f'{stage}/{parser}'] = measure(lambda: [parse(html, parser) for html in pages.values()], repeats)
+
+    lines = value_lines(pages)
+    keywords = ['calories', 'total fat', 'saturated fat', 'trans fat', 'cholesterol', 'sodium', 'potassium',
+                'total carbohydrate', 'dietary fiber', 'sugars', 'protein']
+
+    def values():
+        for line in lines:
+            lower = line.lower()
+            for keyword in keywords:
+                if keyword in lower:
+                    scraper.extract_nutrition_value(line, keyword)
+                    break
+        for raw in ('500mg', '2.5g', 'N/A', '0g', '12 g', '1,200mg'):
+            scraper.parse_nutrition_value(raw)
+
+    results['values/-'] = measure(values, repeats)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the page parsing stages, html.parser vs lxml')
+    parser.add_argument('--repeats', type=int, default=15, help='Runs per stage, the median counts (default: 15)')
+    parser.add_argument('--store', action='store_true', help='Also parse the pages in the snapshot store')
+    parser.add_argument('--save-baseline', action='store_true', help=f'Store these timings in {BASELINE_FILE}')
+    parser.add_argument('--check', action='store_true', help='Exit 1 if a stage is slower than the baseline allows')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'Allowed slowdown against the baseline (default: {DEFAULT_TOLERANCE}x)')
+    args = parser.parse_args()
+    if args.store and (args.save_baseline or args.check):
+        parser.error('baselines cover the fixed pages only; drop --store')
+
+    pages = load_pages(args.store)
+    print(f"Pages: {', '.join(f'{name} ({len(html) / 1024:.0f} KB)' for name, html in pages.items())}")
+    measured = run(pages, args.repeats)
+    results = {key: seconds for key, (seconds, _) in measured.items()}
+    relative = {key: ratio for key, (_, ratio) in measured.items()}
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE) and not args.store:
+        with open(BASELINE_FILE, encoding='utf-8') as f:
+            stored = json.load(f)
+        if stored['pages'] == sorted(pages):
+            baseline = stored['relative']
+        else:
+            print(f"Baseline was saved on other pages ({', '.join(stored['pages'])}); not compared")
+
+    print(f"\n{'Stage':<26}{'ms/call':>10}{'vs html.parser':>16}{'vs baseline':>14}")
+    regressions = []
+    for key, seconds in results.items():
+        stage, name = key.split('/')
+        speedup = results.get(f'{stage}/html.parser', seconds) / seconds
+        change = relative[key] / baseline[key] if key in baseline else None
+        if change is not None and change > args.tolerance:
+            regressions.append((key, change))
+        print(f"{key:<26}{seconds * 1000:>10.3f}{speedup:>15.2f}x"
+              + (f"{change:>13.2f}x" if change is not None else f"{'-':>14}"))
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'pages': sorted(pages), 'seconds': results, 'relative': relative}, f, indent=2)
+            f.write('\n')
+        print(f"\n✓ Baseline saved to {BASELINE_FILE}")
+    if args.check:
+        if not baseline:
+            print("\n✗ No baseline to check against (run with --save-baseline first)")
+            sys.exit(1)
+        if regressions:
+            for key, change in regressions:
+                print(f"✗ {key} is {change:.2f}x its baseline (allowed {args.tolerance}x)")
+            sys.exit(1)
+        print(f"\n✓ Every stage within {args.tolerance}x of the baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Time a cold meal_planner.py run with and without the planner snapshot
+
+Each run is a fresh `python3 meal_planner.py --json` process, as server.js
+starts it for a live /api/meal-plan request, so interpreter start-up and
+imports are included. The slowest imports of the snapshot run are listed from
+`python -X importtime`.
+
+Usage:
+    python3 benchmarks/bench_planner_startup.py [--db ../data/nutrition_data.db] [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'meal-planning'))
+
+from planner_snapshot import is_current, write_snapshot
+
+DEFAULT_DB = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'nutrition_data.db')
+PLANNER = os.path.join(os.path.dirname(__file__), '..', '..', 'meal-planning', 'meal_planner.py')
+
+REQUEST = ['--calories', '700', '--hall', 'ISR', '--meal', 'Lunch', '--goal', 'bulking']
+
+
+def planner_command(db_file, snapshot, importtime=False):
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + [PLANNER, '--json', '--db', db_file]
+    return command + REQUEST + ([] if snapshot else ['--no-snapshot'])
+
+
+def time_runs(command, runs):
+    seconds = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, check=True, capture_output=True)
+        seconds.append(time.perf_counter() - started)
+    return seconds
+
+
+def slowest_imports(db_file, top):
+    """(cumulative microseconds, module) of the top-level imports of a snapshot run"""
+    stderr = subprocess.run(planner_command(db_file, True, importtime=True),
+                            check=True, capture_output=True, text=True).stderr
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):  # nested imports are counted in their parent's cumulative time
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time cold meal planner runs with and without the snapshot')
+    parser.add_argument('--db', default=DEFAULT_DB, help='SQLite database file')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list')
+    args = parser.parse_args()
+
+    if not is_current(args.db):
+        print(f"Writing planner snapshot: {write_snapshot(args.db)} rows")
+
+    print(f"{'Run':<14} {'median':>9} {'min':>9}")
+    medians = {}
+    for label, snapshot in (('database', False), ('snapshot', True)):
+        seconds = time_runs(planner_command(args.db, snapshot), args.runs)
+        medians[label] = statistics.median(seconds)
+        print(f'{label:<14} {medians[label]:>8.3f}s {min(seconds):>8.3f}s')
+    print(f"{'speedup':<14} {medians['database'] / medians['snapshot']:>8.1f}x")
+
+    print('\nSlowest imports with the snapshot:')
+    for microseconds, name in slowest_imports(args.db, args.top):
+        print(f'  {microseconds / 1000:>8.1f} ms  {name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN and time the production query shapes against the old and new schema
+
+Two scratch copies of the database are made: a flat nutrition_data table
+with the original single-column indexes and LIKE '%hall%' lookups ("before"),
+and the normalized food_items/menu_appearances layout created by
+load_to_db.create_nutrition_table and ANALYZEd ("after"). Each query shape
+from server.js, export_to_json.py and the meal planner is run on both.
+
+Usage:
+    python3 benchmarks/bench_queries.py [--db ../data/nutrition_data.db] [--runs 50] [--plans]
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from data_files import NUMERIC_COLUMNS
+from load_to_db import INDEXES, LEGACY_INDEXES, analyze, create_nutrition_table, hall_code_for
+
+DEFAULT_DB = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'nutrition_data.db')
+
+HALL = 'Illinois Street Dining Center (ISR)'
+HALL_PARAM = 'ISR'
+MEAL = 'Lunch'
+
+FLAT_COLUMNS = ', '.join(['id', 'dining_hall', 'hall_code', 'service', 'date', 'service_date', 'meal_type',
+                          'category', 'name', 'serving_size'] + NUMERIC_COLUMNS + ['scraped_at'])
+
+FOOD_COLUMNS = '''name, category, serving_size, calories, protein,
+               total_fat, total_carbohydrate, dietary_fiber, sugars, sodium'''
+
+# name -> (before sql, before params, after sql, after params)
+QUERY_SHAPES = {
+    'server: dining halls': (
+        'SELECT DISTINCT dining_hall FROM nutrition_data ORDER BY dining_hall', (),
+        'SELECT dining_hall FROM dining_halls ORDER BY dining_hall', (),
+    ),
+    'server: hall foods': (
+        f'SELECT DISTINCT {FOOD_COLUMNS} FROM nutrition_data WHERE dining_hall LIKE ? '
+        'GROUP BY name ORDER BY category, name', (f'%{HALL_PARAM}%',),
+        f'SELECT DISTINCT {FOOD_COLUMNS} FROM nutrition_data WHERE hall_code = ? '
+        'GROUP BY name ORDER BY category, name', (HALL_PARAM,),
+    ),
+    'server: hall foods by meal+date': (
+        f'SELECT DISTINCT {FOOD_COLUMNS} FROM nutrition_data WHERE dining_hall LIKE ? '
+        'AND meal_type = ? AND date = ? GROUP BY name ORDER BY category, name',
+        (f'%{HALL_PARAM}%', MEAL, '{date}'),
+        f'SELECT DISTINCT {FOOD_COLUMNS} FROM nutrition_data WHERE hall_code = ? '
+        'AND meal_type = ? AND service_date = ? GROUP BY name ORDER BY category, name',
+        (HALL_PARAM, MEAL, '{service_date}'),
+    ),
+    'server: recommendations': (
+        f'SELECT DISTINCT {FOOD_COLUMNS}, (protein * 4.0 / NULLIF(calories, 0)) as protein_ratio '
+        'FROM nutrition_data WHERE dining_hall LIKE ? AND calories > 0 AND meal_type = ? '
+        'GROUP BY name ORDER BY (protein * 4.0 / NULLIF(calories, 0)) DESC, '
+        '(total_fat * 9.0 / NULLIF(calories, 0)) ASC, dietary_fiber DESC LIMIT 20',
+        (f'%{HALL_PARAM}%', MEAL),
+        f'SELECT DISTINCT {FOOD_COLUMNS}, (protein * 4.0 / NULLIF(calories, 0)) as protein_ratio '
+        'FROM nutrition_data WHERE hall_code = ? AND calories > 0 AND meal_type = ? '
+        'GROUP BY name ORDER BY (protein * 4.0 / NULLIF(calories, 0)) DESC, '
+        '(total_fat * 9.0 / NULLIF(calories, 0)) ASC, dietary_fiber DESC LIMIT 20',
+        (HALL_PARAM, MEAL),
+    ),
+    'export: hall foods': (
+        f'SELECT DISTINCT {FOOD_COLUMNS}, meal_type, date FROM nutrition_data WHERE dining_hall = ? '
+        'ORDER BY date DESC, meal_type, category, name', (HALL,),
+        'SELECT f.name, a.category, NULLIF(f.serving_size, \'\'), f.calories, f.protein, f.total_fat, '
+        'f.total_carbohydrate, f.dietary_fiber, f.sugars, f.sodium, a.meal_type, a.date, a.service_date '
+        'FROM (SELECT DISTINCT food_id, category, meal_type, date, service_date FROM menu_appearances '
+        'WHERE hall_id = ?) a JOIN food_items f ON f.id = a.food_id '
+        'ORDER BY a.service_date DESC, a.meal_type, a.category, f.name', ('{hall_id}',),
+    ),
+    'export: available meals': (
+        'SELECT DISTINCT meal_type, date FROM nutrition_data ORDER BY date DESC, meal_type', (),
+        'SELECT DISTINCT meal_type, date, service_date FROM menu_appearances '
+        'ORDER BY service_date DESC, meal_type', (),
+    ),
+    # The display string can't be range-compared, so the old planner loaded
+    # the whole table and matched dates in pandas
+    'planner: one day': (
+        'SELECT * FROM nutrition_data', (),
+        'SELECT * FROM nutrition_data WHERE service_date >= ? AND service_date <= ?',
+        ('{service_date}', '{service_date}'),
+    ),
+}
+
+
+def make_before(src, dst):
+    """Flat copy of the data with the original schema and indexes"""
+    conn = sqlite3.connect(dst)
+    conn.execute("ATTACH DATABASE ? AS src", (src,))
+    conn.execute(f"CREATE TABLE nutrition_data AS SELECT {FLAT_COLUMNS} FROM src.nutrition_data")
+    conn.commit()
+    conn.execute("DETACH DATABASE src")
+    conn.execute("CREATE INDEX idx_dining_hall ON nutrition_data(dining_hall)")
+    conn.execute("CREATE INDEX idx_date_meal ON nutrition_data(date, meal_type)")
+    conn.execute("CREATE INDEX idx_name ON nutrition_data(name)")
+    conn.commit()
+    conn.close()
+
+
+def make_after(src, dst):
+    """Copy of the database migrated to the current schema"""
+    shutil.copyfile(src, dst)
+    conn = sqlite3.connect(dst)
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_nutrition_table(conn)
+    analyze(conn)
+    conn.commit()
+    conn.close()
+
+
+def bind(params, dates):
+    return tuple(dates.get(p, p) for p in params)
+
+
+def explain(conn, sql, params):
+    return '; '.join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+def time_query(conn, sql, params, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark production query shapes before/after the index redesign')
+    parser.add_argument('--db', default=DEFAULT_DB, help='Database to copy (not modified)')
+    parser.add_argument('--runs', type=int, default=50, help='Runs per query, median is reported (default: 50)')
+    parser.add_argument('--plans', action='store_true', help='Print EXPLAIN QUERY PLAN for every query')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before_db = os.path.join(tmp, 'before.db')
+        after_db = os.path.join(tmp, 'after.db')
+        make_before(args.db, before_db)
+        make_after(args.db, after_db)
+        before = sqlite3.connect(before_db)
+        after = sqlite3.connect(after_db)
+
+        row = after.execute("SELECT date, service_date FROM nutrition_data WHERE hall_code = ? AND meal_type = ? LIMIT 1",
+                            (hall_code_for(HALL), MEAL)).fetchone()
+        hall = after.execute("SELECT id FROM dining_halls WHERE dining_hall = ?", (HALL,)).fetchone()
+        dates = {'{date}': row[0] if row else '', '{service_date}': row[1] if row else '',
+                 '{hall_id}': hall[0] if hall else 0}
+
+        print(f"Indexes after: {', '.join(list(INDEXES))} + the menu_appearances/food_items unique keys "
+              f"(dropped: {', '.join(LEGACY_INDEXES)})\n")
+        print(f"{'query':<34} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for name, (before_sql, before_params, after_sql, after_params) in QUERY_SHAPES.items():
+            before_params = bind(before_params, dates)
+            after_params = bind(after_params, dates)
+            before_ms = time_query(before, before_sql, before_params, args.runs)
+            after_ms = time_query(after, after_sql, after_params, args.runs)
+            print(f"{name:<34} {before_ms:>10.3f} {after_ms:>10.3f} {before_ms / after_ms:>7.1f}x")
+            if args.plans:
+                print(f"    before: {explain(before, before_sql, before_params)}")
+                print(f"    after:  {explain(after, after_sql, after_params)}")
+
+        before.close()
+        after.close()
+        for label, path in (('before', before_db), ('after', after_db)):
+            print(f"\nDatabase size {label}: {os.path.getsize(path) / 1024:.0f} KB", end='')
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
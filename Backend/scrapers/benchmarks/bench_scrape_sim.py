@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Time a full NutritionScraperComplete run against the local NetNutrition simulator
+
+Starts netnutrition_sim.py on a free port, scrapes it end to end with Chrome
+(no network needed besides the one-off chromedriver download) and reports
+meals and items per minute with the simulator's request counts. The structure
+cache and the listing store are off, so every run does the full work.
+
+Usage:
+    python3 benchmarks/bench_scrape_sim.py [--halls 4 --services 2 --items 20] [--days 2]
+                                           [--latency 0.1 --jitter 0.1 --error-rate 0.02]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from netnutrition_sim import add_site_arguments, serve, site_from_args
+from nutrition_scraper import NutritionScraperComplete
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scraper against the local NetNutrition simulator')
+    add_site_arguments(parser)
+    parser.add_argument('--days', type=int, default=2, help='Days to scrape (default: 2)')
+    parser.add_argument('--full', action='store_true', help='All halls, not only the main ones')
+    parser.add_argument('--no-headless', dest='headless', action='store_false', help='Run Chrome with UI')
+    parser.set_defaults(halls=4, services=2, items=20, headless=True)
+    args = parser.parse_args()
+
+    site = site_from_args(args)
+    server, url = serve(site)
+    scraper = NutritionScraperComplete(headless=args.headless, fast_mode=not args.full)
+    scraper.base_url = url
+    scraper.structure_cache_file = None
+    scraper.listing_store_file = None
+    try:
+        started = time.perf_counter()
+        results = scraper.scrape_all_with_complete_data(days_to_scrape=args.days)
+        seconds = time.perf_counter() - started
+    finally:
+        scraper.close()
+        server.shutdown()
+
+    meals = {(r['dining_hall'], r['service'], r['service_date'], r['meal_type']) for r in results}
+    stats = site.stats()
+    print(f"\n{'Scrape':<12}{seconds:>10.1f} s")
+    print(f"{'Meals':<12}{len(meals):>10}  ({len(meals) / seconds * 60:.1f}/min)")
+    print(f"{'Items':<12}{len(results):>10}  ({len(results) / seconds:.2f}/s)")
+    print(f"{'Requests':<12}{sum(stats['requests'].values()):>10}  "
+          + ', '.join(f"{route} {count}" for route, count in sorted(stats['requests'].items())))
+    print(f"{'Errors':<12}{stats['errors']:>10}  (injected)")
+
+
+if __name__ == '__main__':
+    main()
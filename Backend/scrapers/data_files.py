@@ -0,0 +1,216 @@
+"""
+Read and write scraped nutrition data files (Parquet, Arrow IPC, CSV, Excel)
+
+Parquet is the default scrape output: it is written in one columnar pass and
+read back by load_to_db.py and the meal planner without any per-cell work.
+CSV is streamed row by row and needs no third-party packages. The styled
+Excel workbook is only a human-readable report and is generated on demand:
+
+    python3 data_files.py complete_dining_data_20260210_150753.parquet
+"""
+import csv
+import os
+from datetime import datetime
+
+COLUMN_ORDER = [
+    'dining_hall', 'service', 'date', 'service_date', 'meal_type', 'category', 'name', 'serving_size',
+    'calories', 'total_fat', 'saturated_fat', 'trans_fat', 'cholesterol',
+    'sodium', 'potassium', 'total_carbohydrate', 'dietary_fiber', 'sugars', 'protein'
+]
+
+NUMERIC_COLUMNS = [
+    'calories', 'total_fat', 'saturated_fat', 'trans_fat', 'cholesterol',
+    'sodium', 'potassium', 'total_carbohydrate', 'dietary_fiber', 'sugars', 'protein'
+]
+
+SORT_COLUMNS = ['dining_hall', 'service', 'date', 'meal_type', 'name']
+
+# Display format of the `date` column, e.g. "Friday, February 13, 2026"
+DISPLAY_DATE_FORMAT = '%A, %B %d, %Y'
+
+FORMAT_EXTENSIONS = {
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+    'csv': '.csv',
+    'xlsx': '.xlsx',
+}
+
+DATA_FILE_EXTENSIONS = tuple(FORMAT_EXTENSIONS.values()) + ('.feather',)
+
+
+def has_pyarrow():
+    """Return True if pyarrow is installed (needed for Parquet and Arrow output)"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def default_format():
+    """Parquet when pyarrow is available, otherwise streaming CSV"""
+    return 'parquet' if has_pyarrow() else 'csv'
+
+
+def default_filename(fmt, prefix='complete_dining_data'):
+    """Timestamped output filename for the given format"""
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{FORMAT_EXTENSIONS[fmt]}"
+
+
+def ordered_columns(columns):
+    """Known columns in export order, followed by any extra columns as they appear"""
+    columns = list(columns)
+    known = [c for c in COLUMN_ORDER if c in columns]
+    return known + [c for c in columns if c not in COLUMN_ORDER]
+
+
+def sort_results(all_results):
+    """Sort result dicts by dining_hall, service, date, meal_type, name"""
+    return sorted(all_results, key=lambda r: tuple(str(r.get(c) or '') for c in SORT_COLUMNS))
+
+
+def write_csv(all_results, filename):
+    """Stream result dicts to CSV without building a DataFrame"""
+    if not all_results:
+        return None
+    # Every column any row has, like the DataFrame paths (a dict keeps first-seen order)
+    fieldnames = ordered_columns(dict.fromkeys(key for row in all_results for key in row))
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in sort_results(all_results):
+            writer.writerow(row)
+    return filename
+
+
+def results_to_frame(all_results):
+    """Build a sorted DataFrame with numeric nutrition columns"""
+    import pandas as pd
+
+    df = pd.DataFrame(all_results)
+    sort_cols = [c for c in SORT_COLUMNS if c in df.columns]
+    if sort_cols:
+        df = df.sort_values(sort_cols, kind='stable')
+    df = df[ordered_columns(df.columns)].reset_index(drop=True)
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def service_dates(df):
+    """ISO service dates (YYYY-MM-DD) for a scraped DataFrame
+
+    Uses the scraper's `service_date` column where present and parses the
+    display `date` string for older files that don't have it.
+    """
+    import pandas as pd
+
+    parsed = pd.to_datetime(df['date'], format=DISPLAY_DATE_FORMAT, errors='coerce').dt.strftime('%Y-%m-%d')
+    if 'service_date' in df.columns:
+        return df['service_date'].where(df['service_date'].notna(), parsed)
+    return parsed
+
+
+def write_parquet(df, filename):
+    df.to_parquet(filename, index=False)
+    return filename
+
+
+def write_arrow(df, filename):
+    """Write an Arrow IPC (Feather v2) file"""
+    df.to_feather(filename)
+    return filename
+
+
+def write_excel_report(df, filename):
+    """Write the styled Excel report (auto-sized columns, highlighted header)
+
+    Column widths are computed from the DataFrame in one vectorized pass per
+    column instead of visiting every worksheet cell.
+    """
+    import pandas as pd
+    from openpyxl.styles import Font, PatternFill, Alignment
+    from openpyxl.utils import get_column_letter
+
+    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='Complete Data', index=False)
+        worksheet = writer.sheets['Complete Data']
+
+        for idx, col in enumerate(df.columns, 1):
+            values = df[col].astype(str)
+            max_length = max(len(str(col)), int(values.str.len().max()) if len(values) else 0)
+            worksheet.column_dimensions[get_column_letter(idx)].width = min(max_length + 2, 50)
+
+        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+        header_font = Font(bold=True, color="FFFFFF")
+        for cell in worksheet[1]:
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = Alignment(horizontal="center", vertical="center")
+    return filename
+
+
+def write_results(all_results, fmt=None, filename=None):
+    """Write scraped results in the requested format and return the filename"""
+    if not all_results:
+        return None
+    fmt = fmt or default_format()
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if fmt in ('parquet', 'arrow') and not has_pyarrow():
+        print(f"pyarrow is not installed; falling back to CSV instead of {fmt}")
+        fmt = 'csv'
+        if filename:
+            filename = os.path.splitext(filename)[0] + FORMAT_EXTENSIONS['csv']
+    filename = filename or default_filename(fmt)
+
+    if fmt == 'csv':
+        return write_csv(all_results, filename)
+
+    df = results_to_frame(all_results)
+    if fmt == 'parquet':
+        return write_parquet(df, filename)
+    if fmt == 'arrow':
+        return write_arrow(df, filename)
+    return write_excel_report(df, filename)
+
+
+def read_data_file(path):
+    """Read any supported scrape output into a DataFrame"""
+    import pandas as pd
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.parquet':
+        return pd.read_parquet(path)
+    if ext in ('.arrow', '.feather'):
+        return pd.read_feather(path)
+    if ext == '.csv':
+        return pd.read_csv(path)
+    if ext in ('.xlsx', '.xls'):
+        return pd.read_excel(path)
+    raise ValueError(f"Unsupported data file: {path}")
+
+
+def find_latest_data_file(directory='.'):
+    """Most recently modified scrape output in a directory, or None"""
+    candidates = [
+        os.path.join(directory, f) for f in os.listdir(directory)
+        if f.lower().endswith(DATA_FILE_EXTENSIONS) and not f.startswith('~')
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate the styled Excel report from a scrape output file')
+    parser.add_argument('data_file', help='Parquet, Arrow or CSV file written by nutrition_scraper.py')
+    parser.add_argument('--output', help='Report filename (default: same name with .xlsx)')
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.data_file)[0] + '.xlsx'
+    write_excel_report(read_data_file(args.data_file), output)
+    print(f"✓ Excel report written to {output}")
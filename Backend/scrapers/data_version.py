@@ -0,0 +1,134 @@
+"""
+Version stamps for the nutrition database, so consumers can tell cheaply whether it changed
+
+Every load or prune that changes menu rows adds a row to data_version in the
+same transaction, and bumps the counters of each (hall, service_date) it
+touched in data_changes. A consumer remembers the version it last saw:
+
+    from data_version import changed_since, current_version
+
+    if current_version(db_file) != seen:
+        for dining_hall, service_date, version, changes in changed_since(seen, db_file):
+            ...
+
+Menus without a service_date are tracked under ''. Work derived inside the
+database (like the meal plan catalog) records the version it was built from in
+consumer_versions.
+"""
+import sqlite3
+from pathlib import Path
+
+TABLES = {
+    # AUTOINCREMENT, so versions are never reused even if old rows are deleted
+    'data_version': '''
+        CREATE TABLE IF NOT EXISTS data_version (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            rows_changed INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+    'data_changes': '''
+        CREATE TABLE IF NOT EXISTS data_changes (
+            dining_hall TEXT NOT NULL,
+            service_date TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            changes INTEGER NOT NULL,
+            PRIMARY KEY (dining_hall, service_date)
+        ) WITHOUT ROWID''',
+    'consumer_versions': '''
+        CREATE TABLE IF NOT EXISTS consumer_versions (
+            consumer TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            params TEXT NOT NULL
+        ) WITHOUT ROWID''',
+}
+
+
+def create_version_tables(conn):
+    for ddl in TABLES.values():
+        conn.execute(ddl)
+
+
+def record_changes(conn, changes, source):
+    """
+    Stamp a new version for changed menu rows, inside the caller's transaction
+
+    Args:
+        changes: {(dining_hall, service_date): rows changed}
+        source: What changed them ('load', 'prune')
+
+    Returns:
+        The new version, or the current one if nothing changed
+    """
+    totals = {}
+    for (hall, service_date), rows in changes.items():
+        if rows:
+            totals[(hall, service_date or '')] = totals.get((hall, service_date or ''), 0) + rows
+    if not totals:
+        return _latest(conn)
+    version = conn.execute('INSERT INTO data_version (source, rows_changed) VALUES (?, ?)',
+                           (source, sum(totals.values()))).lastrowid
+    conn.executemany('''
+        INSERT INTO data_changes (dining_hall, service_date, version, changes) VALUES (?, ?, ?, 1)
+        ON CONFLICT (dining_hall, service_date) DO UPDATE
+        SET version = excluded.version, changes = changes + 1
+    ''', [(hall, service_date, version) for hall, service_date in sorted(totals)])
+    return version
+
+
+def _latest(conn):
+    return conn.execute('SELECT IFNULL(MAX(version), 0) FROM data_version').fetchone()[0]
+
+
+def _connect_readonly(db_file):
+    """Read-only connection, or None if the database doesn't exist"""
+    path = Path(db_file).resolve()
+    if not path.exists():
+        return None
+    return sqlite3.connect(f'{path.as_uri()}?mode=ro', uri=True)
+
+
+def current_version(db_file='../data/nutrition_data.db'):
+    """Latest data version (0 for a database that was never stamped)"""
+    conn = _connect_readonly(db_file)
+    if conn is None:
+        return 0
+    try:
+        return _latest(conn)
+    except sqlite3.OperationalError:  # no data_version table yet
+        return 0
+    finally:
+        conn.close()
+
+
+def changed_since(version, db_file='../data/nutrition_data.db'):
+    """
+    (dining_hall, service_date, version, changes) of every hall and date changed after `version`
+
+    `version` None or 0 returns everything that was ever stamped.
+    """
+    conn = _connect_readonly(db_file)
+    if conn is None:
+        return []
+    try:
+        return conn.execute('''
+            SELECT dining_hall, service_date, version, changes FROM data_changes
+            WHERE version > ? ORDER BY dining_hall, service_date
+        ''', (version or 0,)).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+
+
+def consumer_version(conn, consumer, params=''):
+    """Data version `consumer` was last built from with `params`, or None"""
+    create_version_tables(conn)
+    row = conn.execute('SELECT version, params FROM consumer_versions WHERE consumer = ?', (consumer,)).fetchone()
+    return row[0] if row and row[1] == params else None
+
+
+def set_consumer_version(conn, consumer, version, params=''):
+    """Record that `consumer` is up to date with `version`; the caller commits"""
+    create_version_tables(conn)
+    conn.execute('INSERT OR REPLACE INTO consumer_versions VALUES (?, ?, ?)', (consumer, version, params))
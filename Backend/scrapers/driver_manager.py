@@ -0,0 +1,245 @@
+"""
+Chrome session lifecycle for long scrapes
+
+A single Chrome instance used for hours grows with every modal and
+navigation, and late-run timeouts get more frequent. BrowserSession owns the
+driver and, at each work-unit boundary (NutritionScraperComplete calls
+unit_done() after every meal), restarts it when:
+
+    the session has done `max_units` units
+    Chrome's memory (chromedriver and every browser process under it) is
+    above `max_rss_mb`
+    the heartbeat (a trivial script) doesn't answer within `heartbeat_timeout`
+
+Every unit navigates from the start page, so a restart between units is
+invisible to the scrape. A session that doesn't quit in time is killed with
+every browser process under chromedriver, so a hung Chrome doesn't keep its
+memory. If no new driver can be started, `driver` is None and the scraper
+stops with what it has. Memory samples and restarts are kept for the run
+summary.
+
+Memory is read with psutil when it is installed, else from /proc (Linux);
+elsewhere only the unit and heartbeat limits apply.
+"""
+import os
+import signal
+import threading
+import time
+
+DEFAULT_MAX_UNITS = 150
+DEFAULT_MAX_RSS_MB = 1500
+DEFAULT_HEARTBEAT_TIMEOUT = 20
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def _proc_children():
+    """{pid: [child pids]} from /proc"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', encoding='utf-8') as f:
+                # The command name may contain spaces; fields after it are fixed
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def process_tree(pid):
+    """PIDs of a process and all its descendants, parents first ([] if it can't be read)"""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            return [root.pid] + [child.pid for child in root.children(recursive=True)]
+        except psutil.Error:
+            return []
+    if not os.path.isdir(f'/proc/{pid}'):
+        return []
+    children = _proc_children()
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop(0)
+        tree.append(current)
+        pending.extend(children.get(current, []))
+    return tree
+
+
+def kill_process_tree(pid):
+    """Kill a process and everything under it; the tree is read first, as orphans get a new parent"""
+    for current in reversed(process_tree(pid)):
+        try:
+            os.kill(current, signal.SIGKILL)
+        except OSError:  # already gone
+            pass
+
+
+def process_tree_rss_mb(pid):
+    """Resident memory of a process and all its descendants in MB, or None if it can't be read"""
+    if pid is None:
+        return None
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / 2 ** 20
+
+    if not os.path.isdir('/proc'):
+        return None
+    children = _proc_children()
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/statm', encoding='utf-8') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            if current == pid:
+                return None
+            continue
+        pending.extend(children.get(current, []))
+    return total / 2 ** 20
+
+
+def driver_pid(driver):
+    """PID of the chromedriver process behind a Selenium driver, or None"""
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    return getattr(process, 'pid', None)
+
+
+def _run_with_timeout(func, timeout):
+    """(finished, result or exception) of func() run in a daemon thread for at most `timeout` seconds"""
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = func()
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        return False, None
+    return 'result' in outcome, outcome.get('result', outcome.get('error'))
+
+
+class BrowserSession:
+    """A restartable WebDriver session; `driver` is replaced on every restart"""
+
+    def __init__(self, create_driver, max_units=DEFAULT_MAX_UNITS, max_rss_mb=DEFAULT_MAX_RSS_MB,
+                 heartbeat_timeout=DEFAULT_HEARTBEAT_TIMEOUT, memory_probe=None):
+        """
+        Args:
+            create_driver: Callable returning a new WebDriver
+            max_units: Restart after this many units (None: never)
+            max_rss_mb: Restart when the browser's memory exceeds this (None: never)
+            heartbeat_timeout: Seconds a live session has to answer the heartbeat
+            memory_probe: Callable(driver) -> MB; defaults to the chromedriver process tree
+        """
+        self.create_driver = create_driver
+        self.max_units = max_units
+        self.max_rss_mb = max_rss_mb
+        self.heartbeat_timeout = heartbeat_timeout
+        self.memory_probe = memory_probe or (lambda driver: process_tree_rss_mb(driver_pid(driver)))
+        self.started = time.time()
+        self.driver = create_driver()
+        self.units = 0  # in the current session
+        self.total_units = 0
+        self.restarts = []  # (seconds since start, 'units' / 'memory' / 'hung')
+        self.memory = []  # (seconds since start, MB)
+
+    def heartbeat(self):
+        """True if the session answers a trivial script in time"""
+        finished, result = _run_with_timeout(lambda: self.driver.execute_script('return 1'), self.heartbeat_timeout)
+        return finished and result == 1
+
+    def unit_done(self):
+        """
+        Record a finished unit and restart the session if it is due
+
+        Returns:
+            Why the session was restarted ('units', 'memory', 'hung'), or None if it was kept
+        """
+        if self.driver is None:  # no session could be started; the scraper stops
+            return None
+        self.units += 1
+        self.total_units += 1
+        rss = self.memory_probe(self.driver)
+        if rss is not None:
+            self.memory.append((time.time() - self.started, rss))
+
+        if not self.heartbeat():
+            reason, detail = 'hung', f'no answer within {self.heartbeat_timeout} s'
+        elif self.max_rss_mb and rss is not None and rss > self.max_rss_mb:
+            reason, detail = 'memory', f'{rss:.0f} MB'
+        elif self.max_units and self.units >= self.max_units:
+            reason, detail = 'units', f'limit {self.max_units}'
+        else:
+            return None
+        self.restart(reason, detail)
+        return reason
+
+    def restart(self, reason, detail=''):
+        """Replace the driver; `driver` is None afterwards if a new one couldn't be started"""
+        print(f"↻ Restarting browser session after {self.units} units ({reason}{': ' + detail if detail else ''})")
+        self._quit()
+        self.units = 0
+        self.restarts.append((time.time() - self.started, reason))
+        try:
+            self.driver = self.create_driver()
+        except Exception as e:
+            print(f"✗ Could not start a new browser session: {e}")
+            self.driver = None
+
+    def _quit(self):
+        """Quit the driver; a hung one is killed with its browser processes"""
+        driver = self.driver
+        if driver is None:
+            return
+        self.driver = None
+        finished, _ = _run_with_timeout(driver.quit, self.heartbeat_timeout)
+        if not finished:
+            pid = driver_pid(driver)
+            if pid is not None:
+                kill_process_tree(pid)
+
+    def close(self):
+        self._quit()
+
+    def summary(self):
+        """Units, restarts and browser memory over the run"""
+        peak = max((mb for _, mb in self.memory), default=None)
+        return {'units': self.total_units, 'restarts': list(self.restarts), 'memory': list(self.memory),
+                'peak_rss_mb': peak}
+
+    def report(self, samples=8):
+        """Print the summary, with up to `samples` evenly spaced memory readings"""
+        info = self.summary()
+        reasons = {}
+        for _, reason in info['restarts']:
+            reasons[reason] = reasons.get(reason, 0) + 1
+        detail = ', '.join(f'{count} {reason}' for reason, count in reasons.items())
+        print(f"Browser sessions: {len(info['restarts'])} restarts over {info['units']} units"
+              + (f' ({detail})' if detail else ''))
+        if info['memory']:
+            step = max(1, len(info['memory']) // samples)
+            readings = info['memory'][::step]
+            print(f"Browser memory (peak {info['peak_rss_mb']:.0f} MB): "
+                  + ', '.join(f'{seconds / 60:.0f} min {mb:.0f} MB' for seconds, mb in readings))
@@ -0,0 +1,111 @@
+"""
+Fingerprints of meal listings, to skip meals whose menu hasn't changed
+
+Most of a scrape is spent opening one nutrition modal per item. A meal's menu
+for a given day is usually published days ahead and rarely changes, so the
+daily run scrapes the same listings again and again. NutritionScraperComplete
+fingerprints each meal's item list (name, item id and category of every item,
+read in one script call once the meal is open) and looks it up here, keyed by
+(hall / service, service date, meal):
+
+    same fingerprint    the rows stored by the last run are reused and no
+                        item modal is opened
+    otherwise           the meal is scraped as usual and its rows stored
+
+Only complete meals are stored (every listed item produced a row), so a meal
+that partly failed is scraped in full next time. Entries for past days are
+dropped when the store is saved to cache/meal_listings.json.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import date
+
+STORE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'meal_listings.json')
+
+FORMAT = 1
+
+# Reads (name, item id, category id) of every item in the open meal
+LISTING_SCRIPT = """
+return Array.from(document.querySelectorAll('a.cbo_nn_itemHover')).map(function (a) {
+    var tr = a.closest('tr');
+    return [a.textContent.trim(), a.getAttribute('onclick') || a.id || '',
+            tr ? tr.getAttribute('data-categoryid') || '' : ''];
+});
+"""
+
+
+def item_id(reference):
+    """The numeric item id in an item's onclick handler or element id ('' if there is none)"""
+    ids = re.findall(r'\d+', reference or '')
+    return ids[-1] if ids else ''
+
+
+def listing_fingerprint(items):
+    """SHA-256 of a meal's (name, onclick or id, category id) items, in page order"""
+    listing = [[name, item_id(reference), category] for name, reference, category in items]
+    return hashlib.sha256(json.dumps(listing).encode('utf-8')).hexdigest()
+
+
+def listing_key(hall, service, service_date, meal_type):
+    return f'{hall} / {service}|{service_date}|{meal_type}'
+
+
+class ListingStore:
+    def __init__(self, base_url, path=STORE_FILE):
+        self.base_url = base_url
+        self.path = path
+        self.meals = {}
+        self.outcomes = []  # (key, 'unchanged' / 'changed' / 'new', rows)
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('format') == FORMAT and data.get('base_url') == base_url:
+            self.meals = data['meals']
+
+    def reuse(self, key, fingerprint):
+        """The stored rows if the meal's listing is unchanged, else None"""
+        entry = self.meals.get(key)
+        if entry is not None and entry['fingerprint'] == fingerprint:
+            self.outcomes.append((key, 'unchanged', len(entry['rows'])))
+            return [dict(row) for row in entry['rows']]
+        self.outcomes.append((key, 'new' if entry is None else 'changed', 0))
+        return None
+
+    def store(self, key, fingerprint, rows):
+        self.meals[key] = {'fingerprint': fingerprint, 'scraped_at': time.time(), 'rows': rows}
+
+    def save(self, today=None):
+        """Write the store, without days before `today`"""
+        today = (today or date.today()).isoformat()
+        self.meals = {key: entry for key, entry in self.meals.items() if key.split('|')[1] >= today}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'format': FORMAT, 'base_url': self.base_url, 'meals': self.meals}, f)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def summary(self):
+        counts = {'unchanged': 0, 'changed': 0, 'new': 0}
+        for _, outcome, _ in self.outcomes:
+            counts[outcome] += 1
+        counts['reused_rows'] = sum(rows for _, _, rows in self.outcomes)
+        return counts
+
+    def report(self):
+        """Print which meals were skipped and the totals"""
+        for key, outcome, rows in self.outcomes:
+            if outcome == 'unchanged':
+                print(f"  ↺ {key.replace('|', ' ')}: unchanged, {rows} rows reused")
+        info = self.summary()
+        print(f"Meal listings: {info['unchanged']} unchanged (skipped, {info['reused_rows']} rows reused), "
+              f"{info['changed']} changed, {info['new']} new")
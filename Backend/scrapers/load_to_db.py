@@ -1,153 +1,579 @@
 """
-Load scraped nutrition data from Excel into SQLite database
+Load scraped nutrition data (Parquet, Arrow, CSV or Excel) into SQLite database
+
+Storage is normalized: each unique food (name, serving size, nutrition) is
+stored once in food_items, and menu_appearances records where and when it
+was served. The nutrition_data view joins them back into the flat one-row-
+per-menu-item shape that server.js, the exporter and the planner query.
 """
+import hashlib
 import sqlite3
+import struct
 import pandas as pd
 import os
-from datetime import datetime
+import re
+from datetime import date, datetime, timedelta
+from data_files import (DATA_FILE_EXTENSIONS, DISPLAY_DATE_FORMAT, NUMERIC_COLUMNS, find_latest_data_file,
+                        read_data_file, service_dates)
+from data_version import create_version_tables, record_changes
+
+TEXT_COLUMNS = ['dining_hall', 'service', 'date', 'meal_type', 'category', 'name', 'serving_size']
+REQUIRED_COLUMNS = ['dining_hall', 'service', 'date', 'meal_type', 'name']
+# Columns derived from the scraped ones while preparing rows
+DERIVED_COLUMNS = ['hall_code', 'service_date', 'nutrition_hash']
+INSERT_COLUMNS = TEXT_COLUMNS + DERIVED_COLUMNS + NUMERIC_COLUMNS
+
+# One row per food per (hall, service, date, meal); everything else is a value
+NATURAL_KEY = ['dining_hall', 'service', 'date', 'meal_type', 'name']
+VALUE_COLUMNS = [c for c in INSERT_COLUMNS if c not in NATURAL_KEY]
+
+APPEARANCE_COLUMNS = ['hall_id', 'service', 'date', 'service_date', 'meal_type', 'category', 'food_id']
+APPEARANCE_KEY = ['hall_id', 'service', 'date', 'meal_type', 'food_id']
+
+# What a load replaces: rows missing from the import are removed within every
+# (hall, date) it contains, or only within its (hall, service, date, meal) for
+# targeted re-scrapes (see scrape_spec.py)
+REPLACE_SCOPES = {
+    'day': ['dining_hall', 'date'],
+    'meal': ['dining_hall', 'service', 'date', 'meal_type'],
+}
+
+# Secondary indexes on menu_appearances, one per production query shape (see
+# benchmarks/bench_queries.py). They are dropped during a bulk load and rebuilt once afterwards.
+#   idx_hall_meal_service_date: server.js foods/recommendations filter on
+#     hall_code (resolved through dining_halls) + meal_type (+ service_date)
+#   idx_service_date_meal: range scans on service_date (planner, retention
+#     pruning) and covers SELECT DISTINCT meal_type, date for available-meals.json
+# Lookups by hall alone (per-hall export) use the leading column of the
+# appearance key.
+INDEXES = {
+    'idx_hall_meal_service_date': 'menu_appearances(hall_id, meal_type, service_date)',
+    'idx_service_date_meal': 'menu_appearances(service_date, meal_type, date, hall_id)',
+}
+
+# Indexes from earlier schemas that the indexes above make redundant
+LEGACY_INDEXES = ['idx_dining_hall', 'idx_name', 'idx_category', 'idx_hall_meal_date', 'idx_date_meal']
+
+
+def hall_code_for(dining_hall):
+    """Short, stable code for exact hall lookups
+
+    "Illinois Street Dining Center (ISR)" -> "ISR", "Ikenberry Dining Center (Ike)" -> "IKE",
+    halls without an abbreviation fall back to a slug: "Everybody Eats" -> "EVERYBODY-EATS".
+    """
+    if dining_hall is None:
+        return None
+    match = re.search(r'\(([^()]+)\)\s*$', dining_hall)
+    if match:
+        return match.group(1).strip().upper()
+    return re.sub(r'[^A-Za-z0-9]+', '-', dining_hall).strip('-').upper()
+
+
+def service_date_for(display_date):
+    """ISO date for a display date: "Friday, March 6, 2026" -> "2026-03-06" (None if unparseable)"""
+    try:
+        return datetime.strptime(display_date, DISPLAY_DATE_FORMAT).date().isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def nutrition_hash(values):
+    """Stable signed 64-bit hash of a food's nutrition values, in NUMERIC_COLUMNS order"""
+    packed = struct.pack(f'<{len(values)}d', *(float(v) + 0.0 for v in values))  # + 0.0 folds -0.0 into 0.0
+    return int.from_bytes(hashlib.blake2b(packed, digest_size=8).digest(), 'little', signed=True)
+
+
+def create_indexes(conn):
+    """Create the secondary indexes on menu_appearances"""
+    for name, target in INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+
+def drop_indexes(conn):
+    """Drop the secondary indexes so bulk inserts don't maintain them row by row"""
+    for name in INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
 
 
 def create_nutrition_table(conn):
-    """Create the nutrition table if it doesn't exist"""
+    """Create the catalog tables and the nutrition_data view if they don't exist"""
     cursor = conn.cursor()
+    numeric = ',\n'.join(f'            {c} REAL' for c in NUMERIC_COLUMNS)
 
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS nutrition_data (
+        CREATE TABLE IF NOT EXISTS dining_halls (
+            id INTEGER PRIMARY KEY,
+            dining_hall TEXT NOT NULL UNIQUE,
+            hall_code TEXT
+        )
+    ''')
+
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS food_items (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            serving_size TEXT NOT NULL DEFAULT '',
+            nutrition_hash INTEGER NOT NULL,
+{numeric},
+            UNIQUE (name, serving_size, nutrition_hash)
+        )
+    ''')
+
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS menu_appearances (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            dining_hall TEXT NOT NULL,
+            hall_id INTEGER NOT NULL REFERENCES dining_halls(id),
             service TEXT NOT NULL,
             date TEXT NOT NULL,
+            service_date TEXT,
             meal_type TEXT NOT NULL,
             category TEXT,
-            name TEXT NOT NULL,
-            serving_size TEXT,
-            calories REAL,
-            total_fat REAL,
-            saturated_fat REAL,
-            trans_fat REAL,
-            cholesterol REAL,
-            sodium REAL,
-            potassium REAL,
-            total_carbohydrate REAL,
-            dietary_fiber REAL,
-            sugars REAL,
-            protein REAL,
-            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            food_id INTEGER NOT NULL REFERENCES food_items(id),
+            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE ({', '.join(APPEARANCE_KEY)})
         )
     ''')
 
+    migrate_flat_table(conn)
+
+    nutrients = ', '.join(f'f.{c}' for c in NUMERIC_COLUMNS)
+    cursor.execute(f'''
+        CREATE VIEW IF NOT EXISTS nutrition_data AS
+        SELECT a.id, h.dining_hall, h.hall_code, a.service, a.date, a.service_date, a.meal_type,
+               a.category, f.name, NULLIF(f.serving_size, '') AS serving_size, {nutrients},
+               f.nutrition_hash, a.food_id, a.scraped_at
+        FROM menu_appearances a
+        JOIN dining_halls h ON h.id = a.hall_id
+        JOIN food_items f ON f.id = a.food_id
+    ''')
+
     # Create indexes for faster queries
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_dining_hall
-        ON nutrition_data(dining_hall)
+    create_indexes(conn)
+    create_version_tables(conn)
+
+    conn.commit()
+    print("✓ Tables food_items/menu_appearances and view 'nutrition_data' created/verified")
+
+
+def migrate_schema(conn):
+    """Bring flat nutrition_data tables created by older versions of this script up to date"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(nutrition_data)")}
+    if 'hall_code' not in columns:
+        conn.execute("ALTER TABLE nutrition_data ADD COLUMN hall_code TEXT")
+        halls = [row[0] for row in conn.execute("SELECT DISTINCT dining_hall FROM nutrition_data")]
+        conn.executemany("UPDATE nutrition_data SET hall_code = ? WHERE dining_hall = ?",
+                         [(hall_code_for(h), h) for h in halls])
+        print(f"✓ Added hall_code for {len(halls)} halls")
+    if 'service_date' not in columns:
+        conn.execute("ALTER TABLE nutrition_data ADD COLUMN service_date TEXT")
+        dates = [row[0] for row in conn.execute("SELECT DISTINCT date FROM nutrition_data")]
+        conn.executemany("UPDATE nutrition_data SET service_date = ? WHERE date = ?",
+                         [(service_date_for(d), d) for d in dates])
+        print(f"✓ Added service_date for {len(dates)} dates")
+    for name in LEGACY_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def migrate_flat_table(conn):
+    """Move rows from the flat nutrition_data table of older versions into the catalog
+
+    Duplicate menu rows (same natural key) keep the most recently inserted copy.
+    The flat table is dropped afterwards so the view can take its name.
+    """
+    kind = conn.execute("SELECT type FROM sqlite_master WHERE name = 'nutrition_data'").fetchone()
+    if not kind or kind[0] != 'table':
+        return
+    migrate_schema(conn)
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(nutrition_data)")}
+    numeric = ', '.join(f'IFNULL(n.{c}, 0.0)' if c in columns else '0.0' for c in NUMERIC_COLUMNS)
+    scraped_at = 'n.scraped_at' if 'scraped_at' in columns else 'CURRENT_TIMESTAMP'
+
+    conn.execute("CREATE TEMP TABLE legacy_hash (id INTEGER PRIMARY KEY, nutrition_hash INTEGER)")
+    rows = conn.execute(f"SELECT n.id, {numeric} FROM nutrition_data n").fetchall()
+    conn.executemany("INSERT INTO temp.legacy_hash VALUES (?, ?)",
+                     [(row[0], nutrition_hash(row[1:])) for row in rows])
+
+    conn.execute('''
+        INSERT OR IGNORE INTO dining_halls (dining_hall, hall_code)
+        SELECT DISTINCT dining_hall, hall_code FROM nutrition_data WHERE dining_hall IS NOT NULL
     ''')
+    conn.execute(f'''
+        INSERT OR IGNORE INTO food_items (name, serving_size, nutrition_hash, {', '.join(NUMERIC_COLUMNS)})
+        SELECT n.name, IFNULL(n.serving_size, ''), l.nutrition_hash, {numeric}
+        FROM nutrition_data n JOIN temp.legacy_hash l ON l.id = n.id
+        WHERE n.name IS NOT NULL
+    ''')
+    moved = conn.execute(f'''
+        INSERT OR IGNORE INTO menu_appearances (id, {', '.join(APPEARANCE_COLUMNS)}, scraped_at)
+        SELECT n.id, h.id, n.service, n.date, n.service_date, n.meal_type, n.category, f.id, {scraped_at}
+        FROM nutrition_data n
+        JOIN temp.legacy_hash l ON l.id = n.id
+        JOIN dining_halls h ON h.dining_hall = n.dining_hall
+        JOIN food_items f ON f.name = n.name AND f.serving_size = IFNULL(n.serving_size, '')
+                         AND f.nutrition_hash = l.nutrition_hash
+        WHERE n.id IN (SELECT MAX(id) FROM nutrition_data GROUP BY {', '.join(NATURAL_KEY)})
+          AND n.service IS NOT NULL AND n.date IS NOT NULL AND n.meal_type IS NOT NULL
+    ''').rowcount
+    conn.execute("DROP TABLE temp.legacy_hash")
+    conn.execute("DROP TABLE nutrition_data")
+    delete_orphans(conn)  # foods only seen in dropped duplicate rows
+    foods = conn.execute("SELECT COUNT(*) FROM food_items").fetchone()[0]
+    print(f"✓ Moved {moved} of {len(rows)} menu rows into menu_appearances ({foods} unique foods)")
+
+
+def analyze(conn):
+    """Refresh the query planner statistics after the data changed"""
+    conn.execute("ANALYZE")
+
+
+def delete_orphans(conn):
+    """Remove catalog foods and halls that no longer appear on any menu"""
+    conn.execute("DELETE FROM food_items WHERE id NOT IN (SELECT food_id FROM menu_appearances)")
+    conn.execute("DELETE FROM dining_halls WHERE id NOT IN (SELECT hall_id FROM menu_appearances)")
+
+
+def prepare_rows(df):
+    """
+    Convert a scraped DataFrame into insert-ready tuples in one vectorized pass
 
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_date_meal
-        ON nutrition_data(date, meal_type)
+    Text columns become str (or None when missing), nutrition columns become
+    float with missing values as 0.0. service_date is taken from the scrape or
+    parsed from the display date, and nutrition_hash identifies the food's
+    nutrition in the catalog. Rows missing a required column are dropped.
+
+    Returns:
+        (rows, failed): list of tuples in INSERT_COLUMNS order, number of dropped rows
+    """
+    prepared = pd.DataFrame(index=df.index)
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            values = df[col]
+            prepared[col] = values.astype(str).astype(object).where(values.notna(), None)
+        else:
+            prepared[col] = None
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            prepared[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0).astype(float)
+        else:
+            prepared[col] = 0.0
+    codes = {hall: hall_code_for(hall) for hall in prepared['dining_hall'].dropna().unique()}
+    prepared['hall_code'] = prepared['dining_hall'].map(codes).astype(object)
+    if 'date' in df.columns:
+        iso = service_dates(df)
+        prepared['service_date'] = iso.astype(str).astype(object).where(iso.notna(), None)
+    else:
+        prepared['service_date'] = None
+    # The catalog stores a missing serving size as '' and the view maps it back to NULL
+    prepared['serving_size'] = prepared['serving_size'].where(prepared['serving_size'] != '', None)
+    prepared['nutrition_hash'] = pd.Series(
+        [nutrition_hash(values) for values in prepared[NUMERIC_COLUMNS].itertuples(index=False, name=None)],
+        index=prepared.index, dtype=object)
+
+    valid = prepared[REQUIRED_COLUMNS].notna().all(axis=1)
+    failed = int((~valid).sum())
+    prepared = prepared.loc[valid, INSERT_COLUMNS]
+    return list(prepared.itertuples(index=False, name=None)), failed
+
+
+def set_connection_pragmas(conn):
+    """Keep the staging table and sort buffers in memory
+
+    Must run before any temp table is created: changing temp_store drops them.
+    """
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MB
+
+
+def set_bulk_load_pragmas(conn):
+    """Tune SQLite for a single large write transaction"""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+
+def reset_journal_mode(conn):
+    """Checkpoint the WAL and return to a rollback journal
+
+    The database file is committed to git by the daily workflow, so it must be
+    self-contained (no -wal/-shm side files) once the load finishes.
+    """
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("PRAGMA journal_mode=DELETE")
+
+
+def stage_rows(conn, rows):
+    """Load prepared rows into a temp table keyed like nutrition_data
+
+    Later duplicates of a natural key replace earlier ones.
+    """
+    columns = ', '.join(INSERT_COLUMNS)
+    placeholders = ', '.join(['?'] * len(INSERT_COLUMNS))
+    conn.execute("DROP TABLE IF EXISTS temp.staging")
+    conn.execute(f'''
+        CREATE TEMP TABLE staging AS SELECT {columns} FROM nutrition_data WHERE 0
     ''')
+    conn.execute(f"CREATE UNIQUE INDEX temp.idx_staging_key ON staging({', '.join(NATURAL_KEY)})")
+    conn.executemany(f"INSERT OR REPLACE INTO staging ({columns}) VALUES ({placeholders})", rows)
 
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_name
-        ON nutrition_data(name)
+
+def resolve_staged_rows(conn):
+    """Add new halls and foods from the staging table to the catalog
+
+    Fills temp.staged_appearances with the staged rows as menu_appearances
+    rows (hall and food ids instead of names and nutrition).
+    """
+    nutrients = ', '.join(NUMERIC_COLUMNS)
+    conn.execute("""
+        INSERT OR IGNORE INTO dining_halls (dining_hall, hall_code)
+        SELECT DISTINCT dining_hall, hall_code FROM staging
+    """)
+    conn.execute(f"""
+        INSERT OR IGNORE INTO food_items (name, serving_size, nutrition_hash, {nutrients})
+        SELECT name, IFNULL(serving_size, ''), nutrition_hash, {nutrients} FROM staging
+    """)
+    conn.execute("DROP TABLE IF EXISTS temp.staged_appearances")
+    conn.execute(f"""
+        CREATE TEMP TABLE staged_appearances AS
+        SELECT h.id AS hall_id, s.service, s.date, s.service_date, s.meal_type, s.category, f.id AS food_id
+        FROM staging s
+        JOIN dining_halls h ON h.dining_hall = s.dining_hall
+        JOIN food_items f ON f.name = s.name AND f.serving_size = IFNULL(s.serving_size, '')
+                         AND f.nutrition_hash = s.nutrition_hash
+    """)
+    conn.execute(f"CREATE UNIQUE INDEX temp.idx_staged_appearance_key ON staged_appearances({', '.join(APPEARANCE_KEY)})")
+
+
+def bulk_insert(conn):
+    """Copy the resolved staged rows into an empty menu_appearances table
+
+    Secondary indexes are dropped before the insert and rebuilt afterwards,
+    which is much cheaper than updating them for every row.
+    """
+    columns = ', '.join(APPEARANCE_COLUMNS)
+    drop_indexes(conn)
+    inserted = conn.execute(f"INSERT INTO menu_appearances ({columns}) SELECT {columns} FROM staged_appearances").rowcount
+    create_indexes(conn)
+    return inserted
+
+
+def _key_match(left='n', right='s'):
+    return ' AND '.join(f"{left}.{c} = {right}.{c}" for c in NATURAL_KEY)
+
+
+def _values_differ(left='n', right='s'):
+    return ' OR '.join(f"{left}.{c} IS NOT {right}.{c}" for c in VALUE_COLUMNS)
+
+
+def _scope_match(replace, left, right, hall_column='dining_hall'):
+    columns = [hall_column if c == 'dining_hall' else c for c in REPLACE_SCOPES[replace]]
+    return ' AND '.join(f"{left}.{c} = {right}.{c}" for c in columns)
+
+
+def count_staged_changes(conn, replace='day'):
+    """Count what merging the staged rows would change, without writing anything
+
+    Rows for a (dining_hall, date) that is present in the import but missing
+    from it count as removed; other halls and dates are left untouched. With
+    replace='meal' the scope is (dining_hall, service, date, meal_type).
+
+    Returns:
+        (dict with inserted, updated, unchanged and removed counts,
+         {(dining_hall, service_date): rows inserted, updated or removed})
+    """
+    staged = conn.execute("SELECT COUNT(*) FROM staging").fetchone()[0]
+    queries = {
+        'inserted': f'''
+            SELECT s.dining_hall, s.service_date, COUNT(*) FROM staging s
+            WHERE NOT EXISTS (SELECT 1 FROM nutrition_data n WHERE {_key_match()})
+            GROUP BY 1, 2''',
+        'updated': f'''
+            SELECT s.dining_hall, s.service_date, COUNT(*) FROM staging s JOIN nutrition_data n ON {_key_match()}
+            WHERE {_values_differ()}
+            GROUP BY 1, 2''',
+        'removed': f'''
+            SELECT n.dining_hall, n.service_date, COUNT(*) FROM nutrition_data n
+            WHERE EXISTS (SELECT 1 FROM staging s WHERE {_scope_match(replace, 's', 'n')})
+              AND NOT EXISTS (SELECT 1 FROM staging s WHERE {_key_match()})
+            GROUP BY 1, 2''',
+    }
+    counts, changes = dict.fromkeys(queries, 0), {}
+    for kind, query in queries.items():
+        for dining_hall, service_date, count in conn.execute(query):
+            counts[kind] += count
+            changes[(dining_hall, service_date)] = changes.get((dining_hall, service_date), 0) + count
+    stats = {
+        'inserted': counts['inserted'],
+        'updated': counts['updated'],
+        'unchanged': staged - counts['inserted'] - counts['updated'],
+        'removed': counts['removed'],
+    }
+    return stats, changes
+
+
+def upsert_staged_rows(conn, replace='day'):
+    """Merge the resolved staged rows into menu_appearances, writing only what changed
+
+    A food whose nutrition changed is a different catalog entry, so its old
+    appearance is deleted and the new one inserted. Existing appearances are
+    only rewritten (and their scraped_at bumped) when their category or
+    service_date differs. Foods and halls left without appearances are removed.
+    """
+    key_match = ' AND '.join(f"s.{c} = a.{c}" for c in APPEARANCE_KEY)
+    conn.execute(f'''
+        DELETE FROM menu_appearances AS a
+        WHERE EXISTS (SELECT 1 FROM staged_appearances s WHERE {_scope_match(replace, 's', 'a', 'hall_id')})
+          AND NOT EXISTS (SELECT 1 FROM staged_appearances s WHERE {key_match})
     ''')
 
-    conn.commit()
-    print("✓ Table 'nutrition_data' created/verified")
+    columns = ', '.join(APPEARANCE_COLUMNS)
+    conn.execute(f'''
+        INSERT INTO menu_appearances ({columns})
+        SELECT {columns} FROM staged_appearances WHERE true
+        ON CONFLICT({', '.join(APPEARANCE_KEY)}) DO UPDATE
+        SET service_date = excluded.service_date, category = excluded.category, scraped_at = CURRENT_TIMESTAMP
+        WHERE menu_appearances.service_date IS NOT excluded.service_date
+           OR menu_appearances.category IS NOT excluded.category
+    ''')
+    delete_orphans(conn)
 
 
-def load_excel_to_database(excel_file, db_file='../data/nutrition_data.db'):
+def load_dataframe_to_database(df, db_file='../data/nutrition_data.db', replace='day'):
     """
-    Load nutrition data from Excel file into SQLite database
+    Load a scraped DataFrame into SQLite in one transaction
+
+    An empty table is bulk-filled; otherwise rows are upserted on the natural
+    key (dining_hall, service, date, meal_type, name), and rows missing from
+    the import are removed within the REPLACE_SCOPES[replace] it covers. When nothing changed the
+    database file is not written at all; otherwise the same transaction stamps
+    a new data version (see data_version.py).
+
+    Returns:
+        dict with inserted, updated, unchanged, removed and failed counts
+    """
+    conn = sqlite3.connect(db_file)
+    try:
+        set_connection_pragmas(conn)
+        create_nutrition_table(conn)
+
+        if 'dining_hall' in df.columns:
+            print(f"Updating data for: {', '.join(df['dining_hall'].dropna().unique())}")
+
+        rows, failed = prepare_rows(df)
+
+        # Staging lives in the temp schema, so diffing never touches the db file
+        stage_rows(conn, rows)
+        empty = conn.execute("SELECT 1 FROM nutrition_data LIMIT 1").fetchone() is None
+        stats, changes = count_staged_changes(conn, replace)
+        conn.commit()
+
+        if stats['inserted'] or stats['updated'] or stats['removed']:
+            set_bulk_load_pragmas(conn)
+            cursor = conn.cursor()
+            cursor.execute("BEGIN")
+            try:
+                resolve_staged_rows(conn)
+                if empty:
+                    bulk_insert(conn)
+                else:
+                    upsert_staged_rows(conn, replace)
+                record_changes(conn, changes, 'load')
+                analyze(conn)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            reset_journal_mode(conn)
+        conn.execute("DROP TABLE IF EXISTS temp.staged_appearances")
+        conn.execute("DROP TABLE temp.staging")
+    finally:
+        conn.close()
+    stats['failed'] = failed
+    return stats
+
+
+def prune_old_dates(db_file='../data/nutrition_data.db', retain_days=14, today=None):
+    """
+    Delete menu rows whose service_date is more than retain_days before today
+
+    Rows loaded without a service_date get it from their display date first,
+    so they age out like the rest. The cutoff is a range scan on
+    idx_service_date_meal. The database file is only written when there is
+    something to fill in or delete, and a deletion is stamped as a new data
+    version.
+
+    Returns:
+        Number of rows deleted
+    """
+    cutoff = ((today or date.today()) - timedelta(days=retain_days)).isoformat()
+    conn = sqlite3.connect(db_file)
+    try:
+        create_nutrition_table(conn)
+        undated = [row[0] for row in conn.execute(
+            "SELECT DISTINCT date FROM menu_appearances WHERE service_date IS NULL")]
+        filled = [(service_date_for(d), d) for d in undated if service_date_for(d)]
+        conn.executemany("UPDATE menu_appearances SET service_date = ? WHERE service_date IS NULL AND date = ?",
+                         filled)
+        changes = dict(((hall, service_date), count) for hall, service_date, count in conn.execute('''
+            SELECT h.dining_hall, a.service_date, COUNT(*)
+            FROM menu_appearances a JOIN dining_halls h ON h.id = a.hall_id
+            WHERE a.service_date < ?
+            GROUP BY 1, 2
+        ''', (cutoff,)))
+        stale = sum(changes.values())
+        if stale:
+            conn.execute("DELETE FROM menu_appearances WHERE service_date < ?", (cutoff,))
+            delete_orphans(conn)
+            record_changes(conn, changes, 'prune')
+            analyze(conn)
+        if stale or filled:
+            conn.commit()
+    finally:
+        conn.close()
+    return stale
+
+
+def load_excel_to_database(excel_file, db_file='../data/nutrition_data.db', replace='day'):
+    """
+    Load nutrition data from a scrape output file into SQLite database
 
     Args:
-        excel_file: Path to the Excel file with nutrition data
+        excel_file: Path to the data file (.parquet, .arrow, .csv or .xlsx)
         db_file: Path to SQLite database file (will be created if doesn't exist)
+        replace: 'day', or 'meal' for the output of a targeted re-scrape
     """
 
-    # Check if Excel file exists
+    # Check if data file exists
     if not os.path.exists(excel_file):
-        print(f"Error: Excel file not found: {excel_file}")
+        print(f"Error: Data file not found: {excel_file}")
         return False
 
     print(f"\nLoading data from: {excel_file}")
     print(f"Database: {db_file}\n")
 
-    # Read Excel file
+    # Read data file
     try:
-        df = pd.read_excel(excel_file)
-        print(f"✓ Read {len(df)} rows from Excel")
+        df = read_data_file(excel_file)
+        print(f"✓ Read {len(df)} rows from {os.path.basename(excel_file)}")
     except Exception as e:
-        print(f"Error reading Excel file: {e}")
+        print(f"Error reading data file: {e}")
         return False
 
-    # Connect to database
-    conn = sqlite3.connect(db_file)
+    try:
+        stats = load_dataframe_to_database(df, db_file, replace)
+    except sqlite3.Error as e:
+        print(f"Error loading data into database: {e}")
+        return False
 
-    # Create table
-    create_nutrition_table(conn)
+    print(f"\n✓ Inserted {stats['inserted']} rows")
+    print(f"✓ Updated {stats['updated']} rows")
+    print(f"✓ Unchanged {stats['unchanged']} rows")
+    print(f"✓ Removed {stats['removed']} rows no longer on the menu")
+    if stats['failed'] > 0:
+        print(f"✗ Skipped {stats['failed']} rows missing required fields")
 
-    # Prepare data for insertion
+    conn = sqlite3.connect(db_file)
     cursor = conn.cursor()
 
-    # Clear existing data for the dining halls we are importing
-    # (So we don't have duplicates, but we preserve other halls)
-    if 'dining_hall' in df.columns:
-        halls_to_update = df['dining_hall'].unique()
-        print(f"Updating data for: {', '.join(halls_to_update)}")
-        
-        placeholders = ','.join(['?'] * len(halls_to_update))
-        cursor.execute(f"DELETE FROM nutrition_data WHERE dining_hall IN ({placeholders})", list(halls_to_update))
-        print(f"✓ Cleared existing data for these {len(halls_to_update)} halls")
-    else:
-        # Fallback if no dining_hall column (shouldn't happen with our scraper)
-        print("Warning: No dining_hall column found, appending data without clearing old records.")
-        # cursor.execute("DELETE FROM nutrition_data") 
-    
-    # Insert data
-    inserted = 0
-    failed = 0
-
-    for idx, row in df.iterrows():
-        try:
-            cursor.execute('''
-                INSERT INTO nutrition_data (
-                    dining_hall, service, date, meal_type, category, name,
-                    serving_size, calories, total_fat, saturated_fat, trans_fat,
-                    cholesterol, sodium, potassium, total_carbohydrate,
-                    dietary_fiber, sugars, protein
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                row.get('dining_hall', ''),
-                row.get('service', ''),
-                row.get('date', ''),
-                row.get('meal_type', ''),
-                row.get('category', ''),
-                row.get('name', ''),
-                row.get('serving_size', ''),
-                float(row.get('calories', 0)) if pd.notna(row.get('calories')) else 0.0,
-                float(row.get('total_fat', 0)) if pd.notna(row.get('total_fat')) else 0.0,
-                float(row.get('saturated_fat', 0)) if pd.notna(row.get('saturated_fat')) else 0.0,
-                float(row.get('trans_fat', 0)) if pd.notna(row.get('trans_fat')) else 0.0,
-                float(row.get('cholesterol', 0)) if pd.notna(row.get('cholesterol')) else 0.0,
-                float(row.get('sodium', 0)) if pd.notna(row.get('sodium')) else 0.0,
-                float(row.get('potassium', 0)) if pd.notna(row.get('potassium')) else 0.0,
-                float(row.get('total_carbohydrate', 0)) if pd.notna(row.get('total_carbohydrate')) else 0.0,
-                float(row.get('dietary_fiber', 0)) if pd.notna(row.get('dietary_fiber')) else 0.0,
-                float(row.get('sugars', 0)) if pd.notna(row.get('sugars')) else 0.0,
-                float(row.get('protein', 0)) if pd.notna(row.get('protein')) else 0.0
-            ))
-            inserted += 1
-        except Exception as e:
-            print(f"Error inserting row {idx}: {e}")
-            failed += 1
-
-    conn.commit()
-
-    print(f"\n✓ Inserted {inserted} rows")
-    if failed > 0:
-        print(f"✗ Failed to insert {failed} rows")
-
     # Display summary statistics
     print("\n" + "="*60)
     print("DATABASE SUMMARY")
@@ -161,9 +587,13 @@ def load_excel_to_database(excel_file, db_file='../data/nutrition_data.db'):
     halls = cursor.fetchone()[0]
     print(f"Dining halls: {halls}")
 
-    cursor.execute("SELECT COUNT(DISTINCT date) FROM nutrition_data")
-    dates = cursor.fetchone()[0]
-    print(f"Unique dates: {dates}")
+    cursor.execute("SELECT COUNT(DISTINCT service_date), MIN(service_date), MAX(service_date) FROM nutrition_data")
+    dates, first, last = cursor.fetchone()
+    print(f"Unique dates: {dates} ({first} to {last})")
+
+    cursor.execute("SELECT COUNT(*) FROM food_items")
+    foods = cursor.fetchone()[0]
+    print(f"Unique foods: {foods}")
 
     cursor.execute("SELECT COUNT(DISTINCT meal_type) FROM nutrition_data")
     meals = cursor.fetchone()[0]
@@ -241,27 +671,44 @@ def query_database(db_file='nutrition_data.db'):
 
 
 if __name__ == "__main__":
+    import argparse
     import sys
 
-    # Check for command line argument
-    if len(sys.argv) > 1:
-        excel_file = sys.argv[1]
-    else:
-        # Default: look for the most recent Excel file in current directory
-        excel_files = [f for f in os.listdir('.') if f.endswith('.xlsx') and not f.startswith('~')]
-
-        if not excel_files:
-            print("No Excel files found in current directory")
-            print("\nUsage: python load_to_db.py [excel_file.xlsx]")
+    parser = argparse.ArgumentParser(description='Load a scrape output file into the nutrition database')
+    parser.add_argument('data_file', nargs='?', help='Scrape output (default: most recent in current directory)')
+    parser.add_argument('--db', default='../data/nutrition_data.db', help='SQLite database file')
+    parser.add_argument('--retain-days', type=int, default=None,
+                        help='After loading, delete menus more than this many days in the past')
+    parser.add_argument('--prune-only', action='store_true', help='Only apply --retain-days, load nothing')
+    parser.add_argument('--replace', choices=sorted(REPLACE_SCOPES), default='day',
+                        help="Remove missing rows per hall and date (default), or per meal for a targeted re-scrape")
+    args = parser.parse_args()
+
+    if args.prune_only:
+        if args.retain_days is None:
+            parser.error('--prune-only requires --retain-days')
+        removed = prune_old_dates(args.db, args.retain_days)
+        print(f"✓ Pruned {removed} rows older than {args.retain_days} days")
+        sys.exit(0)
+
+    excel_file = args.data_file
+    if not excel_file:
+        # Default: look for the most recent scrape output in current directory
+        excel_file = find_latest_data_file('.')
+
+        if not excel_file:
+            print(f"No data files ({', '.join(DATA_FILE_EXTENSIONS)}) found in current directory")
+            print("\nUsage: python load_to_db.py [data_file.parquet|.arrow|.csv|.xlsx] [--retain-days N]")
             sys.exit(1)
 
-        # Use most recently modified Excel file
-        excel_files.sort(key=lambda x: os.path.getmtime(x), reverse=True)
-        excel_file = excel_files[0]
-        print(f"Using most recent Excel file: {excel_file}")
+        print(f"Using most recent data file: {excel_file}")
 
     # Load data
-    success = load_excel_to_database(excel_file)
+    success = load_excel_to_database(excel_file, args.db, args.replace)
+
+    if success and args.retain_days is not None:
+        removed = prune_old_dates(args.db, args.retain_days)
+        print(f"✓ Pruned {removed} rows older than {args.retain_days} days")
 
     if success:
         # Show example queries
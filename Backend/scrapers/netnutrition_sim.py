@@ -0,0 +1,300 @@
+"""
+Local NetNutrition simulator for offline scraper runs and benchmarks
+
+    python3 netnutrition_sim.py --port 8765 --items 40 --latency 0.2 --error-rate 0.02
+    python3 nutrition_scraper.py --base-url http://127.0.0.1:8765 --testing
+
+Serves the pages and the client-side flow the scraper drives, with the same
+ids, classes and attributes as eatsmart.housing.illinois.edu:
+
+    /NetNutrition/1        page with the #nav-unit-selector dropdown (halls as
+                           a.text-primary, their services below them)
+    unit link              loads #nav-date-selector (a.dropdown-item[data-date])
+    date link              loads #navBarResults (li.list-group-item "Date-Meal")
+    meal item              loads the item table (tr.cbo_nn_itemGroupRow
+                           category rows, a.cbo_nn_itemHover items)
+    item link              opens the nutrition label modal (div.modal.show)
+
+Menus are synthetic and deterministic: the same seed and sizes give the same
+halls, items and nutrition on every run, for dates starting today. Every
+request can be delayed (`latency` seconds plus up to `jitter`) and a share of
+the fragment requests fails with HTTP 500 (`error_rate`), so retries and
+timeouts are exercised too. GET /sim/stats returns request and error counts.
+"""
+import argparse
+import hashlib
+import html
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+MAIN_HALLS = [
+    "Pennsylvania Avenue Dining Hall (PAR)",
+    "Lincoln Avenue Dining Hall (LAR)",
+    "Ikenberry Dining Center (Ike)",
+    "Illinois Street Dining Center (ISR)",
+]
+MEALS = ['Breakfast', 'Lunch', 'Dinner']
+CATEGORIES = ['Entrees', 'Sides', 'Soups', 'Salads', 'Desserts', 'Beverages', 'Grill', 'Bakery']
+ADJECTIVES = ['Roasted', 'Grilled', 'Spicy', 'Baked', 'Steamed', 'Crispy', 'Herbed', 'Smoked', 'Fresh', 'Garlic']
+FOODS = ['Chicken', 'Tofu', 'Rice', 'Broccoli', 'Pasta', 'Salmon', 'Potatoes', 'Beans', 'Corn', 'Turkey',
+         'Lentils', 'Carrots', 'Pork', 'Quinoa', 'Mushrooms', 'Beef', 'Cauliflower', 'Eggs', 'Noodles', 'Squash']
+LABEL_FIELDS = [('Calories', '', 50, 900), ('Total Fat', 'g', 0, 45), ('Saturated Fat', 'g', 0, 15),
+                ('Trans Fat', 'g', 0, 2), ('Cholesterol', 'mg', 0, 200), ('Sodium', 'mg', 0, 1500),
+                ('Potassium', 'mg', 0, 900), ('Total Carbohydrate', 'g', 0, 110), ('Dietary Fiber', 'g', 0, 15),
+                ('Sugars', 'g', 0, 40), ('Protein', 'g', 0, 60)]
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>NetNutrition (simulated)</title></head>
+<body>
+<nav>
+<div id="nav-unit-selector" class="dropdown">
+<div class="dropdown-menu">
+{units}
+</div>
+</div>
+</nav>
+<main id="main"></main>
+<script>
+function simLoad(url, target) {{
+    var request = new XMLHttpRequest();
+    request.open('GET', url);
+    request.onload = function () {{
+        if (request.status === 200) {{ target.insertAdjacentHTML('beforeend', request.responseText); }}
+    }};
+    request.send();
+}}
+function simClear() {{
+    for (var i = 0; i < arguments.length; i++) {{
+        var element = document.getElementById(arguments[i]);
+        if (element) {{ element.remove(); }}
+    }}
+}}
+function unitsSelectUnit(oid) {{
+    window.simUnit = oid;
+    simClear('nav-date-selector', 'navBarResults', 'itemPanel', 'nutritionLabel');
+    simLoad('/sim/unit/' + oid, document.getElementById('main'));
+}}
+function selectDate(day) {{
+    simClear('navBarResults', 'itemPanel', 'nutritionLabel');
+    simLoad('/sim/meals/' + window.simUnit + '/' + day, document.getElementById('main'));
+}}
+function selectMeal(oid, day, meal) {{
+    simClear('itemPanel', 'nutritionLabel');
+    simLoad('/sim/items/' + oid + '/' + day + '/' + encodeURIComponent(meal), document.getElementById('main'));
+}}
+function getItemNutritionLabelOnClick(event, itemId) {{
+    simClear('nutritionLabel');
+    simLoad('/sim/label/' + itemId, document.body);
+}}
+function closeNutritionLabel() {{ simClear('nutritionLabel'); }}
+</script>
+</body></html>
+"""
+
+
+def _rng(*key):
+    """A random.Random seeded by `key`, stable across processes"""
+    return random.Random(hashlib.sha256(repr(key).encode('utf-8')).hexdigest())
+
+
+def _long_date(day):
+    return f"{day:%A}, {day:%B} {day.day}, {day.year}"
+
+
+class SimulatedSite:
+    def __init__(self, halls=6, services=3, days=7, items=30, seed=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 today=None):
+        """
+        Args:
+            halls: Dining halls (the first four are the real main halls)
+            services: Services per hall
+            days: Days in the date selector, from today
+            items: Items per meal
+            latency, jitter: Seconds every request is delayed, plus up to `jitter` more
+            error_rate: Share of fragment requests answered with HTTP 500
+        """
+        self.days = days
+        self.items = items
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.today = today
+        self.units = {}  # unit id -> (hall name, service name or None)
+        self.halls = []
+        oid = 1
+        for h in range(halls):
+            hall = MAIN_HALLS[h] if h < len(MAIN_HALLS) else f"Simulated Hall {h + 1} (SH{h + 1})"
+            hall_oid, oid = oid, oid + 1
+            self.units[hall_oid] = (hall, None)
+            service_ids = []
+            for s in range(services):
+                self.units[oid] = (hall, f"{hall.split(' (')[0]} Station {s + 1}")
+                service_ids.append(oid)
+                oid += 1
+            self.halls.append((hall_oid, service_ids))
+        self.requests = {}
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+
+    # -- content ---------------------------------------------------------
+
+    def dates(self):
+        today = self.today or date.today()
+        return [today + timedelta(days=offset) for offset in range(self.days)]
+
+    def page(self):
+        links = []
+        for hall_oid, service_ids in self.halls:
+            for oid in [hall_oid] + service_ids:
+                hall, service = self.units[oid]
+                name = html.escape(service or hall)
+                css = 'text-muted pl-2' if service else 'text-primary'
+                links.append(f'<div class="dropdown-item"><a class="{css}" title="{name}" data-unitoid="{oid}" '
+                             f'href="#" onclick="unitsSelectUnit({oid});return false;">{name}</a></div>')
+        return PAGE.format(units='\n'.join(links))
+
+    def date_selector(self, oid):
+        links = []
+        for offset, day in enumerate(self.dates()):
+            data_date = 'Today' if offset == 0 else f'{day:%m/%d/%Y}'
+            links.append(f'<a class="dropdown-item" data-date="{data_date}" title="{_long_date(day)}" href="#" '
+                         f'onclick="selectDate(\'{day.isoformat()}\');return false;">{_long_date(day)}</a>')
+        links.append('<a class="dropdown-item" data-date="Show All Dates" href="#">Show All Dates</a>')
+        return f'<div id="nav-date-selector" class="dropdown-menu">{"".join(links)}</div>'
+
+    def meal_list(self, oid, day):
+        items = [f'<li class="list-group-item" onclick="selectMeal({oid}, \'{day.isoformat()}\', \'{meal}\')">'
+                 f'{_long_date(day)}-{meal}</li>' for meal in MEALS]
+        return f'<div id="navBarResults"><ul class="list-group">{"".join(items)}</ul></div>'
+
+    def menu(self, oid, day, meal):
+        """[(category id, category, [(item id, name)])] of a meal"""
+        rng = _rng(self.seed, oid, day.isoformat(), meal)
+        names = sorted({f'{rng.choice(ADJECTIVES)} {rng.choice(FOODS)}' for _ in range(self.items * 2)})
+        names = rng.sample(names, min(self.items, len(names)))
+        categories = rng.sample(CATEGORIES, min(4, len(CATEGORIES)))
+        grouped = [(str(CATEGORIES.index(c) + 1), c, []) for c in categories]
+        for i, name in enumerate(names):
+            item_id = int(hashlib.sha256(name.encode('utf-8')).hexdigest()[:7], 16)
+            grouped[i % len(grouped)][2].append((item_id, name))
+        return grouped
+
+    def item_table(self, oid, day, meal):
+        rows = []
+        for category_id, category, items in self.menu(oid, day, meal):
+            rows.append(f'<tr class="cbo_nn_itemGroupRow"><td><div role="button">{category}<i class="fa"></i>'
+                        f'</div></td></tr>')
+            for item_id, name in items:
+                rows.append(f'<tr data-categoryid="{category_id}"><td><a class="cbo_nn_itemHover" href="#" '
+                            f'onclick="getItemNutritionLabelOnClick(event, {item_id});return false;">'
+                            f'{html.escape(name)}</a></td></tr>')
+        return f'<table id="itemPanel"><tbody>{"".join(rows)}</tbody></table>'
+
+    def label(self, item_id):
+        rng = _rng(self.seed, 'label', item_id)
+        lines = [f'<div>Serving Size: {rng.choice(["1 cup", "4 oz", "1 each", "1/2 cup", "6 oz"])}</div>']
+        for field, unit, low, high in LABEL_FIELDS:
+            lines.append(f'<div>{field} {rng.randint(low, high)}{unit}</div>')
+        return ('<div id="nutritionLabel" class="modal show" role="dialog"><div class="modal-content">'
+                '<button type="button" class="close" aria-label="Close" onclick="closeNutritionLabel()">×</button>'
+                f'<div class="modal-body">{"".join(lines)}</div></div></div>')
+
+    # -- serving ---------------------------------------------------------
+
+    def respond(self, path):
+        """(status, content type, body) for a GET of `path`"""
+        parts = [unquote(p) for p in path.split('?')[0].strip('/').split('/')]
+        route = parts[0] if parts[0] != 'sim' else '/'.join(parts[:2])
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+            fail = route.startswith('sim/') and route != 'sim/stats' and self._random.random() < self.error_rate
+            delay = self.latency + self._random.random() * self.jitter
+            if fail:
+                self.errors += 1
+        if delay and route != 'sim/stats':
+            time.sleep(delay)
+        if fail:
+            return 500, 'text/plain', 'Simulated error'
+        try:
+            if parts[:2] == ['NetNutrition', '1'] or parts == ['']:
+                return 200, 'text/html', self.page()
+            if route == 'sim/stats':
+                return 200, 'application/json', json.dumps(self.stats())
+            oid = int(parts[2]) if len(parts) > 2 else None
+            if route == 'sim/unit' and oid in self.units:
+                return 200, 'text/html', self.date_selector(oid)
+            if route == 'sim/meals' and oid in self.units:
+                return 200, 'text/html', self.meal_list(oid, date.fromisoformat(parts[3]))
+            if route == 'sim/items' and oid in self.units and parts[4] in MEALS:
+                return 200, 'text/html', self.item_table(oid, date.fromisoformat(parts[3]), parts[4])
+            if route == 'sim/label' and oid is not None:
+                return 200, 'text/html', self.label(oid)
+        except (IndexError, ValueError):
+            pass
+        return 404, 'text/plain', 'Not found'
+
+    def stats(self):
+        with self._lock:
+            return {'requests': dict(self.requests), 'errors': self.errors}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status, content_type, body = self.server.site.respond(self.path)
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(site, host='127.0.0.1', port=0):
+    """Start serving `site` on a background thread; returns (server, base URL). Stop it with server.shutdown()"""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.site = site
+    threading.Thread(target=server.serve_forever, name='netnutrition-sim', daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+
+def add_site_arguments(parser):
+    parser.add_argument('--halls', type=int, default=6, help='Dining halls (default: 6, the first 4 are the main halls)')
+    parser.add_argument('--services', type=int, default=3, help='Services per hall (default: 3)')
+    parser.add_argument('--sim-days', type=int, default=7, help='Days in the date selector (default: 7)')
+    parser.add_argument('--items', type=int, default=30, help='Items per meal (default: 30)')
+    parser.add_argument('--seed', type=int, default=0, help='Menu seed (default: 0)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds every request is delayed')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many more seconds of delay')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests that fail with HTTP 500')
+
+
+def site_from_args(args):
+    return SimulatedSite(halls=args.halls, services=args.services, days=args.sim_days, items=args.items,
+                         seed=args.seed, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve a simulated NetNutrition site for offline scraping')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_site_arguments(parser)
+    args = parser.parse_args()
+
+    server, url = serve(site_from_args(args), args.host, args.port)
+    print(f"✓ Simulated NetNutrition at {url}/NetNutrition/1 (Ctrl+C to stop)")
+    print(f"  python3 nutrition_scraper.py --base-url {url} --testing")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -8,32 +8,20 @@ from webdriver_manager.chrome import ChromeDriverManager
 import time
 import os
 
-def retry_on_exception(max_attempts=3, backoff=2):
-    def decorator(func):
-        @wraps(func)
-        def wrapper(self, *args, **kwargs):
-            for attempt in range(1, max_attempts + 1):
-                try:
-                    return func(self, *args, **kwargs)
-                except Exception as e:
-                    print(f"Attempt {attempt}/{max_attempts} for {func.__name__} failed: {e}")
-                    if attempt == max_attempts:
-                        task = {'func': func.__name__, 'args': args, 'kwargs': kwargs}
-                        if hasattr(self, 'missed_tasks'):
-                            self.missed_tasks.append(task)
-                            print(f"Queued missed task: {func.__name__}")
-                        raise
-                    time.sleep(backoff * attempt)
-        return wrapper
-    return decorator
-
-from functools import wraps
 from bs4 import BeautifulSoup
-import pandas as pd
 from datetime import datetime, timedelta
 import json
 import re
-from functools import wraps
+from data_files import FORMAT_EXTENSIONS, default_filename, write_results
+from driver_manager import DEFAULT_MAX_RSS_MB, DEFAULT_MAX_UNITS, BrowserSession
+from listing_store import LISTING_SCRIPT, STORE_FILE as LISTING_STORE_FILE, ListingStore, listing_fingerprint, listing_key
+from page_parsers import group_units, parse_meal_label, unit_link
+from retry_engine import RetryEngine
+from scheduler import WorkSchedule
+from scrape_spec import add_spec_arguments, spec_from_args
+from snapshot_store import SnapshotStore
+from structure_cache import (CACHE_FILE as STRUCTURE_CACHE_FILE, DEFAULT_TTL as STRUCTURE_CACHE_TTL, invalidate,
+                             is_fresh, load_structure, mark_checked, nav_fingerprint, save_structure)
 
 MAIN_DINING_HALLS = [
     "Pennsylvania Avenue Dining Hall (PAR)",
@@ -61,21 +49,18 @@ class NutritionScraperComplete:
         options.add_argument('--window-size=1920,1080')
         options.add_experimental_option('useAutomationExtension', False)
         options.add_experimental_option('excludeSwitches', ['enable-automation'])
+        self.chrome_options = options
+        self._driver_path = None
         
         # Initialize webdriver only if not in playback mode
         self.playback_mode = playback_mode
         if not self.playback_mode:
-            try:
-                # Use webdriver-manager to install and manage the correct ChromeDriver
-                service = Service(ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=options)
-            except WebDriverException as e:
-                # Helpful error message for easier debugging
-                print("Error initializing Chrome driver:", str(e))
-                print("Make sure you have a compatible Chrome/Chromium installed or set CHROME_DRIVER_PATH environment variable.")
-                raise
+            # Recycled between meals when it grows too large or stops answering (see driver_manager.py)
+            self.session = BrowserSession(self._create_driver)
+            self.driver = self.session.driver
             self.wait = WebDriverWait(self.driver, 15)
         else:
+            self.session = None
             self.driver = None
             self.wait = None
         self.base_url = "https://eatsmart.housing.illinois.edu"
@@ -83,44 +68,80 @@ class NutritionScraperComplete:
         self.headless = headless
         self.fast_mode = fast_mode
         self.max_items_per_meal = 5 if testing_mode else None
-        self.missed_tasks = []  # queue for tasks that fail and need re-try
+        # Failed units are retried later with backoff, per-service circuit breakers (see retry_engine.py)
+        self.retries = RetryEngine()
         self.debug_dir = os.path.join(os.path.dirname(__file__), 'debug_fragments')
         os.makedirs(self.debug_dir, exist_ok=True)
+        # Pages that failed, compressed and deduplicated within a size cap (see snapshot_store.py)
+        self.snapshot_store = SnapshotStore(self.debug_dir)
         self.snapshots_dir = os.path.join(os.path.dirname(__file__), 'snapshots')
         os.makedirs(self.snapshots_dir, exist_ok=True)
         # If not already set, keep the playback_mode set from parameter
         self.playback_mode = getattr(self, 'playback_mode', False)
         self.save_snapshots = False
-        self._retry_attempts = 3
-        self._retry_backoff = 2  # seconds base
-
-    def _retry_on_exception(self, max_attempts=None, backoff=None):
-        def decorator(func):
-            @wraps(func)
-            def wrapper(*args, **kwargs):
-                attempts = max_attempts or self._retry_attempts
-                sleep_base = backoff or self._retry_backoff
-                for attempt in range(1, attempts + 1):
-                    try:
-                        return func(*args, **kwargs)
-                    except Exception as e:
-                        print(f"Attempt {attempt}/{attempts} for {func.__name__} failed: {e}")
-                        if attempt == attempts:
-                            # Push to missed_tasks for later retry if context available
-                            try:
-                                task = {'func': func.__name__, 'args': args, 'kwargs': kwargs}
-                                if hasattr(self, 'missed_tasks'):
-                                    self.missed_tasks.append(task)
-                                    print(f"Queued missed task: {func.__name__}")
-                            except Exception:
-                                pass
-                            raise
-                        time.sleep(sleep_base * attempt)
-            return wrapper
-        return decorator
+        # Cached hall/service tree (see structure_cache.py); a file of None disables the cache
+        self.structure_cache_file = STRUCTURE_CACHE_FILE
+        self.structure_cache_ttl = STRUCTURE_CACHE_TTL
+        self.structure_from_cache = False
+        # Halls, services, dates and meals to scrape (see scrape_spec.py); None scrapes everything
+        self.spec = None
+        # Meals whose listing is unchanged since the last run are not re-scraped (see listing_store.py);
+        # a file of None disables the store, reuse_listings=False scrapes every meal but still stores them
+        self.listing_store_file = LISTING_STORE_FILE
+        self.reuse_listings = True
+        self.listings = None
+
+    def _create_driver(self):
+        try:
+            if self._driver_path is None:
+                # Use webdriver-manager to install and manage the correct ChromeDriver
+                self._driver_path = ChromeDriverManager().install()
+            return webdriver.Chrome(service=Service(self._driver_path), options=self.chrome_options)
+        except WebDriverException as e:
+            # Helpful error message for easier debugging
+            print("Error initializing Chrome driver:", str(e))
+            print("Make sure you have a compatible Chrome/Chromium installed or set CHROME_DRIVER_PATH environment variable.")
+            raise
+
+    def _finish_unit(self):
+        """Work-unit boundary: the browser session is recycled here if it is due"""
+        if self.session is not None and self.session.unit_done():
+            self.driver = self.session.driver
+            if self.driver is not None:
+                self.wait = WebDriverWait(self.driver, 15)
+
+    @staticmethod
+    def _service_key(hall, service):
+        return f"{hall['dining_hall']} / {service['service_name']}"
+
+    def _filter_main_halls(self, dining_halls):
+        if self.spec is not None and self.spec.halls:
+            filtered = [h for h in dining_halls if self.spec.wants_hall(h['dining_hall'])]
+            print(f"\n[SPEC] Filtered to {len(filtered)} halls: {[h['dining_hall'] for h in filtered]}")
+            return filtered
+        if self.fast_mode:
+            filtered = [h for h in dining_halls if h['dining_hall'] in MAIN_DINING_HALLS]
+            print(f"\n[FAST MODE] Filtered to {len(filtered)} halls: {[h['dining_hall'] for h in filtered]}")
+            return filtered
+        return dining_halls
 
     def scrape_dining_structure(self):
-        """Scrape all dining halls and their services from the dropdown menu"""
+        """Scrape all dining halls and their services from the dropdown menu
+
+        Outside playback mode the tree is cached on disk (see structure_cache.py):
+        a cache younger than structure_cache_ttl is used as is, an older one is
+        reused if the dropdown's fingerprint still matches it.
+        """
+        use_cache = bool(self.structure_cache_file) and not getattr(self, 'playback_mode', False)
+        cached = load_structure(self.base_url, self.structure_cache_file) if use_cache else None
+        self.structure_from_cache = False
+        if cached and is_fresh(cached, self.structure_cache_ttl):
+            age_hours = (time.time() - cached['checked_at']) / 3600
+            print(f"✓ Using cached dining structure ({len(cached['dining_halls'])} halls, checked {age_hours:.1f} h ago)")
+            self.structure_from_cache = True
+            return self._filter_main_halls(cached['dining_halls'])
+
+        fingerprint = None
         try:
             print("Loading main page to extract dining hall structure...")
             # If playback mode is enabled, do not navigate with the driver
@@ -153,6 +174,13 @@ class NutritionScraperComplete:
                 try:
                     # Use WebDriverWait to ensure the dropdown is loaded
                     dropdown = self.wait.until(EC.presence_of_element_located((By.ID, "nav-unit-selector")))
+                    if use_cache:
+                        fingerprint = nav_fingerprint(dropdown.get_attribute('outerHTML') or '')
+                        if cached and cached['fingerprint'] == fingerprint:
+                            print(f"✓ Dining structure unchanged, using cache ({len(cached['dining_halls'])} halls)")
+                            mark_checked(cached, self.structure_cache_file)
+                            self.structure_from_cache = True
+                            return self._filter_main_halls(cached['dining_halls'])
                     dropdown_items = dropdown.find_elements(By.CSS_SELECTOR, ".dropdown-item")
                 except Exception:
                     # Fallback: try to find other menu selectors that include data-unitoid or unit links
@@ -163,8 +191,7 @@ class NutritionScraperComplete:
                         # As a last resort, try to find any link that looks like a unit link
                         dropdown_items = self.driver.find_elements(By.CSS_SELECTOR, "a[href*='NetNutrition']")
             
-            dining_halls = []
-            current_hall = None
+            units = []
             
             # Loop through the dropdown items. During testing/playback we may print detailed info.
             for idx, item in enumerate(dropdown_items):
@@ -174,10 +201,7 @@ class NutritionScraperComplete:
                     from bs4.element import Tag as BS4Tag
                     if isinstance(item, BS4Tag):
                         # bs4 element
-                        link = item
-                        name = link.get('title') or link.get_text().strip()
-                        unit_id = link.get('data-unitoid') or link.get('data-unitid')
-                        link_class = ' '.join(link.get('class', [])) if link.get('class') else ''
+                        name, unit_id, link_class = unit_link(item)
                     elif hasattr(item, 'get_attribute'):
                         # Selenium WebElement
                         link = item
@@ -190,29 +214,9 @@ class NutritionScraperComplete:
                         unit_id = link.get_attribute('data-unitoid') or link.get_attribute('data-unitid')
                         link_class = (link.get_attribute('class') or '')
                     
-                    if not name or not unit_id or unit_id == '-1':
-                        continue
-                    
-                    is_primary = 'text-primary' in link_class or 'primary' in link_class
                     if getattr(self, 'playback_mode', False) and getattr(self, 'testing_mode', False):
-                        print(f"Playback parsing: name='{name}', unit_id='{unit_id}', link_class='{link_class}', is_primary={is_primary}")
-                    
-                    if is_primary:
-                        if current_hall and current_hall['dining_services']:
-                            dining_halls.append(current_hall)
-                        
-                        current_hall = {
-                            'dining_hall': name,
-                            'unit_id': unit_id,
-                            'dining_services': []
-                        }
-                    else:
-                        if current_hall:
-                            service = {
-                                'service_name': name,
-                                'service_id': unit_id
-                            }
-                            current_hall['dining_services'].append(service)
+                        print(f"Playback parsing: name='{name}', unit_id='{unit_id}', link_class='{link_class}'")
+                    units.append((name, unit_id, link_class))
                 
                 except Exception as e:
                     # Debugging output: save snapshot of page if available and show error
@@ -221,25 +225,21 @@ class NutritionScraperComplete:
                         import traceback
                         traceback.print_exc()
                     self._save_debug_fragment('scrape_dining_structure', str(e))
-                    if getattr(self, 'save_snapshots', False):
-                        self._save_snapshot(f"scrape_dining_structure_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
                     continue
             
-            if current_hall and current_hall['dining_services']:
-                dining_halls.append(current_hall)
+            # A text-primary link starts a hall, the links after it are its services
+            dining_halls = group_units(units)
 
-            if self.fast_mode:
-                filtered = [h for h in dining_halls if h['dining_hall'] in MAIN_DINING_HALLS]
-                print(f"\n[FAST MODE] Filtered to {len(filtered)} halls: {[h['dining_hall'] for h in filtered]}")
-                return filtered
+            if fingerprint and dining_halls:
+                save_structure(dining_halls, fingerprint, self.base_url, self.structure_cache_file)
+                print(f"✓ Cached dining structure: {len(dining_halls)} halls")
 
-            return dining_halls
+            return self._filter_main_halls(dining_halls)
             
         except Exception as e:
             print(f"Error scraping dining structure: {str(e)}")
             return []
     
-    @retry_on_exception(max_attempts=3, backoff=3)
     def navigate_to_service(self, unit_id, service_name):
         """Navigate to a specific dining service"""
         try:
@@ -262,13 +262,12 @@ class NutritionScraperComplete:
             
         except Exception as e:
             print(f"Error navigating to service {service_name} ({unit_id}): {str(e)}")
-            self._save_debug_fragment(f"navigate_{service_name}_{unit_id}", str(e))
+            if self.structure_from_cache and invalidate(self.structure_cache_file):
+                print("Dropped the cached dining structure; the next run re-reads it from the site")
+            self._save_debug_fragment('navigate_to_service', str(e), f'{service_name} ({unit_id})')
             self._append_debug_log(f"navigate_to_service failed for {service_name} ({unit_id}): {e}")
-            if getattr(self, 'save_snapshots', False):
-                self._save_snapshot(f"navigate_{service_name}_{unit_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
             return False
 
-    @retry_on_exception(max_attempts=3, backoff=2)
     def get_available_dates_for_next_n_days(self, n_days=5):
         """Get available dates from the date selector dropdown for the next n days (including today)"""
         try:
@@ -343,7 +342,6 @@ class NutritionScraperComplete:
             traceback.print_exc()
             return []
 
-    @retry_on_exception(max_attempts=3, backoff=2)
     def select_date(self, date_element):
         """Select a specific date from the dropdown"""
         try:
@@ -357,13 +355,10 @@ class NutritionScraperComplete:
             return True
         except Exception as e:
             print(f"Error selecting date: {str(e)}")
-            self._save_debug_fragment(f"select_date", str(e))
+            self._save_debug_fragment('select_date', str(e))
             self._append_debug_log(f"select_date failed: {e}")
-            if getattr(self, 'save_snapshots', False):
-                self._save_snapshot(f"select_date_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
             return False
 
-    @retry_on_exception(max_attempts=3, backoff=2)
     def get_all_meals_structured(self):
         """Get all available meals organized by date and meal period"""
         try:
@@ -405,31 +400,17 @@ class NutritionScraperComplete:
                     date_meal_text = date_meal_text.strip()
 
                     # Parse the format "Date-MealType" (e.g., "Thursday, November 13, 2025-Breakfast")
-                    if '-' in date_meal_text:
-                        parts = date_meal_text.rsplit('-', 1)
-                        if len(parts) == 2:
-                            date_part = parts[0].strip()
-                            meal_part = parts[1].strip()
-
-                            # Extract meal type
-                            meal_types = ['Breakfast', 'Lunch', 'Dinner', 'Brunch', 'Late Night']
-                            meal_type = None
-                            for meal in meal_types:
-                                if meal.lower() in meal_part.lower():
-                                    meal_type = meal
-                                    break
-
-                            if not meal_type:
-                                meal_type = meal_part  # Use as-is if not in standard list
-
-                            meal_info = {
-                                'element': menu_item,
-                                'date': date_part,
-                                'meal_type': meal_type,
-                                'onclick': menu_item.get_attribute('onclick')
-                            }
-                            structured_meals.append(meal_info)
-                            print(f"  Parsed: {date_part} - {meal_type}")
+                    parsed = parse_meal_label(date_meal_text)
+                    if parsed:
+                        date_part, meal_type = parsed
+                        meal_info = {
+                            'element': menu_item,
+                            'date': date_part,
+                            'meal_type': meal_type,
+                            'onclick': menu_item.get_attribute('onclick')
+                        }
+                        structured_meals.append(meal_info)
+                        print(f"  Parsed: {date_part} - {meal_type}")
                     else:
                         print(f"  Warning: Could not parse date/meal from: {date_meal_text}")
 
@@ -437,8 +418,6 @@ class NutritionScraperComplete:
                     print(f"  Error processing menu item: {str(e)}")
                     self._save_debug_fragment('get_all_meals_structured', str(e))
                     self._append_debug_log(f"get_all_meals_structured error: {e}")
-                    if getattr(self, 'save_snapshots', False):
-                        self._save_snapshot(f"get_all_meals_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
                     continue
 
             print(f"\nStructured {len(structured_meals)} meal periods")
@@ -451,7 +430,6 @@ class NutritionScraperComplete:
             traceback.print_exc()
             return []
     
-    @retry_on_exception(max_attempts=3, backoff=2)
     def click_meal(self, meal_element):
         """Click on a specific meal to load its items"""
         try:
@@ -482,8 +460,6 @@ class NutritionScraperComplete:
             print(f"Error clicking meal: {str(e)}")
             self._save_debug_fragment('click_meal', str(e))
             self._append_debug_log(f"click_meal failed: {e}")
-            if getattr(self, 'save_snapshots', False):
-                self._save_snapshot(f"click_meal_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
             return False
     
     def extract_category_map(self):
@@ -534,7 +510,6 @@ class NutritionScraperComplete:
             print(f"     Error extracting categories: {str(e)}")
             return {}
 
-    @retry_on_exception(max_attempts=3, backoff=2)
     def extract_nutrition_info(self, max_items=None):
         """Extract nutrition information for each menu item by clicking on them"""
         try:
@@ -624,10 +599,8 @@ class NutritionScraperComplete:
 
                 except Exception as e:
                     print(f"    ERROR extracting item: {str(e)}")
-                    self._save_debug_fragment(f"extract_item_{i}", str(e))
+                    self._save_debug_fragment('extract_item', str(e), f'{i}. {food_name}')
                     self._append_debug_log(f"extract_item_{i} failed: {e}")
-                    if getattr(self, 'save_snapshots', False):
-                        self._save_snapshot(f"extract_item_{i}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
                     continue
 
             print(f"\n✓ Extracted nutrition info for {len(items_data)} items")
@@ -733,7 +706,7 @@ class NutritionScraperComplete:
             
         except Exception as e:
             print(f"       ERROR extracting nutrition: {str(e)}")
-            self._save_debug_fragment(f"extract_nutrition_{food_name}", str(e))
+            self._save_debug_fragment('extract_nutrition', str(e), food_name)
         
         return nutrition_info
     
@@ -801,20 +774,12 @@ class NutritionScraperComplete:
             # If parsing fails, return "0"
             return "0"
 
-    def _save_debug_fragment(self, name, reason=None):
+    def _save_debug_fragment(self, stage, reason=None, detail=None):
+        """Hand the current page to the snapshot store (written in the background, see snapshot_store.py)"""
         try:
-            ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"{ts}_{name}.html"
-            path = os.path.join(self.debug_dir, filename)
             content = self.driver.page_source if (hasattr(self, 'driver') and self.driver is not None) else '<no driver>'
-            with open(path, 'w', encoding='utf-8') as f:
-                f.write("<!-- Reason: %s -->\n" % (reason or ''))
-                f.write(content)
-            print(f"Saved debug fragment: {path}")
-            try:
-                self._append_debug_log(f"Saved debug fragment: {path}")
-            except Exception:
-                pass
+            playback_dir = self.snapshots_dir if getattr(self, 'save_snapshots', False) else None
+            self.snapshot_store.save(stage, content, reason, detail, playback_dir)
         except Exception as e:
             print(f"Failed to save debug fragment: {e}")
 
@@ -826,21 +791,6 @@ class NutritionScraperComplete:
         except Exception as e:
             print(f"Failed to append debug log: {e}")
 
-    def _save_snapshot(self, filename=None):
-        try:
-            if not getattr(self, 'save_snapshots', False):
-                return None
-            if not filename:
-                filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-            path = os.path.join(self.snapshots_dir, filename)
-            with open(path, 'w', encoding='utf-8') as f:
-                f.write(self.driver.page_source if (hasattr(self, 'driver') and self.driver is not None) else '')
-            print(f"Saved snapshot: {path}")
-            return path
-        except Exception as e:
-            print(f"Failed to save snapshot: {e}")
-            return None
-
     def extract_nutrition_value(self, line, keyword):
         """Extract nutrition value from a line and parse it to standardized format"""
         try:
@@ -866,16 +816,216 @@ class NutritionScraperComplete:
         except:
             return "0"
     
-    def scrape_all_with_complete_data(self, days_to_scrape=5):
+    @staticmethod
+    def _date_script(data_date):
+        # Use JS to click the specific date
+        # We use a CSS selector with the data-date attribute to find it reliably
+        return f"""
+        var items = document.querySelectorAll('a.dropdown-item[data-date="{data_date}"]');
+        if (items.length > 0) {{
+            items[0].click();
+            return true;
+        }}
+        return false;
+        """
+
+    def _list_meals(self, service_id, service_name, data_date, date_str):
+        """Open a service's date and list its meals (types and positions, not elements)
+
+        Returns:
+            Meal definitions, or None if a page didn't load
+        """
+        # We do this to know WHAT to scrape, but we won't keep the elements
+        if not self.navigate_to_service(service_id, service_name):
+            return None
+
+        try:
+            # Find and click the date
+            self.wait.until(EC.presence_of_element_located((By.ID, "nav-date-selector")))
+            found_date = self.driver.execute_script(self._date_script(data_date))
+
+            if not found_date:
+                print(f"Could not find/select date: {date_str}")
+                return None
+
+            # Wait for results
+            self.wait.until(EC.presence_of_element_located((By.ID, "navBarResults")))
+            time.sleep(1)
+
+            # Get the meal structure (just to get the types/counts)
+            structured_meals_metadata = self.get_all_meals_structured()
+
+            if not structured_meals_metadata:
+                print(f"No meals found for {date_str}")
+                return []
+
+            # Extract meal types to iterate over
+            # We use a list of unique identifiers (e.g. index or meal_type + index)
+            # to target them in the main loop
+            # Deduplicate repeated menu groups (common in "build your own" services)
+            # to avoid excessive re-navigation and driver instability.
+            meal_definitions = []
+            seen_meals = set()
+            for idx, m in enumerate(structured_meals_metadata):
+                meal_key = (m.get('date', ''), m.get('meal_type', ''))
+                if meal_key in seen_meals:
+                    continue
+                seen_meals.add(meal_key)
+                meal_definitions.append({
+                    'index': idx,
+                    'type': m['meal_type'],
+                    'date_text': m['date']
+                })
+
+        except Exception as e:
+            print(f"Error preparing meal list for {date_str}: {e}")
+            return None
+
+        # Testing mode: limit number of meals per day
+        if self.testing_mode:
+            print(f"[TESTING MODE] Limiting to first meal period only")
+            meal_definitions = meal_definitions[:1]
+        return meal_definitions
+
+    def _scrape_meal(self, hall_name, service_name, service_id, date_str, service_date, date_script, meal_def,
+                     meal_count):
+        """Scrape one meal from a clean state (navigate -> select date -> click meal)
+
+        Returns:
+            The meal's result rows, or None if a page didn't load (the meal is retried later)
+        """
+        meal_idx = meal_def['index']
+        meal_name = meal_def['type']
+
+        print(f"\n[Meal {meal_idx + 1}/{meal_count}]")
+        print(f"Date: {date_str}, Meal: {meal_name}")
+
+        # A. Reset State: Navigate to Service
+        # Optimization: If it's the very first meal of the first loop, we technically are there, 
+        # but consistency is key for debugging.
+        if not self.navigate_to_service(service_id, service_name):
+            print(f"Failed to navigate to service for {meal_name}")
+            return None
+
+        # B. Select Date
+        try:
+            # Re-run the date selection script
+            found_date = self.driver.execute_script(date_script)
+            if not found_date:
+                print(f"Could not re-select date for {meal_name}")
+                return None
+
+            # Wait for results
+            self.wait.until(EC.presence_of_element_located((By.ID, "navBarResults")))
+            time.sleep(1)
+
+        except Exception as e:
+            print(f"Error selecting date for {meal_name}: {e}")
+            return None
+
+        # C. Get Fresh Elements
+        current_meals = self.get_all_meals_structured()
+
+        if meal_idx >= len(current_meals):
+            print(f"Meal index {meal_idx} out of range (found {len(current_meals)} meals)")
+            return None
+
+        target_meal_info = current_meals[meal_idx]
+
+        # Verify we are matched up (sanity check)
+        if target_meal_info['meal_type'] != meal_name:
+            print(f"Warning: Meal type mismatch. Expected {meal_name}, found {target_meal_info['meal_type']}")
+            # Continue anyway, or search for the type? 
+            # Trusting index is usually safer if list order is stable.
+
+        if not target_meal_info['element']:
+            print("No element for meal")
+            return None
+
+        # D. Click & Scrape
+        if not self.click_meal(target_meal_info['element']):
+            print(f"Failed to click {meal_name}")
+            return None
+
+        # Skip the item modals if the listing is the one the last run scraped
+        key = listing_key(hall_name, service_name, service_date, target_meal_info['meal_type'])
+        listing = self._read_listing()
+        if listing is not None and self.reuse_listings:
+            reused = self.listings.reuse(key, listing_fingerprint(listing))
+            if reused is not None:
+                print(f"↺ Listing unchanged since the last run: reused {len(reused)} rows")
+                return reused
+
+        # Extract nutrition info
+        nutrition_items = self.extract_nutrition_info(max_items=self.max_items_per_meal)
+        results = []
+
+        # Store results with meal info
+        for item_data in nutrition_items:
+            # Get category
+            category = item_data.get('category', 'Unknown')
+
+            result = {
+                'dining_hall': hall_name,
+                'service': service_name,
+                'date': target_meal_info['date'], # Use the fresh date from the element
+                'service_date': service_date,  # ISO date from the selector's data-date
+                'meal_type': target_meal_info['meal_type'],
+                'category': category,
+                'name': item_data['name'],
+                'serving_size': item_data.get('serving_size'),
+                'calories': self.parse_nutrition_value(item_data.get('nutrition', {}).get('calories', '0')),
+                'total_fat': self.parse_nutrition_value(item_data.get('nutrition', {}).get('total_fat', '0')),
+                'saturated_fat': self.parse_nutrition_value(item_data.get('nutrition', {}).get('saturated_fat', '0')),
+                'trans_fat': self.parse_nutrition_value(item_data.get('nutrition', {}).get('trans_fat', '0')),
+                'cholesterol': self.parse_nutrition_value(item_data.get('nutrition', {}).get('cholesterol', '0')),
+                'sodium': self.parse_nutrition_value(item_data.get('nutrition', {}).get('sodium', '0')),
+                'potassium': self.parse_nutrition_value(item_data.get('nutrition', {}).get('potassium', '0')),
+                'total_carbohydrate': self.parse_nutrition_value(item_data.get('nutrition', {}).get('total_carbohydrate', '0')),
+                'dietary_fiber': self.parse_nutrition_value(item_data.get('nutrition', {}).get('dietary_fiber', '0')),
+                'sugars': self.parse_nutrition_value(item_data.get('nutrition', {}).get('sugars', '0')),
+                'protein': self.parse_nutrition_value(item_data.get('nutrition', {}).get('protein', '0'))
+            }
+            results.append(result)
+
+        print(f"Stored nutrition for {len(nutrition_items)} items")
+        if listing is not None and len(results) == sum(1 for name, _, _ in listing if name):
+            self.listings.store(key, listing_fingerprint(listing), results)
+        return results
+
+    def _read_listing(self):
+        """The open meal's (name, onclick or id, category id) items, or None if the listing store is off"""
+        if self.listings is None or self.max_items_per_meal or self.driver is None:
+            return None
+        try:
+            return [tuple(item) for item in self.driver.execute_script(LISTING_SCRIPT) or []] or None
+        except Exception as e:
+            print(f"Could not read the meal listing: {e}")
+            return None
+
+    def scrape_all_with_complete_data(self, days_to_scrape=5, on_hall_complete=None, deadline=None):
         """Scrape all dining halls with nutrition info for the next n days (including today)
 
+        Work is done most valuable first (see scheduler.py): today's and
+        tomorrow's meals at the main halls, then the rest by day.
+
         Args:
             days_to_scrape: Number of days to scrape (default: 5, including today)
+            on_hall_complete: Optional callback(hall_name, results) called with a
+                hall's rows for one day as soon as every meal of that day at that
+                hall is done (used by ../pipeline.py)
+            deadline: Seconds the scrape may take; it stops before a unit that
+                probably wouldn't finish in time and returns what was completed
         """
         all_results = []
+        spec = self.spec
+        if spec is not None:
+            days_to_scrape = spec.days_needed(days_to_scrape)
 
         print("="*80)
         print(f"Illinois Dining Complete Scraper - {days_to_scrape} Days")
+        if spec is not None:
+            print(f"Only {spec.describe()}")
         print("="*80)
 
         dining_halls = self.scrape_dining_structure()
@@ -892,304 +1042,183 @@ class NutritionScraperComplete:
                 dining_halls[0]['dining_services'] = dining_halls[0]['dining_services'][:1]  # Only first service
             days_to_scrape = min(days_to_scrape, 5)  # Limit to 5 days in testing mode
 
-        for hall in dining_halls:
-            hall_name = hall['dining_hall']
-
-            print(f"\n{'='*80}")
-            print(f"Processing: {hall_name}")
-            print(f"{'='*80}")
-
-            if not hall['dining_services']:
+        if self.listing_store_file and not self.testing_mode:
+            self.listings = ListingStore(self.base_url, self.listing_store_file)
+
+        # 1. Plan: the available dates of every service (one page load each)
+        # Failed units are retried later without blocking the others (see retry_engine.py)
+        schedule = WorkSchedule(MAIN_DINING_HALLS, deadline,
+                                paused_until=lambda unit: self.retries.paused_until(self._service_key(unit['hall'],
+                                                                                                       unit['service'])))
+        to_plan = [(0.0, hall_index, service_index, 1)
+                   for hall_index, hall in enumerate(dining_halls)
+                   for service_index, service in enumerate(hall['dining_services'])
+                   if spec is None or spec.wants_service(service['service_name'])]  # others are never navigated to
+        while to_plan:
+            to_plan.sort()
+            retry_at, hall_index, service_index, attempt = to_plan.pop(0)
+            hall = dining_halls[hall_index]
+            service = hall['dining_services'][service_index]
+            service_key = self._service_key(hall, service)
+            retry_at = max(retry_at, self.retries.paused_until(service_key) or 0)
+            wait = max(0.0, retry_at - time.monotonic())
+            if not schedule.fits('plan', wait):
+                print(f"Out of time while planning; {hall['dining_hall']} will not be released")
+                schedule.hold(hall['dining_hall'])
                 continue
-
-            for service in hall['dining_services']:
-                service_name = service['service_name']
-                service_id = service['service_id']
-
-                if not self.navigate_to_service(service_id, service_name):
-                    continue
-
+            time.sleep(wait)  # only when every service left to plan is waiting
+            started = time.monotonic()
+            if self.navigate_to_service(service['service_id'], service['service_name']):
+                self.retries.success(service_key)
                 # Get available dates for the next n days
-                available_dates = self.get_available_dates_for_next_n_days(days_to_scrape)
-
-                if not available_dates:
-                    print(f"No dates available for scraping")
-                    continue
-
+                available_dates = self.get_available_dates_for_next_n_days(days_to_scrape) or []
+                if spec is not None:
+                    available_dates = [d for d in available_dates if spec.wants_date(d['date'])]
                 # Store date strings (not elements, which become stale)
-                target_dates = [(d['data_date'], d['date_str']) for d in available_dates]
+                for d in available_dates:
+                    schedule.add_date(hall, hall_index, service, service_index, d['data_date'], d['date_str'],
+                                      d['date'])
+                print(f"Planned {len(available_dates)} days for {service['service_name']}")
+            else:
+                retry_at = self.retries.failure(service_key, f"planning {service_key}", attempt,
+                                                "service page did not load")
+                if retry_at is None:
+                    print(f"{hall['dining_hall']} will not be released: {service['service_name']} was not planned")
+                    schedule.hold(hall['dining_hall'])
+                else:
+                    to_plan.append((retry_at, hall_index, service_index, attempt + 1))
+            schedule.record('plan', time.monotonic() - started)
 
-                print(f"\n{'='*80}")
-                print(f"Scraping {len(target_dates)} days for {service_name}")
-                print(f"{'='*80}")
+        # 2. Work through the units, most valuable first: list a day's meals, then scrape each meal
+        # For EACH meal, we start from a clean state (Navigate -> Select Date)
+        # This is slower but much more robust than trying to navigate back/forth
+        print(f"\n{'='*80}")
+        print(f"Scraping {schedule.remaining()} service-days" + (f" within {deadline / 60:.0f} min" if deadline else ''))
+        print(f"{'='*80}")
+        while True:
+            if self.session is not None and self.session.driver is None:
+                print("✗ The browser could not be restarted; stopping with what was scraped")
+                break
+            unit = schedule.next()
+            if unit is None:
+                break
+            hall_name, service = unit['hall']['dining_hall'], unit['service']
+            service_key = self._service_key(unit['hall'], service)
+            label = f"{service_key} {unit['service_date']}"
+            started = time.monotonic()
+            rows, reason = [], ''
+            if self.retries.paused_until(service_key) == float('inf'):
+                # The service was given up: drop the rest of its day and hold the day
+                schedule.skip_rest(unit)
+                schedule.give_up(unit, time.monotonic() - started)
+                continue
+            if unit['kind'] == 'date':
+                print(f"\n{'='*60}")
+                print(f"{hall_name} / {service['service_name']}: {unit['date_str']}")
+                print(f"{'='*60}")
+                meal_definitions = self._list_meals(service['service_id'], service['service_name'],
+                                                    unit['data_date'], unit['date_str'])
+                if meal_definitions is None:
+                    rows, reason = None, "meal list did not load"
+                else:
+                    if spec is not None:
+                        meal_definitions = [m for m in meal_definitions if spec.wants_meal(m['type'])]
+                    schedule.add_meals(unit, meal_definitions)
+            else:
+                label += f" {unit['meal_def']['type']}"
+                try:
+                    rows = self._scrape_meal(hall_name, service['service_name'], service['service_id'],
+                                             unit['date_str'], unit['service_date'],
+                                             self._date_script(unit['data_date']), unit['meal_def'],
+                                             unit['meal_count'])
+                    reason = "meal did not load"
+                except Exception as e:
+                    print(f"Error scraping {label}: {e}")
+                    rows, reason = None, str(e)
+                finally:
+                    self._finish_unit()
+
+            seconds = time.monotonic() - started
+            if rows is None:
+                retry_at = self.retries.failure(service_key, label, unit.get('attempt', 1), reason)
+                if retry_at is not None:
+                    schedule.retry(unit, retry_at, seconds)
+                else:
+                    schedule.give_up(unit, seconds)  # holds the hall-day, so its stored rows are kept
+                continue
+            self.retries.success(service_key)
+            all_results.extend(rows)
 
-                # Scrape each date
-                for date_idx, (data_date, date_str) in enumerate(target_dates, 1):
-                    print(f"\n{'='*60}")
-                    print(f"Date {date_idx}/{len(target_dates)}: {date_str}")
-                    print(f"{'='*60}")
+            released = schedule.done(unit, rows, seconds)
+            if released and released[1] and on_hall_complete:
+                on_hall_complete(*released)
 
-                    # 1. First pass: Navigate and get the list of meals (names/types) for this date
-                    # We do this to know WHAT to scrape, but we won't keep the elements
-                    if not self.navigate_to_service(service_id, service_name):
-                        continue
-                    
-                    try:
-                        # Find and click the date
-                        date_selector = self.wait.until(EC.presence_of_element_located((By.ID, "nav-date-selector")))
-                        # Use JS to click the specific date
-                        # We use a CSS selector with the data-date attribute to find it reliably
-                        date_script = f"""
-                        var items = document.querySelectorAll('a.dropdown-item[data-date="{data_date}"]');
-                        if (items.length > 0) {{
-                            items[0].click();
-                            return true;
-                        }}
-                        return false;
-                        """
-                        found_date = self.driver.execute_script(date_script)
-                        
-                        if not found_date:
-                            print(f"Could not find/select date: {date_str}")
-                            continue
-                            
-                        # Wait for results
-                        self.wait.until(EC.presence_of_element_located((By.ID, "navBarResults")))
-                        time.sleep(1)
-                        
-                        # Get the meal structure (just to get the types/counts)
-                        structured_meals_metadata = self.get_all_meals_structured()
-                        
-                        if not structured_meals_metadata:
-                            print(f"No meals found for {date_str}")
-                            continue
-
-                        # Extract meal types to iterate over
-                        # We use a list of unique identifiers (e.g. index or meal_type + index)
-                        # to target them in the main loop
-                        # Deduplicate repeated menu groups (common in "build your own" services)
-                        # to avoid excessive re-navigation and driver instability.
-                        meal_definitions = []
-                        seen_meals = set()
-                        for idx, m in enumerate(structured_meals_metadata):
-                            meal_key = (m.get('date', ''), m.get('meal_type', ''))
-                            if meal_key in seen_meals:
-                                continue
-                            seen_meals.add(meal_key)
-                            meal_definitions.append({
-                                'index': idx,
-                                'type': m['meal_type'],
-                                'date_text': m['date']
-                            })
-                            
-                    except Exception as e:
-                        print(f"Error preparing meal list for {date_str}: {e}")
-                        continue
+        if schedule.stopped_early:
+            print(f"\n⏱ Deadline reached after {schedule.elapsed() / 60:.1f} min: {schedule.completed_units} units "
+                  f"done, {schedule.remaining()} left")
+        for hall_name, service_date in schedule.incomplete_days():
+            print(f"  Not released (incomplete or failed): {hall_name} {service_date}")
 
-                    # Testing mode: limit number of meals per day
-                    if self.testing_mode:
-                        print(f"[TESTING MODE] Limiting to first meal period only")
-                        meal_definitions = meal_definitions[:1]
-
-                    # 2. Main Loop: Iterate through each meal definition
-                    # For EACH meal, we start from a clean state (Navigate -> Select Date)
-                    # This is slower but much more robust than trying to navigate back/forth
-                    for meal_def in meal_definitions:
-                        meal_idx = meal_def['index']
-                        meal_name = meal_def['type']
-                        
-                        print(f"\n[Meal {meal_idx + 1}/{len(meal_definitions)}]")
-                        print(f"Date: {date_str}, Meal: {meal_name}")
-
-                        # A. Reset State: Navigate to Service
-                        # Optimization: If it's the very first meal of the first loop, we technically are there, 
-                        # but consistency is key for debugging.
-                        if not self.navigate_to_service(service_id, service_name):
-                            print(f"Failed to navigate to service for {meal_name}")
-                            break # Move to next service if we can't even get there
-
-                        # B. Select Date
-                        try:
-                            # Re-run the date selection script
-                            found_date = self.driver.execute_script(date_script)
-                            if not found_date:
-                                print(f"Could not re-select date for {meal_name}")
-                                continue
-                            
-                            # Wait for results
-                            self.wait.until(EC.presence_of_element_located((By.ID, "navBarResults")))
-                            time.sleep(1)
-                            
-                        except Exception as e:
-                            print(f"Error selecting date for {meal_name}: {e}")
-                            continue
-                        
-                        # C. Get Fresh Elements
-                        current_meals = self.get_all_meals_structured()
-                        
-                        if meal_idx >= len(current_meals):
-                            print(f"Meal index {meal_idx} out of range (found {len(current_meals)} meals)")
-                            continue
-                            
-                        target_meal_info = current_meals[meal_idx]
-                        
-                        # Verify we are matched up (sanity check)
-                        if target_meal_info['meal_type'] != meal_name:
-                            print(f"Warning: Meal type mismatch. Expected {meal_name}, found {target_meal_info['meal_type']}")
-                            # Continue anyway, or search for the type? 
-                            # Trusting index is usually safer if list order is stable.
-                        
-                        if not target_meal_info['element']:
-                            print("No element for meal")
-                            continue
-
-                        # D. Click & Scrape
-                        if not self.click_meal(target_meal_info['element']):
-                            print(f"Failed to click {meal_name}")
-                            continue
-
-                        # Extract nutrition info
-                        nutrition_items = self.extract_nutrition_info(max_items=self.max_items_per_meal)
-
-                        # Store results with meal info
-                        for item_data in nutrition_items:
-                            # Get category
-                            category = item_data.get('category', 'Unknown')
-
-                            result = {
-                                'dining_hall': hall_name,
-                                'service': service_name,
-                                'date': target_meal_info['date'], # Use the fresh date from the element
-                                'meal_type': target_meal_info['meal_type'],
-                                'category': category,
-                                'name': item_data['name'],
-                                'serving_size': item_data.get('serving_size'),
-                                'calories': self.parse_nutrition_value(item_data.get('nutrition', {}).get('calories', '0')),
-                                'total_fat': self.parse_nutrition_value(item_data.get('nutrition', {}).get('total_fat', '0')),
-                                'saturated_fat': self.parse_nutrition_value(item_data.get('nutrition', {}).get('saturated_fat', '0')),
-                                'trans_fat': self.parse_nutrition_value(item_data.get('nutrition', {}).get('trans_fat', '0')),
-                                'cholesterol': self.parse_nutrition_value(item_data.get('nutrition', {}).get('cholesterol', '0')),
-                                'sodium': self.parse_nutrition_value(item_data.get('nutrition', {}).get('sodium', '0')),
-                                'potassium': self.parse_nutrition_value(item_data.get('nutrition', {}).get('potassium', '0')),
-                                'total_carbohydrate': self.parse_nutrition_value(item_data.get('nutrition', {}).get('total_carbohydrate', '0')),
-                                'dietary_fiber': self.parse_nutrition_value(item_data.get('nutrition', {}).get('dietary_fiber', '0')),
-                                'sugars': self.parse_nutrition_value(item_data.get('nutrition', {}).get('sugars', '0')),
-                                'protein': self.parse_nutrition_value(item_data.get('nutrition', {}).get('protein', '0'))
-                            }
-                            all_results.append(result)
-
-                        print(f"Stored nutrition for {len(nutrition_items)} items")
-        
         print(f"\n{'='*80}")
         print("Complete scraping finished!")
         print(f"{'='*80}")
         print(f"Total items scraped: {len(all_results)}")
-
-        # Attempt to process any missed tasks queued by retry decorator
-        if self.missed_tasks:
-            print(f"Found {len(self.missed_tasks)} missed tasks. Attempting re-tries...")
-            tasks_copy = list(self.missed_tasks)
-            self.missed_tasks = []
-            for task in tasks_copy:
-                try:
-                    func_name = task.get('func')
-                    args = task.get('args', ())
-                    kwargs = task.get('kwargs', {})
-                    print(f"Re-running missed task: {func_name}")
-                    method = getattr(self, func_name, None)
-                    if method:
-                        result = method(*args, **kwargs)
-                        print(f"  Result: {result}")
-                except Exception as e:
-                    print(f"Re-run of missed task {func_name} failed: {e}")
-            print("Finished missed tasks re-run")
+        if self.session is not None:
+            self.session.report()
+        if self.listings is not None:
+            self.listings.report()
+            self.listings.save()
+        self.retries.report()
 
         return all_results
     
-    def export_to_excel(self, all_results, filename=None):
-        """Export results to Excel with complete data"""
+    def export_results(self, all_results, fmt=None, filename=None):
+        """Export results in a fast columnar format (Parquet/Arrow) or streaming CSV
+
+        Args:
+            fmt: 'parquet', 'arrow', 'csv' or 'xlsx' (default: parquet if pyarrow is installed, else csv)
+        """
         if not all_results:
             print("No data to export")
             return None
-        
+
         try:
-            if not filename:
-                filename = f"complete_dining_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            
-            # Create DataFrame
-            df = pd.DataFrame(all_results)
-
-            # Sort by dining_hall, service, date, meal_type, name
-            df = df.sort_values(['dining_hall', 'service', 'date', 'meal_type', 'name'],
-                                ascending=[True, True, True, True, True])
-
-            # Reorder columns to include date and meal_type
-            column_order = [
-                'dining_hall', 'service', 'date', 'meal_type', 'category', 'name', 'serving_size',
-                'calories', 'total_fat', 'saturated_fat', 'trans_fat', 'cholesterol',
-                'sodium', 'potassium', 'total_carbohydrate', 'dietary_fiber', 'sugars', 'protein'
-            ]
-            # Only keep columns that actually exist in df to avoid KeyError
-            column_order = [c for c in column_order if c in df.columns]
-            df = df[column_order]
-            
-            # Write to Excel
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Complete Data', index=False)
-                
-                workbook = writer.book
-                worksheet = writer.sheets['Complete Data']
-                
-                # Auto-adjust columns
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-                
-                # Format headers
-                from openpyxl.styles import Font, PatternFill, Alignment
-                
-                header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-                header_font = Font(bold=True, color="FFFFFF")
-                
-                for cell in worksheet[1]:
-                    cell.fill = header_fill
-                    cell.font = header_font
-                    cell.alignment = Alignment(horizontal="center", vertical="center")
+            filename = write_results(all_results, fmt=fmt, filename=filename)
 
             print(f"Exported to {filename}")
-            print(f"Total rows: {len(df)}")
+            print(f"Total rows: {len(all_results)}")
 
             # Summary statistics
             print("\nData Summary:")
-            print(f"  Unique dining halls: {df['dining_hall'].nunique()}")
-            if 'date' in df.columns:
-                print(f"  Unique dates: {df['date'].nunique()}")
-            if 'meal_type' in df.columns:
-                print(f"  Unique meal types: {df['meal_type'].nunique()}")
-            if 'category' in df.columns:
-                print(f"  Unique categories: {df['category'].nunique()}")
-            
+            for label, key in [('dining halls', 'dining_hall'), ('dates', 'date'),
+                               ('meal types', 'meal_type'), ('categories', 'category')]:
+                values = set(r.get(key) for r in all_results if r.get(key))
+                if values:
+                    print(f"  Unique {label}: {len(values)}")
+
             return filename
-            
+
         except Exception as e:
-            print(f"Error exporting to Excel: {str(e)}")
+            print(f"Error exporting results: {str(e)}")
             import traceback
             traceback.print_exc()
             return None
+
+    def export_to_excel(self, all_results, filename=None):
+        """Export results to the styled Excel report"""
+        if not filename:
+            filename = default_filename('xlsx')
+        return self.export_results(all_results, fmt='xlsx', filename=filename)
     
     def close(self):
-        """Close the browser"""
-        self.driver.quit()
+        """Close the browser and finish writing debug snapshots"""
+        self.snapshot_store.close()
+        if self.snapshot_store.dropped:
+            print(f"Dropped {self.snapshot_store.dropped} debug snapshots while the writer was busy")
+        if self.session is not None:
+            self.session.close()
+        elif self.driver is not None:
+            self.driver.quit()
 
 
 if __name__ == "__main__":
@@ -1204,6 +1233,22 @@ if __name__ == "__main__":
     parser.add_argument('--playback', type=str, help='Playback mode: provide a directory of HTML snapshots to use instead of live scraping')
     parser.add_argument('--days', type=int, default=5, help='Number of days to scrape (default: 5, including today)')
     parser.add_argument('--full', action='store_true', help='Full scrape (all dining halls/services)')
+    parser.add_argument('--format', choices=sorted(FORMAT_EXTENSIONS), default=None,
+                        help='Output format (default: parquet, or csv if pyarrow is not installed)')
+    parser.add_argument('--excel-report', action='store_true', help='Also write the styled Excel report')
+    parser.add_argument('--refresh-structure', action='store_true',
+                        help='Check the cached dining hall structure against the site even if it is fresh')
+    parser.add_argument('--deadline', type=float, default=None,
+                        help='Time budget in minutes; most valuable meals first, stop gracefully when it runs out')
+    parser.add_argument('--recycle-after', type=int, default=None,
+                        help='Restart the browser after this many meals (default: %d)' % DEFAULT_MAX_UNITS)
+    parser.add_argument('--max-browser-mb', type=int, default=None,
+                        help='Restart the browser when its memory exceeds this (default: %d)' % DEFAULT_MAX_RSS_MB)
+    parser.add_argument('--refresh-listings', action='store_true',
+                        help='Scrape every meal, even those whose listing is unchanged since the last run')
+    parser.add_argument('--base-url', default=None,
+                        help='Scrape another NetNutrition site, e.g. the local simulator (netnutrition_sim.py)')
+    add_spec_arguments(parser)
     parser.set_defaults(headless=True)
     args = parser.parse_args()
 
@@ -1215,6 +1260,7 @@ if __name__ == "__main__":
     
     # Number of days to scrape (including today)
     DAYS_TO_SCRAPE = args.days
+    EXPORT_FORMAT = args.format
 
     scraper = NutritionScraperComplete(testing_mode=TESTING_MODE, headless=HEADLESS_MODE, fast_mode=FAST_MODE)
     if SAVE_SNAPSHOTS:
@@ -1222,6 +1268,15 @@ if __name__ == "__main__":
     if PLAYBACK_DIR:
         scraper.playback_mode = True
         scraper.snapshots_dir = PLAYBACK_DIR
+    if args.refresh_structure:
+        scraper.structure_cache_ttl = 0
+    if args.base_url:
+        scraper.base_url = args.base_url.rstrip('/')
+    scraper.spec = spec_from_args(args)
+    scraper.reuse_listings = not args.refresh_listings
+    if scraper.session is not None:
+        scraper.session.max_units = args.recycle_after or scraper.session.max_units
+        scraper.session.max_rss_mb = args.max_browser_mb or scraper.session.max_rss_mb
 
     try:
         print("\n" + "="*80)
@@ -1240,7 +1295,8 @@ if __name__ == "__main__":
             print(f"- Will scrape menus for the next {DAYS_TO_SCRAPE} days (including today)")
         print("="*80 + "\n")
 
-        all_results = scraper.scrape_all_with_complete_data(days_to_scrape=DAYS_TO_SCRAPE)
+        all_results = scraper.scrape_all_with_complete_data(
+            days_to_scrape=DAYS_TO_SCRAPE, deadline=args.deadline * 60 if args.deadline else None)
         
         if all_results:
             print(f"\n{'='*80}")
@@ -1261,10 +1317,15 @@ if __name__ == "__main__":
 
             # Export
             print(f"\nExporting complete data...")
-            excel_file = scraper.export_to_excel(all_results)
+            data_file = scraper.export_results(all_results, fmt=EXPORT_FORMAT)
+
+            if data_file:
+                print(f"\n✓ Success! Data file: {data_file}")
 
-            if excel_file:
-                print(f"\n✓ Success! Excel file: {excel_file}")
+            if args.excel_report and EXPORT_FORMAT != 'xlsx':
+                report_file = scraper.export_to_excel(all_results)
+                if report_file:
+                    print(f"✓ Excel report: {report_file}")
 
             # Sample output
             print(f"\nSample items:")
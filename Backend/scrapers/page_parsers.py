@@ -0,0 +1,98 @@
+"""
+Parsing of saved NetNutrition pages
+
+The scraper reads the live site through WebDriver; playback mode, the tests
+and benchmarks/bench_parsers.py parse saved HTML with these functions. The
+rules are the scraper's own: group_units() builds the hall tree in
+scrape_dining_structure and parse_meal_label() reads the "Date-Meal" entries
+in get_all_meals_structured, whichever way the page was read.
+
+Every parse_* function takes HTML (or an already parsed BeautifulSoup) and the
+BeautifulSoup parser to use, 'html.parser' or 'lxml' if it is installed.
+"""
+from bs4 import BeautifulSoup
+
+MEAL_TYPES = ['Breakfast', 'Lunch', 'Dinner', 'Brunch', 'Late Night']
+
+
+def _soup(page, parser):
+    return page if isinstance(page, BeautifulSoup) else BeautifulSoup(page, parser)
+
+
+def group_units(units):
+    """
+    Hall tree from the unit selector's links in page order
+
+    Args:
+        units: (name, unit id, link class) per link; a 'text-primary' link starts a hall,
+            the links after it are its services
+    """
+    dining_halls = []
+    current_hall = None
+    for name, unit_id, link_class in units:
+        if not name or not unit_id or unit_id == '-1':
+            continue
+        if 'text-primary' in link_class or 'primary' in link_class:
+            if current_hall and current_hall['dining_services']:
+                dining_halls.append(current_hall)
+            current_hall = {'dining_hall': name, 'unit_id': unit_id, 'dining_services': []}
+        elif current_hall:
+            current_hall['dining_services'].append({'service_name': name, 'service_id': unit_id})
+    if current_hall and current_hall['dining_services']:
+        dining_halls.append(current_hall)
+    return dining_halls
+
+
+def unit_link(anchor):
+    """(name, unit id, link class) of a data-unitoid anchor"""
+    return (anchor.get('title') or anchor.get_text().strip(), anchor.get('data-unitoid') or anchor.get('data-unitid'),
+            ' '.join(anchor.get('class', [])))
+
+
+def parse_meal_label(text):
+    """(date, meal type) of a meal entry like "Thursday, November 13, 2025-Breakfast", or None"""
+    if '-' not in text:
+        return None
+    date_part, meal_part = (part.strip() for part in text.rsplit('-', 1))
+    for meal in MEAL_TYPES:
+        if meal.lower() in meal_part.lower():
+            return date_part, meal
+    return date_part, meal_part  # Use as-is if not in standard list
+
+
+def parse_structure(page, parser='html.parser'):
+    """The hall tree of a page's unit selector"""
+    return group_units(unit_link(a) for a in _soup(page, parser).select('a[data-unitoid]'))
+
+
+def parse_meals(page, parser='html.parser'):
+    """(date, meal type) of every entry in the results panel"""
+    labels = (li.get_text().strip() for li in _soup(page, parser).select('#navBarResults li.list-group-item'))
+    return [meal for meal in map(parse_meal_label, labels) if meal]
+
+
+def parse_category_map(page, parser='html.parser'):
+    """{category id: name} from the category header rows and the item row after each"""
+    category_map = {}
+    for row in _soup(page, parser).select('tr.cbo_nn_itemGroupRow'):
+        button = row.select_one("div[role='button']")
+        name = (button or row).get_text().strip().split('\n')[0].strip()
+        next_row = row.find_next_sibling()
+        category_id = next_row.get('data-categoryid') if next_row is not None else None
+        if category_id and name:
+            category_map[category_id] = name
+    return category_map
+
+
+def parse_items(page, parser='html.parser'):
+    """(name, category) of every item of an open meal"""
+    page = _soup(page, parser)
+    category_map = parse_category_map(page)
+    items = []
+    for anchor in page.select('a.cbo_nn_itemHover'):
+        name = anchor.get_text().strip()
+        if not name:
+            continue
+        row = anchor.find_parent('tr')
+        items.append((name, category_map.get(row.get('data-categoryid') if row else None, 'Unknown')))
+    return items
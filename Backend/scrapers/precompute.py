@@ -0,0 +1,271 @@
+"""
+Precompute per-meal summaries and food rankings after a database load
+
+Run after load_to_db.py (and before export_to_json.py):
+
+    python3 precompute.py [--db ../data/nutrition_data.db] [--top 20]
+
+Materializes into the database:
+  food_densities  share of calories from protein/fat/carbs for every food
+  food_scores     the meal planner's score of every food for each goal in GOALS
+  meal_summaries  item counts and macro averages per (hall, service_date, meal)
+  food_rankings   top-N food ids per (hall, service_date, meal) for each goal,
+                  plus the 'protein' ranking behind /api/recommendations
+
+A ranking is one row holding a JSON array of food ids, best first (and, for
+the protein ranking, the matching categories). Rows with service_date '' cover
+every date in the database and rows with meal_type '' every meal, so the
+server's recommendation query is a primary-key lookup. Tables are only rewritten when their content changes, so a
+run on unchanged data leaves the database file untouched.
+
+It also refreshes the meal planner's binary snapshot next to the database
+(meal-planning/planner_snapshot.py) when its data version is out of date.
+
+precompute(db, halls=[...]) only recomputes the summaries and rankings of the
+given halls, for a pipeline that loads one hall at a time; it leaves ANALYZE
+and the snapshot to a single refresh_snapshot() once the last hall is in.
+"""
+import json
+import os
+import sqlite3
+import sys
+from collections import defaultdict
+
+MEAL_PLANNING_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'meal-planning')
+if MEAL_PLANNING_DIR not in sys.path:
+    sys.path.append(MEAL_PLANNING_DIR)
+
+from meal_planner import GOALS, macro_densities, score_food  # noqa: E402
+from planner_snapshot import is_current, write_snapshot  # noqa: E402
+
+TOP_N = 20
+
+# Order of /api/recommendations: protein-dense, then lean, then fibrous
+PROTEIN_RANKING = 'protein'
+
+# Marks "every date" / "every meal" in food_rankings keys
+ALL = ''
+
+TABLES = {
+    'food_densities': '''
+        CREATE TABLE IF NOT EXISTS food_densities (
+            food_id INTEGER PRIMARY KEY,
+            protein_ratio REAL,
+            fat_ratio REAL,
+            carb_ratio REAL
+        )''',
+    'food_scores': '''
+        CREATE TABLE IF NOT EXISTS food_scores (
+            food_id INTEGER NOT NULL,
+            goal TEXT NOT NULL,
+            score REAL NOT NULL,
+            PRIMARY KEY (food_id, goal)
+        ) WITHOUT ROWID''',
+    'meal_summaries': '''
+        CREATE TABLE IF NOT EXISTS meal_summaries (
+            hall_id INTEGER NOT NULL,
+            service_date TEXT NOT NULL,
+            meal_type TEXT NOT NULL,
+            date TEXT,
+            items INTEGER NOT NULL,
+            categories INTEGER NOT NULL,
+            avg_calories REAL,
+            avg_protein REAL,
+            avg_fat REAL,
+            avg_carbs REAL,
+            max_protein REAL,
+            PRIMARY KEY (hall_id, service_date, meal_type)
+        ) WITHOUT ROWID''',
+    'food_rankings': '''
+        CREATE TABLE IF NOT EXISTS food_rankings (
+            hall_id INTEGER NOT NULL,
+            service_date TEXT NOT NULL,
+            meal_type TEXT NOT NULL,
+            ranking TEXT NOT NULL,
+            food_ids TEXT NOT NULL,
+            categories TEXT,
+            PRIMARY KEY (hall_id, service_date, meal_type, ranking)
+        ) WITHOUT ROWID''',
+}
+
+
+def create_tables(conn):
+    for ddl in TABLES.values():
+        conn.execute(ddl)
+
+
+def compute_food_scores(conn):
+    """(densities rows, score rows) for every food in the catalog"""
+    densities, scores = [], []
+    foods = conn.execute('''
+        SELECT id, calories, protein, total_fat, total_carbohydrate, dietary_fiber
+        FROM food_items ORDER BY id
+    ''')
+    for food_id, calories, protein, fat, carbs, fiber in foods:
+        protein, fat, carbs, fiber = (v or 0 for v in (protein, fat, carbs, fiber))
+        ratios = macro_densities(calories, protein, fat, carbs) or (None, None, None)
+        densities.append((food_id, *ratios))
+        for goal, goal_config in GOALS.items():
+            scores.append((food_id, goal, score_food(calories, protein, fat, carbs, fiber, goal_config)))
+    return densities, scores
+
+
+def hall_filter(hall_ids, column='hall_id'):
+    """(SQL condition, params) limiting rows to hall_ids; every hall when hall_ids is None"""
+    if hall_ids is None:
+        return '1 = 1', []
+    return f"{column} IN ({', '.join('?' * len(hall_ids))})", list(hall_ids)
+
+
+def compute_meal_summaries(conn, hall_ids=None):
+    condition, params = hall_filter(hall_ids)
+    return conn.execute(f'''
+        SELECT a.hall_id, a.service_date, a.meal_type, MIN(a.date),
+               COUNT(DISTINCT a.food_id), COUNT(DISTINCT a.category),
+               AVG(f.calories), AVG(f.protein), AVG(f.total_fat), AVG(f.total_carbohydrate), MAX(f.protein)
+        FROM (SELECT DISTINCT hall_id, service_date, meal_type, date, category, food_id
+              FROM menu_appearances WHERE service_date IS NOT NULL AND {condition}) a
+        JOIN food_items f ON f.id = a.food_id
+        GROUP BY a.hall_id, a.service_date, a.meal_type
+        ORDER BY a.hall_id, a.service_date, a.meal_type
+    ''', params).fetchall()
+
+
+def compact_json(value):
+    return json.dumps(value, separators=(',', ':'))
+
+
+def top_foods(candidates, key, top_n):
+    """First top_n candidates in key order, one per food name"""
+    ranked, seen = [], set()
+    for candidate in sorted(candidates, key=key):
+        if candidate['name'] in seen:
+            continue
+        seen.add(candidate['name'])
+        ranked.append(candidate)
+        if len(ranked) == top_n:
+            break
+    return ranked
+
+
+def compute_rankings(conn, densities, scores, top_n=TOP_N, hall_ids=None):
+    """food_rankings rows: goal rankings per meal, and the protein ranking per hall and meal across dates"""
+    ratios = {food_id: (p, f) for food_id, p, f, _ in densities}
+    goal_scores = defaultdict(dict)
+    for food_id, goal, score in scores:
+        goal_scores[food_id][goal] = score
+
+    groups = defaultdict(list)
+    condition, params = hall_filter(hall_ids, 'a.hall_id')
+    appearances = conn.execute(f'''
+        SELECT DISTINCT a.hall_id, a.service_date, a.meal_type, a.category, a.food_id,
+               f.name, f.calories, f.dietary_fiber
+        FROM menu_appearances a JOIN food_items f ON f.id = a.food_id
+        WHERE f.calories > 0 AND {condition}
+        ORDER BY a.hall_id, a.service_date, a.meal_type, a.category, f.name, a.food_id
+    ''', params)
+    for hall_id, service_date, meal_type, category, food_id, name, calories, fiber in appearances:
+        candidate = {'food_id': food_id, 'category': category, 'name': name, 'fiber': fiber or 0,
+                     'protein_ratio': ratios[food_id][0], 'fat_ratio': ratios[food_id][1]}
+        if service_date:
+            groups[(hall_id, service_date, meal_type)].append(candidate)
+        groups[(hall_id, ALL, meal_type)].append(candidate)
+        groups[(hall_id, ALL, ALL)].append(candidate)
+
+    rows = []
+    for (hall_id, service_date, meal_type), candidates in sorted(groups.items()):
+        if service_date:
+            for goal in GOALS:
+                ranked = top_foods(candidates, lambda c: (-goal_scores[c['food_id']][goal],
+                                                          -c['protein_ratio'], c['name']), top_n)
+                rows.append((hall_id, service_date, meal_type, goal, compact_json([c['food_id'] for c in ranked]), None))
+        else:
+            ranked = top_foods(candidates, lambda c: (-c['protein_ratio'], c['fat_ratio'], -c['fiber'], c['name']), top_n)
+            rows.append((hall_id, service_date, meal_type, PROTEIN_RANKING,
+                         compact_json([c['food_id'] for c in ranked]), compact_json([c['category'] for c in ranked])))
+    return rows
+
+
+def replace_table(conn, table, rows, where='1 = 1', params=()):
+    """Replace a table's rows (those matching `where`), skipping the write when they are already identical"""
+    existing = conn.execute(f'SELECT * FROM {table} WHERE {where}', params).fetchall()
+    if len(existing) == len(rows) and set(existing) == set(rows):
+        return False
+    conn.execute(f'DELETE FROM {table} WHERE {where}', params)
+    if rows:
+        placeholders = ', '.join('?' * len(rows[0]))
+        conn.executemany(f'INSERT INTO {table} VALUES ({placeholders})', rows)
+    return True
+
+
+def precompute(db_file='../data/nutrition_data.db', top_n=TOP_N, halls=None):
+    """
+    Rebuild the summary and ranking tables, and the planner snapshot if it is stale
+
+    Args:
+        halls: Only rebuild these dining halls' summaries and rankings, and leave
+            ANALYZE and the planner snapshot to refresh_snapshot()
+
+    Returns:
+        Names of the tables whose content changed
+    """
+    conn = sqlite3.connect(db_file)
+    try:
+        create_tables(conn)
+        hall_ids = None
+        if halls is not None:
+            hall_ids = [row[0] for row in conn.execute(
+                f"SELECT id FROM dining_halls WHERE dining_hall IN ({', '.join('?' * len(halls))})", list(halls))]
+        densities, scores = compute_food_scores(conn)
+        tables = {
+            'food_densities': densities,
+            'food_scores': scores,
+            'meal_summaries': compute_meal_summaries(conn, hall_ids),
+            'food_rankings': compute_rankings(conn, densities, scores, top_n, hall_ids),
+        }
+        # Per-hall tables: a scoped run replaces the halls' rows, and those of halls gone from the database
+        where, params = hall_filter(hall_ids)
+        if hall_ids is not None:
+            where = f'({where} OR hall_id NOT IN (SELECT id FROM dining_halls))'
+        changed = []
+        for table, rows in tables.items():
+            scope = (where, params) if table in ('meal_summaries', 'food_rankings') else ()
+            if replace_table(conn, table, rows, *scope):
+                changed.append(table)
+        if changed and halls is None:
+            conn.execute('ANALYZE')
+        conn.commit()
+        for table, rows in tables.items():
+            print(f"✓ {table}: {len(rows)} rows" + ('' if table in changed else ' (unchanged)'))
+    finally:
+        conn.close()
+
+    if halls is None:
+        refresh_snapshot(db_file)
+    return changed
+
+
+def refresh_snapshot(db_file, analyze=False):
+    """Rewrite the planner snapshot if the data version moved; ANALYZE first after scoped precompute runs"""
+    if analyze:
+        conn = sqlite3.connect(db_file)
+        try:
+            conn.execute('ANALYZE')
+            conn.commit()
+        finally:
+            conn.close()
+    if is_current(db_file):
+        print("✓ Planner snapshot up to date")
+    else:
+        print(f"✓ Planner snapshot: {write_snapshot(db_file)} rows")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Precompute meal summaries and food rankings')
+    parser.add_argument('--db', default='../data/nutrition_data.db', help='SQLite database file')
+    parser.add_argument('--top', type=int, default=TOP_N, help='Foods kept per ranking')
+    args = parser.parse_args()
+
+    precompute(args.db, args.top)
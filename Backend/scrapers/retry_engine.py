@@ -0,0 +1,126 @@
+"""
+Retries with backoff and a circuit breaker per service, without blocking the scrape
+
+A failed unit of work (planning a service, listing a day's meals, scraping a
+meal) is not retried on the spot after a sleep. RetryEngine.failure() gives it
+a time before which it is not tried again, and WorkSchedule keeps scraping
+the units that are ready meanwhile. It only waits when nothing else is.
+
+    backoff        base_delay * 2 ** (attempt - 1), capped at max_delay, with
+                   jitter (half the delay is random) so retries of units that
+                   failed together spread out
+    attempts       a unit is given up after max_attempts
+    breaker        after failure_threshold failures in a row, a service is
+                   paused for `cooldown` seconds, doubling on every trip; its
+                   next unit is the probe. After max_trips trips the service
+                   is given up for the run.
+
+Every retry, trip and unit given up is recorded; report() prints them at the
+end of the run.
+"""
+import random
+import time
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BASE_DELAY = 5.0
+DEFAULT_MAX_DELAY = 120.0
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN = 60.0
+DEFAULT_MAX_TRIPS = 3
+
+
+class RetryEngine:
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown=DEFAULT_COOLDOWN, max_trips=DEFAULT_MAX_TRIPS,
+                 clock=time.monotonic, rng=random.random):
+        """
+        Args:
+            max_attempts: Attempts per unit, including the first
+            base_delay, max_delay: Seconds of backoff after the first failure, and at most
+            failure_threshold: Failures in a row that pause a service
+            cooldown: Seconds of the first pause of a service
+            max_trips: Pauses after which a service is given up
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_trips = max_trips
+        self.clock = clock
+        self.rng = rng
+        self.started = clock()
+        self._failures = {}  # service -> failures in a row
+        self._trips = {}  # service -> times its breaker tripped
+        self._open_until = {}  # service -> clock time it is paused until
+        self.retries = []  # (seconds since start, service, unit, attempt, delay, reason)
+        self.trips = []  # (seconds since start, service, pause seconds)
+        self.given_up = []  # (service, unit, reason)
+
+    def backoff(self, attempt):
+        """Seconds before retrying after the `attempt`-th failure"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay / 2 + self.rng() * delay / 2
+
+    def paused_until(self, service):
+        """Clock time a service's breaker is open until (None if it is closed), inf once given up"""
+        if self._trips.get(service, 0) > self.max_trips:
+            return float('inf')
+        until = self._open_until.get(service)
+        return until if until is not None and until > self.clock() else None
+
+    def success(self, service):
+        self._failures[service] = 0
+
+    def failure(self, service, unit, attempt, reason=''):
+        """
+        Record a failed attempt at a unit
+
+        Args:
+            service: Whose breaker counts the failure
+            unit: A label for the run metrics
+            attempt: Which attempt failed (1 = the first)
+
+        Returns:
+            The clock time to retry at, or None if the unit is given up
+        """
+        now = self.clock()
+        self._failures[service] = self._failures.get(service, 0) + 1
+        if self._failures[service] >= self.failure_threshold:
+            trips = self._trips.get(service, 0) + 1
+            self._trips[service] = trips
+            self._failures[service] = 0
+            pause = self.cooldown * 2 ** (trips - 1)
+            self._open_until[service] = now + pause
+            self.trips.append((now - self.started, service, pause))
+            if trips > self.max_trips:
+                print(f"✗ {service}: failed {trips * self.failure_threshold} times, giving up on it for this run")
+            else:
+                print(f"⏸ {service}: {self.failure_threshold} failures in a row, pausing it for {pause:.0f} s")
+
+        paused = self.paused_until(service)
+        if attempt >= self.max_attempts or paused == float('inf'):
+            self.given_up.append((service, unit, reason))
+            print(f"✗ Giving up on {unit} after {attempt} attempts")
+            return None
+        delay = self.backoff(attempt)
+        retry_at = max(now + delay, paused or 0)
+        self.retries.append((now - self.started, service, unit, attempt, retry_at - now, reason))
+        print(f"↻ Retrying {unit} in {retry_at - now:.0f} s (attempt {attempt + 1}/{self.max_attempts})")
+        return retry_at
+
+    def summary(self):
+        return {'retries': len(self.retries), 'trips': len(self.trips), 'given_up': len(self.given_up),
+                'retry_wait': sum(r[4] for r in self.retries)}
+
+    def report(self):
+        """Print the retries, breaker trips and units given up"""
+        info = self.summary()
+        print(f"Retries: {info['retries']} scheduled ({info['retry_wait']:.0f} s of backoff, not slept through), "
+              f"{info['trips']} services paused, {info['given_up']} units given up")
+        for seconds, service, unit, attempt, delay, reason in self.retries:
+            print(f"  {seconds / 60:5.1f} min  ↻ {unit} attempt {attempt + 1} after {delay:.0f} s: {reason}")
+        for seconds, service, pause in self.trips:
+            print(f"  {seconds / 60:5.1f} min  ⏸ {service} paused {pause:.0f} s")
+        for service, unit, reason in self.given_up:
+            print(f"  ✗ {unit}: {reason}")
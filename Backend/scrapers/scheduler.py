@@ -0,0 +1,208 @@
+"""
+Deadline-aware order of scrape work
+
+Instead of finishing one hall (all services, all days) before the next, the
+scraper plans every (hall, service, date) up front and then works through a
+priority queue of units:
+
+    date unit   open a service's date and list its meals (adds one meal unit each)
+    meal unit   scrape one meal
+
+Units are ordered by value: today's and tomorrow's meals at the main halls
+first, then everything else by day, main halls before the others. A unit is
+only started if it is expected to finish within the time budget; the scrape
+stops gracefully at the first one that isn't.
+
+A failed unit goes back into the queue with the time it may be retried at
+(see retry_engine.py), and units of a paused service wait for the pause to
+end. Other units are worked on in the meantime; the schedule only sleeps when
+every remaining unit is waiting.
+
+Rows are released per (hall, service_date) once every unit of that day at that
+hall is done. load_to_db replaces a hall's whole day, so a day is never
+released half-scraped: a day with a unit that was given up (or dropped with
+its unreachable service) is held like one left incomplete at the deadline.
+Its rows stay in the returned rows (and the archived data file) but are not
+handed on, so the last good data for that day stays in the database.
+"""
+import heapq
+import time
+from datetime import date
+
+# Days from today (0 = today) that count as urgent at the main halls
+URGENT_DAYS = 2
+
+MEAL_ORDER = {'Breakfast': 0, 'Brunch': 1, 'Lunch': 2, 'Light Lunch': 3, 'Dinner': 4}
+
+# Units are started only if elapsed + this many times the average unit time still fits
+SAFETY_FACTOR = 1.5
+
+
+class WorkSchedule:
+    def __init__(self, main_halls=(), deadline=None, today=None, clock=time.monotonic, paused_until=None,
+                 sleep=time.sleep):
+        """
+        Args:
+            main_halls: Hall names that are worth scraping first
+            deadline: Seconds the scrape may take from now (None: no limit)
+            paused_until: Optional callable(unit) -> clock time its service is paused until, or None
+        """
+        self.main_halls = set(main_halls)
+        self.today = today or date.today()
+        self.clock = clock
+        self.started = clock()
+        self.deadline = deadline
+        self.paused_until = paused_until
+        self.sleep = sleep
+        self._heap = []
+        self._delayed = []  # (clock time, seq, unit) of units waiting for a retry or a paused service
+        self._seq = 0
+        self._durations = {}  # kind -> (total seconds, count)
+        self._pending = {}  # (hall, service_date) -> units not done yet
+        self._rows = {}  # (hall, service_date) -> result rows
+        self._held = set()  # halls that were not fully planned
+        self._failed = set()  # (hall, service_date) with units given up or dropped
+        self.completed_units = 0
+        self.stopped_early = False
+
+    # -- ordering --------------------------------------------------------
+
+    def priority(self, hall_name, hall_index, service_index, day, meal_index):
+        offset = (day - self.today).days
+        main = hall_name in self.main_halls
+        tier = 0 if main and offset < URGENT_DAYS else 1
+        return (tier, offset, not main, hall_index, service_index, meal_index)
+
+    def _push(self, priority, unit):
+        unit['priority'] = priority
+        heapq.heappush(self._heap, (priority, self._seq, unit))
+        self._seq += 1
+        key = (unit['hall']['dining_hall'], unit['service_date'])
+        self._pending[key] = self._pending.get(key, 0) + 1
+
+    def add_date(self, hall, hall_index, service, service_index, data_date, date_str, day):
+        """Plan the meal listing of one service on one day"""
+        unit = {'kind': 'date', 'hall': hall, 'service': service, 'data_date': data_date,
+                'date_str': date_str, 'service_date': day.isoformat(), 'day': day,
+                'hall_index': hall_index, 'service_index': service_index}
+        self._push(self.priority(hall['dining_hall'], hall_index, service_index, day, (-1, -1)), unit)
+
+    def add_meals(self, date_unit, meal_definitions):
+        """Plan the meals found by a date unit"""
+        for meal_def in meal_definitions:
+            unit = dict(date_unit, kind='meal', meal_def=meal_def, meal_count=len(meal_definitions))
+            meal_index = (MEAL_ORDER.get(meal_def['type'], len(MEAL_ORDER)), meal_def['index'])
+            self._push(self.priority(date_unit['hall']['dining_hall'], date_unit['hall_index'],
+                                     date_unit['service_index'], date_unit['day'], meal_index), unit)
+
+    def hold(self, hall_name):
+        """Never release a hall whose services were not all planned"""
+        self._held.add(hall_name)
+
+    def skip_rest(self, unit):
+        """Drop the other pending meals of a unit's service and day (the service can't be reached); holds the day"""
+        def same_service_day(other):
+            return (other['kind'] == 'meal' and other['hall'] is unit['hall']
+                    and other['service'] is unit['service'] and other['data_date'] == unit['data_date'])
+
+        dropped = 0
+        for queue in (self._heap, self._delayed):
+            kept = [entry for entry in queue if not same_service_day(entry[2])]
+            dropped += len(queue) - len(kept)
+            queue[:] = kept
+            heapq.heapify(queue)
+        key = (unit['hall']['dining_hall'], unit['service_date'])
+        self._pending[key] -= dropped
+        self._failed.add(key)
+
+    def retry(self, unit, retry_at, seconds):
+        """Put a failed unit back, to be tried again from clock time `retry_at`"""
+        self.record(unit['kind'], seconds)
+        self._delay(dict(unit, attempt=unit.get('attempt', 1) + 1), retry_at)
+
+    def _delay(self, unit, until):
+        heapq.heappush(self._delayed, (until, self._seq, unit))
+        self._seq += 1
+
+    # -- time ------------------------------------------------------------
+
+    def elapsed(self):
+        return self.clock() - self.started
+
+    def expected(self, kind):
+        total, count = self._durations.get(kind, (0.0, 0))
+        return total / count if count else 0.0
+
+    def fits(self, kind, wait=0.0):
+        """True if a unit of this kind, started after `wait` seconds, is expected to finish before the deadline"""
+        if self.deadline is None:
+            return True
+        return self.elapsed() + wait + SAFETY_FACTOR * self.expected(kind) < self.deadline
+
+    def record(self, kind, seconds):
+        total, count = self._durations.get(kind, (0.0, 0))
+        self._durations[kind] = (total + seconds, count + 1)
+
+    # -- running ---------------------------------------------------------
+
+    def next(self):
+        """
+        The most valuable ready unit that still fits in the time budget, or None when done or out of time
+
+        A unit of a service that was given up (paused until infinity) is returned
+        as is; the caller drops it.
+        """
+        while True:
+            now = self.clock()
+            while self._delayed and self._delayed[0][0] <= now:
+                _, seq, unit = heapq.heappop(self._delayed)
+                heapq.heappush(self._heap, (unit['priority'], seq, unit))
+            if not self._heap:
+                if not self._delayed:
+                    return None
+                wait = self._delayed[0][0] - now
+                if not self.fits(self._delayed[0][2]['kind'], wait):
+                    self.stopped_early = True
+                    return None
+                self.sleep(wait)  # every remaining unit is waiting
+                continue
+
+            unit = self._heap[0][2]
+            until = self.paused_until(unit) if self.paused_until else None
+            if until is not None and until != float('inf'):
+                heapq.heappop(self._heap)
+                self._delay(unit, until)
+                continue
+            if not self.fits(unit['kind']):
+                self.stopped_early = True
+                return None
+            heapq.heappop(self._heap)
+            return unit
+
+    def give_up(self, unit, seconds):
+        """Record a unit that failed for good; its hall-day is never released"""
+        self._failed.add((unit['hall']['dining_hall'], unit['service_date']))
+        return self.done(unit, [], seconds)
+
+    def done(self, unit, rows, seconds):
+        """
+        Record a finished unit and the rows it scraped
+
+        Returns:
+            (hall name, rows) for the (hall, service_date) this completed, or None
+        """
+        self.record(unit['kind'], seconds)
+        self.completed_units += 1
+        key = (unit['hall']['dining_hall'], unit['service_date'])
+        self._rows.setdefault(key, []).extend(rows)
+        self._pending[key] -= 1
+        if self._pending[key] or key[0] in self._held or key in self._failed:
+            return None
+        return key[0], self._rows.pop(key)
+
+    def remaining(self):
+        return len(self._heap) + len(self._delayed)
+
+    def incomplete_days(self):
+        """(hall, service_date) that were never released: with rows left, or with failed units"""
+        return sorted(set(key for key, rows in self._rows.items() if rows) | self._failed)
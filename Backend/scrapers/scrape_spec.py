@@ -0,0 +1,136 @@
+"""
+Which halls, services, dates and meals a scrape covers
+
+    python3 nutrition_scraper.py --hall ISR --service "Gregory Drive Diner" --date 2026-03-06 --meal Dinner
+    python3 nutrition_scraper.py --spec rescrape.json      # or .yaml / .yml with PyYAML installed
+
+A spec file holds the same filters as lists:
+
+    {"halls": ["ISR"], "services": ["Gregory Drive Diner"],
+     "dates": ["today", "2026-03-07..2026-03-09"], "meals": ["Dinner"]}
+
+Halls match by code ("ISR", "Ike") or by part of the name, services by part
+of the name and meals by the whole meal type ("Lunch" is not "Light Lunch"),
+all case-insensitively. Dates are ISO dates, "today",
+"tomorrow" or "start..end" ranges. Flags replace the file's value for the
+same filter; a filter that is not given matches everything.
+
+The filters are applied while the scrape is planned (see scheduler.py), so
+services, dates and meals that aren't wanted are never navigated to. A spec
+that narrows services or meals scrapes part of a day, so its rows must be
+loaded with load_to_db's replace='meal' (pipeline.py does this itself).
+"""
+import json
+import os
+import re
+from datetime import date, timedelta
+
+FILTERS = ('halls', 'services', 'dates', 'meals')
+
+
+def _parse_day(value, today):
+    value = value.strip().lower()
+    if value == 'today':
+        return today
+    if value == 'tomorrow':
+        return today + timedelta(days=1)
+    return date.fromisoformat(value)
+
+
+def _contains(patterns, value):
+    return any(p.lower() in value.lower() for p in patterns)
+
+
+class ScrapeSpec:
+    def __init__(self, halls=None, services=None, dates=None, meals=None, today=None):
+        """
+        Args:
+            halls, services: Codes, names or parts of names; None or empty matches all
+            meals: Meal types
+            dates: ISO dates, 'today', 'tomorrow' or 'start..end' ranges
+        """
+        self.today = today or date.today()
+        self.halls = list(halls or [])
+        self.services = list(services or [])
+        self.meals = list(meals or [])
+        self.dates = list(dates or [])
+        self.date_ranges = []
+        for value in self.dates:
+            start, _, end = str(value).partition('..')
+            start = _parse_day(start, self.today)
+            end = _parse_day(end, self.today) if end else start
+            if end < start:
+                raise ValueError(f"Date range ends before it starts: {value}")
+            self.date_ranges.append((start, end))
+
+    @classmethod
+    def from_file(cls, path, today=None):
+        """Read a spec from JSON, or YAML if PyYAML is installed"""
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("YAML specs need PyYAML (pip install pyyaml); JSON works without it")
+            data = yaml.safe_load(text) or {}
+        else:
+            data = json.loads(text)
+        unknown = set(data) - set(FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown spec keys in {path}: {', '.join(sorted(unknown))}")
+        values = {key: [data[key]] if isinstance(data.get(key), str) else data.get(key) for key in FILTERS}
+        return cls(today=today, **values)
+
+    def __bool__(self):
+        """True if anything is filtered"""
+        return any(getattr(self, key) for key in FILTERS)
+
+    @property
+    def partial_days(self):
+        """True if days are scraped only in part (some services or meals), so loads must replace per meal"""
+        return bool(self.services or self.meals)
+
+    def wants_hall(self, name):
+        if not self.halls:
+            return True
+        code = re.search(r'\(([^)]+)\)\s*$', name)
+        return any((code and h.lower() == code.group(1).lower()) or h.lower() in name.lower() for h in self.halls)
+
+    def wants_service(self, name):
+        return not self.services or _contains(self.services, name)
+
+    def wants_meal(self, meal_type):
+        return not self.meals or meal_type.lower() in (m.lower() for m in self.meals)
+
+    def wants_date(self, day):
+        return not self.date_ranges or any(start <= day <= end for start, end in self.date_ranges)
+
+    def days_needed(self, days_to_scrape):
+        """Days from today the date selector has to cover: enough to reach the last wanted date"""
+        if not self.date_ranges:
+            return days_to_scrape
+        last = max(end for _, end in self.date_ranges)
+        return max(1, (last - self.today).days + 1)
+
+    def describe(self):
+        return ', '.join(f"{key}: {', '.join(map(str, getattr(self, key)))}" for key in FILTERS
+                         if getattr(self, key)) or 'everything'
+
+
+def add_spec_arguments(parser):
+    group = parser.add_argument_group('scrape spec', 'Scrape only part of the site (see scrape_spec.py)')
+    group.add_argument('--spec', help='JSON or YAML file with halls/services/dates/meals lists')
+    group.add_argument('--hall', dest='halls', nargs='+', help='Hall codes or names, e.g. ISR Ike')
+    group.add_argument('--service', dest='services', nargs='+', help='Service names, or parts of them')
+    group.add_argument('--date', dest='dates', nargs='+',
+                       help='ISO dates, today, tomorrow or start..end ranges')
+    group.add_argument('--meal', dest='meals', nargs='+', help='Meal periods, e.g. Dinner')
+
+
+def spec_from_args(args):
+    """The ScrapeSpec of parsed arguments (flags over the --spec file), or None if nothing is filtered"""
+    spec = ScrapeSpec.from_file(args.spec) if args.spec else ScrapeSpec()
+    values = {key: getattr(args, key) or getattr(spec, key) for key in FILTERS}
+    spec = ScrapeSpec(**values)
+    return spec if spec else None
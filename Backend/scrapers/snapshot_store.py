@@ -0,0 +1,206 @@
+"""
+Bounded store of the pages the scraper failed on
+
+    python3 snapshot_store.py                           # list stored pages by stage
+    python3 snapshot_store.py --export click_meal snapshots/   # as .html files for --playback
+
+Every selector failure used to write the full page source to a new file, on
+the scraping thread, without limit. NutritionScraperComplete now hands the page
+to a SnapshotStore (debug_fragments/ by default), which on a background thread:
+
+    hashes the page        identical pages are stored once (blobs/<sha256>)
+    compresses it          zstd if the zstandard package is installed, else gzip
+    evicts                 least recently seen pages once the store is over
+                           `max_bytes`
+
+index.json maps each page to the stages that failed on it, with the reasons,
+how often and when, so the pages of one failure can be exported as playback
+fixtures. The page source itself is still read on the scraping thread: the
+driver is not thread-safe, and the page has to be caught before the scraper
+moves on.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'debug_fragments')
+
+DEFAULT_MAX_BYTES = 50 * 2 ** 20
+
+# Pages waiting to be written; further pages are dropped (and counted) while it is full
+QUEUE_SIZE = 32
+
+
+def compress(data):
+    """(compressed bytes, file suffix) with zstd if available, else gzip"""
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data), '.zst'
+    return gzip.compress(data, compresslevel=6, mtime=0), '.gz'
+
+
+def decompress(data, suffix):
+    if suffix == '.zst':
+        if zstandard is None:
+            raise ImportError('This page was stored with zstd: pip install zstandard to read it')
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class SnapshotStore:
+    def __init__(self, directory=STORE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_file = os.path.join(directory, 'index.json')
+        self.dropped = 0
+        self._queue = queue.Queue(QUEUE_SIZE)
+        self._thread = None
+        self._lock = threading.Lock()
+        try:
+            with open(self.index_file, encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    # -- scraping thread -------------------------------------------------
+
+    def save(self, stage, html, reason=None, detail=None, playback_dir=None):
+        """
+        Queue a page for the background writer; never blocks
+
+        Args:
+            stage: What failed, e.g. 'click_meal'
+            detail: Which item/service it failed on
+            playback_dir: Also write the page there as a plain .html file (--save-snapshots)
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='snapshot-store', daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait((stage, html, reason, detail, playback_dir, time.time()))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Wait until every queued page is written"""
+        if self._thread is not None:
+            self._queue.join()
+
+    close = flush
+
+    # -- writer thread ---------------------------------------------------
+
+    def _run(self):
+        while True:
+            page = self._queue.get()
+            try:
+                self._write(*page)
+            except Exception as e:
+                print(f"Failed to store snapshot: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, stage, html, reason, detail, playback_dir, seen):
+        data = (html or '').encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            entry = self.index.get(digest)
+            if entry is None or not os.path.exists(os.path.join(self.directory, entry['file'])):
+                blob, suffix = compress(data)
+                entry = {'file': os.path.join('blobs', digest + suffix), 'size': len(blob), 'html_bytes': len(data),
+                         'first_seen': seen, 'failures': []}
+                self._atomic_write(os.path.join(self.directory, entry['file']), blob)
+                self.index[digest] = entry
+            entry['last_seen'] = seen
+            failure = {'stage': stage, 'detail': detail, 'reason': (reason or '')[:500]}
+            same = [f for f in entry['failures'] if f['stage'] == stage and f['detail'] == detail]
+            if same:
+                same[0]['count'] += 1
+                same[0]['reason'] = failure['reason']
+            else:
+                entry['failures'].append(dict(failure, count=1))
+            self._evict()
+            self._atomic_write(self.index_file, json.dumps(self.index, indent=1).encode('utf-8'))
+        if playback_dir:
+            name = f"{stage}_{time.strftime('%Y%m%d_%H%M%S', time.localtime(seen))}_{digest[:8]}.html"
+            self._atomic_write(os.path.join(playback_dir, name), data)
+
+    def _evict(self):
+        """Drop the least recently seen pages until the store fits in max_bytes"""
+        total = sum(entry['size'] for entry in self.index.values())
+        for digest in sorted(self.index, key=lambda d: self.index[d]['last_seen']):
+            if total <= self.max_bytes or len(self.index) == 1:
+                break
+            entry = self.index.pop(digest)
+            total -= entry['size']
+            try:
+                os.remove(os.path.join(self.directory, entry['file']))
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _atomic_write(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    # -- reading ---------------------------------------------------------
+
+    def pages(self, stage=None):
+        """(sha256, index entry) of the stored pages, most recently seen first, optionally of one stage"""
+        with self._lock:
+            entries = [(digest, entry) for digest, entry in self.index.items()
+                       if stage is None or any(f['stage'] == stage for f in entry['failures'])]
+        return sorted(entries, key=lambda item: item[1]['last_seen'], reverse=True)
+
+    def read(self, digest):
+        """The HTML of a stored page"""
+        entry = self.index[digest]
+        with open(os.path.join(self.directory, entry['file']), 'rb') as f:
+            return decompress(f.read(), os.path.splitext(entry['file'])[1]).decode('utf-8')
+
+    def export(self, stage, directory):
+        """Write a stage's pages to `directory` as .html files (for --playback); returns the paths"""
+        paths = []
+        for digest, entry in self.pages(stage):
+            path = os.path.join(directory, f'{stage}_{digest[:12]}.html')
+            self._atomic_write(path, self.read(digest).encode('utf-8'))
+            paths.append(path)
+        return paths
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='List or export the pages the scraper failed on')
+    parser.add_argument('--dir', default=STORE_DIR, help='Snapshot store directory')
+    parser.add_argument('--export', nargs=2, metavar=('STAGE', 'DIRECTORY'),
+                        help="Write a stage's pages as .html files, e.g. for nutrition_scraper.py --playback")
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.dir)
+    if args.export:
+        paths = store.export(*args.export)
+        print(f"✓ Exported {len(paths)} pages to {args.export[1]}")
+    else:
+        total = sum(entry['size'] for entry in store.index.values())
+        print(f"{len(store.index)} pages, {total / 2 ** 20:.1f} MB in {args.dir}")
+        for digest, entry in store.pages():
+            seen = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['last_seen']))
+            for failure in entry['failures']:
+                detail = f" ({failure['detail']})" if failure['detail'] else ''
+                print(f"  {digest[:12]}  {seen}  {failure['stage']}{detail} x{failure['count']}: {failure['reason'][:80]}")
@@ -0,0 +1,96 @@
+"""
+On-disk cache of the NetNutrition hall/service tree
+
+The tree behind the nav-unit-selector dropdown changes perhaps once a
+semester, but walking it through WebDriver costs a page load, a fixed wait and
+a round trip per dropdown item. NutritionScraperComplete.scrape_dining_structure
+keeps the last tree in cache/dining_structure.json:
+
+    within the TTL      the cached tree is used without loading the page
+    past the TTL        the page is loaded and the dropdown's links are
+                        fingerprinted; the tree is only re-parsed if the
+                        fingerprint differs from the cached one
+
+A failed navigation to a cached unit drops the cache, so a changed site is
+picked up by the next run.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from bs4 import BeautifulSoup
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'dining_structure.json')
+
+# Seconds a cached tree is trusted without looking at the site
+DEFAULT_TTL = 7 * 24 * 3600
+
+FORMAT = 1
+
+
+def nav_fingerprint(html):
+    """
+    SHA-256 of the unit links in the nav-unit-selector HTML
+
+    Only what the tree is built from counts (title, unit id and class of each
+    link), so scripts and attributes that vary between loads don't invalidate it.
+    """
+    links = [
+        [a.get('title') or a.get_text().strip(), a.get('data-unitoid') or a.get('data-unitid'),
+         ' '.join(a.get('class', []))]
+        for a in BeautifulSoup(html, 'html.parser').select('a[data-unitoid], a[data-unitid]')
+    ]
+    return hashlib.sha256(json.dumps(links).encode('utf-8')).hexdigest()
+
+
+def load_structure(base_url, path=CACHE_FILE):
+    """The cache entry for a site, or None if there is none"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get('format') != FORMAT or entry.get('base_url') != base_url:
+        return None
+    return entry
+
+
+def is_fresh(entry, ttl=DEFAULT_TTL, now=None):
+    """True if the entry was checked against the site less than `ttl` seconds ago"""
+    return (now or time.time()) - entry['checked_at'] < ttl
+
+
+def save_structure(dining_halls, fingerprint, base_url, path=CACHE_FILE):
+    """Store a freshly parsed tree; returns the new entry"""
+    entry = {'format': FORMAT, 'base_url': base_url, 'fingerprint': fingerprint,
+             'checked_at': time.time(), 'dining_halls': dining_halls}
+    _write(entry, path)
+    return entry
+
+
+def mark_checked(entry, path=CACHE_FILE):
+    """Restart an entry's TTL after the site was seen to still match it"""
+    entry['checked_at'] = time.time()
+    _write(entry, path)
+
+
+def invalidate(path=CACHE_FILE):
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _write(entry, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
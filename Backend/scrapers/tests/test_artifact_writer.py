@@ -0,0 +1,92 @@
+import gzip
+import json
+import os
+import sys
+
+import brotli
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from artifact_writer import MANIFEST_NAME, ArtifactWriter
+
+
+def export(dirs, payloads):
+    writer = ArtifactWriter(dirs)
+    for name, payload in payloads.items():
+        writer.write_json(name, payload)
+    return writer.finish()
+
+
+def test_unchanged_files_are_not_rewritten(tmp_path):
+    docs, webapp = tmp_path / 'docs', tmp_path / 'webapp'
+    payloads = {'a.json': {'foods': [1], 'count': 1}, 'b.json': {'foods': [2], 'count': 1}}
+    assert export([docs, webapp], payloads) == {'written': 2, 'unchanged': 0, 'removed': 0}
+    assert os.path.samefile(docs / 'a.json', webapp / 'a.json')  # hardlinked, written once
+    stamp = json.loads((docs / 'a.json').read_text())['last_updated']
+    mtime = os.path.getmtime(docs / MANIFEST_NAME)
+
+    payloads['b.json'] = {'foods': [2, 3], 'count': 2}
+    assert export([docs, webapp], payloads) == {'written': 1, 'unchanged': 1, 'removed': 0}
+    assert json.loads((docs / 'a.json').read_text())['last_updated'] == stamp
+    assert json.loads((webapp / 'b.json').read_text())['count'] == 2
+
+    manifest = json.loads((docs / MANIFEST_NAME).read_text())['files']
+    assert set(manifest) == {'a.json', 'b.json'}
+    assert os.path.getmtime(docs / MANIFEST_NAME) >= mtime
+
+    del payloads['a.json']
+    assert export([docs, webapp], payloads)['removed'] == 1
+    assert not (docs / 'a.json').exists() and not (webapp / 'a.json').exists()
+
+
+def test_symlinked_output_dir_is_written_once(tmp_path):
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    os.symlink(docs, tmp_path / 'webapp')
+    writer = ArtifactWriter([docs, tmp_path / 'webapp'], compress=False)
+    assert writer.mirrors == []
+    writer.write_json('a.json', {'count': 0})
+    writer.finish()
+    assert sorted(os.listdir(docs)) == ['a.json', MANIFEST_NAME]
+
+
+def test_compressed_siblings_match_and_are_removed_with_the_file(tmp_path):
+    docs = tmp_path / 'docs'
+    export([docs], {'a.json': {'foods': ['x'] * 100, 'count': 100}})
+    data = (docs / 'a.json').read_bytes()
+    assert gzip.decompress((docs / 'a.json.gz').read_bytes()) == data
+    entry = json.loads((docs / MANIFEST_NAME).read_text())['files']['a.json']
+    assert entry['gz_bytes'] == os.path.getsize(docs / 'a.json.gz') < entry['bytes']
+    assert brotli.decompress((docs / 'a.json.br').read_bytes()) == data
+
+    (docs / 'a.json.gz').unlink()
+    assert export([docs], {'a.json': {'foods': ['x'] * 100, 'count': 100}})['unchanged'] == 1
+    assert gzip.decompress((docs / 'a.json.gz').read_bytes()) == data
+
+    export([docs], {})
+    assert not any(name.startswith('a.json') for name in os.listdir(docs))
+
+
+def test_streamed_file_matches_json_dumps_and_is_kept_when_unchanged(tmp_path):
+    def stream(items):
+        writer = ArtifactWriter([tmp_path])
+        out = writer.open_stream('s.json', {'dining_hall': 'A'}, 'foods')
+        for item in items:
+            out.append(item)
+        changed = out.close(count=out.count)
+        writer.finish()
+        return changed
+
+    foods = [{'name': 'Rice', 'calories': 100.0}, {'name': 'Tofu', 'tags': ['v']}]
+    assert stream(foods)
+    text = (tmp_path / 's.json').read_text()
+    stamp = json.loads(text)['last_updated']
+    assert text == json.dumps({'dining_hall': 'A', 'foods': foods, 'count': 2, 'last_updated': stamp}, indent=2)
+    assert gzip.decompress((tmp_path / 's.json.gz').read_bytes()).decode() == text
+
+    assert not stream(foods)
+    assert (tmp_path / 's.json').read_text() == text
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+    assert stream([])
+    assert json.loads((tmp_path / 's.json').read_text())['foods'] == []
@@ -0,0 +1,39 @@
+import json
+import os
+import sys
+
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+
+from build_images import FORMATS, build
+
+
+def test_variants_manifest_and_skipping(tmp_path):
+    src, dst = tmp_path / 'assets', tmp_path / 'images'
+    src.mkdir()
+    dst.mkdir()
+    Image.new('RGB', (600, 400), (200, 80, 20)).save(src / 'hall.jpg')
+    Image.new('RGBA', (300, 100), (0, 0, 0, 0)).save(dst / 'logo.png')
+
+    stats = build(dst, src, workers=2)
+    assert stats == {'images': 2, 'built': 2, 'skipped': 0, 'copied': ['hall.jpg'], 'removed': 0}
+    manifest = json.loads((dst / 'manifest.json').read_text())['images']
+    hall = manifest['hall.jpg']
+    assert (hall['width'], hall['height']) == (600, 400)
+    assert {(v['kind'], v['width'], v['height']) for v in hall['variants']} == {('resized', 480, 320),
+                                                                               ('thumbnail', 160, 160)}
+    assert len(hall['variants']) == 2 * len(FORMATS)
+    assert all(v['file'].startswith(f"variants/hall-{hall['sha256'][:12]}-") for v in hall['variants'])
+    assert [v['kind'] for v in manifest['logo.png']['variants']] == ['thumbnail'] * len(FORMATS)  # never upscaled
+    with Image.open(dst / manifest['logo.png']['variants'][0]['file']) as thumb:
+        assert thumb.mode == 'RGBA'
+
+    assert build(dst, src, workers=1) == {'images': 2, 'built': 0, 'skipped': 2, 'copied': [], 'removed': 0}
+
+    Image.new('RGB', (600, 400), (20, 80, 200)).save(src / 'hall.jpg')
+    stats = build(dst, src, workers=1)
+    assert (stats['built'], stats['copied'], stats['removed']) == (1, ['hall.jpg'], 2 * len(FORMATS))
+    assert sorted(os.listdir(dst / 'variants')) == sorted(
+        os.path.basename(v['file']) for entry in json.loads((dst / 'manifest.json').read_text())['images'].values()
+        for v in entry['variants'])
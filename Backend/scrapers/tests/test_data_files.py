@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from data_files import find_latest_data_file, has_pyarrow, read_data_file, write_results
+
+
+SAMPLE_RESULTS = [
+    {'dining_hall': 'Hall B', 'service': 'Main', 'date': 'Friday, March 6, 2026', 'meal_type': 'Lunch',
+     'category': 'Entrees', 'name': 'Tofu', 'serving_size': '1 cup', 'calories': '120', 'protein': '0.5'},
+    {'dining_hall': 'Hall A', 'service': 'Main', 'date': 'Friday, March 6, 2026', 'meal_type': 'Dinner',
+     'category': 'Sides', 'name': 'Rice', 'serving_size': '1 cup', 'calories': '200', 'protein': '4'},
+]
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet', 'arrow'])
+def test_write_and_read_round_trip(tmp_path, fmt):
+    if fmt != 'csv' and not has_pyarrow():
+        pytest.skip('pyarrow not installed')
+    filename = write_results(SAMPLE_RESULTS, fmt=fmt, filename=str(tmp_path / f'out.{fmt}'))
+    df = read_data_file(filename)
+    assert list(df['dining_hall']) == ['Hall A', 'Hall B']
+    assert list(df.columns[:3]) == ['dining_hall', 'service', 'date']
+    assert float(df.loc[1, 'protein']) == 0.5
+
+
+def test_find_latest_data_file_ignores_other_files(tmp_path):
+    (tmp_path / 'notes.txt').write_text('x')
+    assert find_latest_data_file(str(tmp_path)) is None
+    write_results(SAMPLE_RESULTS, fmt='csv', filename=str(tmp_path / 'a.csv'))
+    assert find_latest_data_file(str(tmp_path)).endswith('a.csv')
+
+
+def test_csv_keeps_columns_missing_from_the_first_row(tmp_path):
+    rows = [dict(SAMPLE_RESULTS[0]), dict(SAMPLE_RESULTS[1], service_date='2026-03-06')]
+    df = read_data_file(write_results(rows, fmt='csv', filename=str(tmp_path / 'out.csv')))
+    assert 'service_date' in df.columns
+    assert list(df['service_date'].fillna('')) == ['2026-03-06', '']
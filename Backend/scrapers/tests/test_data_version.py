@@ -0,0 +1,62 @@
+import contextlib
+import io
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'meal-planning'))
+
+from data_version import changed_since, current_version
+from load_to_db import load_dataframe_to_database, prune_old_dates
+from meal_planner import MealPlanner
+
+
+def make_frame(hall, day, calories=200):
+    return pd.DataFrame([
+        {'dining_hall': hall, 'service': 'Main', 'date': f'Friday, March {day}, 2026', 'meal_type': 'Lunch',
+         'category': 'Entrees', 'name': name, 'serving_size': '1 each', 'calories': calories + i,
+         'protein': 20, 'total_fat': 5}
+        for i, name in enumerate(('Chicken', 'Tofu'))
+    ])
+
+
+def test_loads_and_prunes_stamp_versions_per_hall_and_date(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+    assert current_version(db_file) == 0 and not os.path.exists(db_file)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_dataframe_to_database(pd.concat([make_frame('Hall A', 6), make_frame('Hall B', 6)]), db_file)
+        assert current_version(db_file) == 1
+        load_dataframe_to_database(make_frame('Hall A', 6), db_file)  # unchanged: no new version
+        assert current_version(db_file) == 1
+
+        load_dataframe_to_database(make_frame('Hall A', 6, calories=250), db_file)
+        assert changed_since(1, db_file) == [('Hall A', '2026-03-06', 2, 2)]
+        assert [row[:2] for row in changed_since(0, db_file)] == [('Hall A', '2026-03-06'), ('Hall B', '2026-03-06')]
+
+        assert prune_old_dates(db_file, retain_days=1, today=date(2026, 3, 10)) == 4
+    assert current_version(db_file) == 3
+    assert changed_since(2, db_file) == [('Hall A', '2026-03-06', 3, 3), ('Hall B', '2026-03-06', 3, 2)]
+
+
+def test_planner_refresh_rereads_only_changed_halls(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_dataframe_to_database(pd.concat([make_frame('Hall A', 6), make_frame('Hall B', 6)]), db_file)
+        planner = MealPlanner(db_file=db_file)
+        planner.load_data()
+        assert not planner.refresh()
+
+        load_dataframe_to_database(pd.concat([make_frame('Hall A', 6, calories=300), make_frame('Hall A', 7)]),
+                                   db_file)
+        assert planner.refresh()
+        assert not planner.refresh()
+
+    fresh = MealPlanner(db_file=db_file)
+    fresh.load_data()
+    columns = ['dining_hall', 'service_date', 'name', 'calories']
+    assert planner.data[columns].equals(fresh.data[columns])
+    assert len(planner.filter_available_items('Hall A', 'Lunch', '2026-03-07')) == 2
@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import driver_manager
+from driver_manager import BrowserSession, kill_process_tree, process_tree, process_tree_rss_mb
+
+
+class FakeDriver:
+    def __init__(self, hang=None):
+        self.hang = hang  # an Event the heartbeat blocks on
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if self.hang is not None:
+            self.hang.wait()
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_session_recycles_after_units_and_memory():
+    drivers = []
+    memory = iter([100, 200, 900, 100])
+
+    def create():
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    session = BrowserSession(create, max_units=3, max_rss_mb=800, memory_probe=lambda driver: next(memory))
+    assert [session.unit_done() for _ in range(4)] == [None, None, 'memory', None]
+    assert session.driver is drivers[1] and drivers[0].quit_called
+
+    session.memory_probe = lambda driver: None  # memory unreadable: only the unit limit applies
+    assert [session.unit_done() for _ in range(2)] == [None, 'units']
+    assert len(drivers) == 3
+    summary = session.summary()
+    assert summary['units'] == 6 and summary['peak_rss_mb'] == 900
+    assert [reason for _, reason in summary['restarts']] == ['memory', 'units']
+
+
+def test_hung_session_is_replaced():
+    hang = threading.Event()
+    drivers = [FakeDriver(hang), FakeDriver()]
+    session = BrowserSession(lambda: drivers.pop(0), heartbeat_timeout=0.05, memory_probe=lambda driver: None)
+    try:
+        assert session.unit_done() == 'hung'
+        assert session.unit_done() is None
+    finally:
+        hang.set()
+
+
+def test_failed_restart_leaves_no_driver():
+    def create():
+        if drivers:
+            raise RuntimeError('chrome not reachable')
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    drivers = []
+    session = BrowserSession(create, max_units=1, memory_probe=lambda driver: None)
+    assert session.unit_done() == 'units'
+    assert session.driver is None and drivers[0].quit_called
+    assert session.unit_done() is None
+    session.close()
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc'), reason='needs /proc')
+@pytest.mark.parametrize('use_psutil', [True, False])
+def test_kill_process_tree_kills_the_children_too(monkeypatch, use_psutil):
+    if not use_psutil:
+        monkeypatch.setattr(driver_manager, 'psutil', None)
+    elif driver_manager.psutil is None:
+        pytest.skip('psutil not installed')
+    parent = subprocess.Popen(['sh', '-c', 'sleep 60 & sleep 60 & wait'])
+    for _ in range(100):
+        tree = process_tree(parent.pid)
+        if len(tree) == 3:
+            break
+        time.sleep(0.02)
+    assert tree[0] == parent.pid and len(tree) == 3
+
+    kill_process_tree(parent.pid)
+    parent.wait(timeout=5)
+    for _ in range(100):
+        if not any(os.path.exists(f'/proc/{pid}') and open(f'/proc/{pid}/stat').read().split()[2] != 'Z'
+                   for pid in tree[1:]):
+            break
+        time.sleep(0.02)
+    else:
+        pytest.fail('children still running')
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc'), reason='needs /proc')
+def test_proc_memory_reading_matches_psutil(monkeypatch):
+    rss = process_tree_rss_mb(os.getpid())
+    assert rss > 1
+    if driver_manager.psutil is not None:
+        monkeypatch.setattr(driver_manager, 'psutil', None)
+        assert process_tree_rss_mb(os.getpid()) == pytest.approx(rss, rel=0.2)
+    assert process_tree_rss_mb(None) is None
@@ -0,0 +1,77 @@
+import contextlib
+import io
+import json
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from export_to_json import encode_columnar, export_all
+from load_to_db import load_dataframe_to_database
+
+
+def test_export_writes_compact_shards_and_index(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+    df = pd.DataFrame([
+        {'dining_hall': 'Hall A (HA)', 'service': 'Main', 'date': 'Friday, March 6, 2026', 'meal_type': meal,
+         'category': 'Sides', 'name': name, 'serving_size': '1 cup', 'calories': 100}
+        for meal in ('Lunch', 'Salad Bar') for name in ('Rice', 'Tofu')
+    ])
+    api = tmp_path / 'api'
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_dataframe_to_database(df, db_file)
+        export_all(db_file, [api])
+
+    shard = (api / 'ha' / '2026-03-06' / 'salad-bar.json').read_text()
+    assert '\n' not in shard and '": ' not in shard  # compact
+    data = json.loads(shard)
+    assert (data['meal_type'], data['count']) == ('Salad Bar', 2)
+    assert set(data['foods'][0]) == {'name', 'category', 'serving_size', 'calories', 'protein', 'total_fat',
+                                     'total_carbohydrate', 'dietary_fiber', 'sugars', 'sodium'}
+
+    index = json.loads((api / 'index.json').read_text())
+    assert index['halls'][0]['dates'] == [{'service_date': '2026-03-06', 'date': 'Friday, March 6, 2026',
+                                           'meals': {'Lunch': 'lunch', 'Salad Bar': 'salad-bar'}}]
+    assert json.loads((api / 'hall-a-(ha).json').read_text())['count'] == 4
+
+
+def test_columnar_variant_decodes_to_the_hall_file():
+    foods = [
+        {'name': 'Rice', 'category': 'Sides', 'calories': 100.0, 'meal_type': 'Lunch'},
+        {'name': 'Tofu', 'category': 'Sides', 'calories': 80.5, 'meal_type': None},
+    ]
+    encoded = encode_columnar(foods)
+    assert encoded['strings'] == {'category': ['Sides'], 'meal_type': ['Lunch']}
+    assert encoded['rows'][0] == ['Rice', 0, 100, 0]
+
+    strings = encoded['strings']
+    decoded = [{c: strings[c][v] if c in strings and v is not None else v
+                for c, v in zip(encoded['columns'], row)} for row in encoded['rows']]
+    assert decoded == foods
+
+
+def test_halls_unchanged_since_the_last_export_are_kept(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+
+    def frame(hall, calories):
+        return pd.DataFrame([{'dining_hall': hall, 'service': 'Main', 'date': 'Friday, March 6, 2026',
+                              'meal_type': 'Lunch', 'category': 'Sides', 'name': 'Rice', 'calories': calories}])
+
+    api = tmp_path / 'api'
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_dataframe_to_database(pd.concat([frame('Hall A (HA)', 100), frame('Hall B (HB)', 100)]), db_file)
+        export_all(db_file, [api])
+        load_dataframe_to_database(frame('Hall A (HA)', 150), db_file)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            stats = export_all(db_file, [api])
+
+    assert 'Hall B (HB) unchanged since data version 1' in output.getvalue()
+    assert 'Exported 1 foods for Hall A (HA)' in output.getvalue()
+    assert stats['removed'] == 0
+    assert json.loads((api / 'hb' / '2026-03-06' / 'lunch.json').read_text())['count'] == 1
+    manifest = json.loads((api / 'manifest.json').read_text())
+    assert manifest['state']['data_version'] == 2 and 'hb/2026-03-06/lunch.json' in manifest['files']
@@ -0,0 +1,74 @@
+import os
+import sys
+from datetime import date
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import nutrition_scraper
+from listing_store import LISTING_SCRIPT, ListingStore, listing_fingerprint, listing_key
+from nutrition_scraper import NutritionScraperComplete
+
+ITEMS = [['Pancakes', 'javascript:getItemNutritionLabelOnClick(event, 101);', '7'],
+         ['Bacon', 'javascript:getItemNutritionLabelOnClick(event, 102);', '7']]
+MEAL = {'index': 0, 'type': 'Breakfast', 'date_text': ''}
+
+
+class FakeDriver:
+    def __init__(self, items):
+        self.items = items
+
+    def execute_script(self, script, *args):
+        return self.items if script == LISTING_SCRIPT else True
+
+
+def meal_scraper(tmp_path, monkeypatch, items, extracted):
+    monkeypatch.setattr(nutrition_scraper.time, 'sleep', lambda seconds: None)
+    scraper = NutritionScraperComplete(playback_mode=True)
+    scraper.driver = FakeDriver(items)
+    scraper.wait = type('Wait', (), {'until': lambda self, condition: True})()
+    scraper.listings = ListingStore(scraper.base_url, str(tmp_path / 'meal_listings.json'))
+    scraper.navigate_to_service = lambda service_id, service_name: True
+    scraper.get_all_meals_structured = lambda: [{'meal_type': 'Breakfast', 'date': 'Friday, March 6, 2026',
+                                                 'element': object()}]
+    scraper.click_meal = lambda element: True
+    scraper.extract_nutrition_info = lambda max_items=None: extracted.pop(0)
+    return scraper
+
+
+def scrape(scraper):
+    return scraper._scrape_meal('Hall A', 'Grill', '1', 'Friday', '2026-03-06', 'script', MEAL, 1)
+
+
+def test_fingerprint_follows_names_ids_and_categories_only():
+    same = [[name, ref.replace('event, ', 'event,'), cat] for name, ref, cat in ITEMS]
+    assert listing_fingerprint(ITEMS) == listing_fingerprint(same)
+    assert listing_fingerprint(ITEMS) != listing_fingerprint(ITEMS[:1])
+    assert listing_fingerprint(ITEMS) != listing_fingerprint([ITEMS[0], ['Bacon', ITEMS[1][1], '8']])
+
+
+def test_unchanged_listing_reuses_the_last_runs_rows(tmp_path, monkeypatch):
+    items = [{'name': name, 'category': 'Breakfast', 'nutrition': {'calories': '100'}} for name, _, _ in ITEMS]
+    scraper = meal_scraper(tmp_path, monkeypatch, ITEMS, [items])
+    rows = scrape(scraper)
+    assert [r['name'] for r in rows] == ['Pancakes', 'Bacon']
+    scraper.listings.save(today=date(2026, 3, 6))
+
+    # Next run: no item is opened (extract_nutrition_info would fail on the empty list)
+    scraper = meal_scraper(tmp_path, monkeypatch, ITEMS, [])
+    assert scrape(scraper) == rows
+    assert scraper.listings.summary() == {'unchanged': 1, 'changed': 0, 'new': 0, 'reused_rows': 2}
+
+    # A changed listing is scraped again
+    scraper = meal_scraper(tmp_path, monkeypatch, ITEMS[:1], [items[:1]])
+    assert len(scrape(scraper)) == 1
+    assert scraper.listings.summary()['changed'] == 1
+
+    scraper.listings.save(today=date(2026, 3, 7))  # past days are dropped
+    assert ListingStore(scraper.base_url, str(tmp_path / 'meal_listings.json')).meals == {}
+
+
+def test_incomplete_meal_is_not_stored(tmp_path, monkeypatch):
+    partial = [{'name': 'Pancakes', 'category': 'Breakfast', 'nutrition': {}}]  # Bacon's modal failed
+    scraper = meal_scraper(tmp_path, monkeypatch, ITEMS, [partial])
+    scrape(scraper)
+    assert listing_key('Hall A', 'Grill', '2026-03-06', 'Breakfast') not in scraper.listings.meals
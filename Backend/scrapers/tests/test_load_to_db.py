@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import sys
+from datetime import date
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from load_to_db import (INSERT_COLUMNS, create_nutrition_table, hall_code_for, load_dataframe_to_database, prepare_rows,
+                        prune_old_dates)
+
+
+def make_frame(hall='Hall A', names=('Rice', 'Tofu')):
+    return pd.DataFrame([
+        {'dining_hall': hall, 'service': 'Main', 'date': 'Friday, March 6, 2026', 'meal_type': 'Lunch',
+         'category': 'Sides', 'name': name, 'serving_size': '1 cup', 'calories': 100 + i, 'protein': None}
+        for i, name in enumerate(names)
+    ])
+
+
+def test_prepare_rows_fills_numbers_and_drops_incomplete_rows():
+    df = make_frame()
+    df.loc[1, 'meal_type'] = None
+    rows, failed = prepare_rows(df)
+    assert failed == 1
+    assert len(rows) == 1
+    row = dict(zip(INSERT_COLUMNS, rows[0]))
+    assert (row['dining_hall'], row['service'], row['date']) == ('Hall A', 'Main', 'Friday, March 6, 2026')
+    assert row['hall_code'] == 'HALL-A'
+    assert row['service_date'] == '2026-03-06'  # parsed from the display date
+    assert row['calories'] == 100.0
+    assert row['protein'] == 0.0  # missing values default to 0
+
+
+def test_hall_code_for():
+    assert hall_code_for('Illinois Street Dining Center (ISR)') == 'ISR'
+    assert hall_code_for('Ikenberry Dining Center (Ike)') == 'IKE'
+    assert hall_code_for('Everybody Eats') == 'EVERYBODY-EATS'
+
+
+def test_load_replaces_only_imported_halls(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+    load_dataframe_to_database(pd.concat([make_frame('Hall A'), make_frame('Hall B')]), db_file)
+    stats = load_dataframe_to_database(make_frame('Hall A', names=('Soup',)), db_file)
+    assert (stats['inserted'], stats['removed'], stats['failed']) == (1, 2, 0)
+
+    conn = sqlite3.connect(db_file)
+    counts = dict(conn.execute('SELECT dining_hall, COUNT(*) FROM nutrition_data GROUP BY dining_hall'))
+    journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    conn.close()
+    assert counts == {'Hall A': 1, 'Hall B': 2}
+    assert journal_mode == 'delete'
+    assert not os.path.exists(db_file + '-wal')
+
+
+def test_meal_scope_replaces_only_the_imported_meals(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+    dinner = make_frame(names=('Pasta',))
+    dinner['meal_type'] = 'Dinner'
+    load_dataframe_to_database(pd.concat([make_frame(), dinner]), db_file)
+
+    stats = load_dataframe_to_database(make_frame(names=('Soup',)), db_file, replace='meal')
+    assert (stats['inserted'], stats['removed']) == (1, 2)
+    conn = sqlite3.connect(db_file)
+    assert conn.execute('SELECT meal_type, name FROM nutrition_data ORDER BY name').fetchall() == \
+        [('Dinner', 'Pasta'), ('Lunch', 'Soup')]  # the day's dinner survives a lunch re-scrape
+    conn.close()
+
+
+def test_reload_reports_unchanged_and_updated_rows(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+    load_dataframe_to_database(make_frame(), db_file)
+
+    stats = load_dataframe_to_database(make_frame(), db_file)
+    assert stats == {'inserted': 0, 'updated': 0, 'unchanged': 2, 'removed': 0, 'failed': 0}
+
+    changed = make_frame()
+    changed.loc[0, 'calories'] = 250
+    stats = load_dataframe_to_database(changed, db_file)
+    assert (stats['updated'], stats['unchanged']) == (1, 1)
+
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT calories FROM nutrition_data WHERE name = 'Rice'").fetchone()[0] == 250
+    assert conn.execute('SELECT COUNT(*) FROM nutrition_data').fetchone()[0] == 2
+    conn.close()
+
+
+def test_duplicate_rows_in_import_keep_the_last_copy(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+    df = make_frame(names=('Rice', 'Rice'))
+    stats = load_dataframe_to_database(df, db_file)
+    assert stats['inserted'] == 1
+
+    conn = sqlite3.connect(db_file)
+    assert conn.execute('SELECT calories FROM nutrition_data').fetchall() == [(101.0,)]
+    conn.close()
+
+
+def test_scraped_service_date_is_kept_and_old_dates_pruned(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+    df = pd.concat([make_frame(names=('Rice',)), make_frame(names=('Tofu',))], ignore_index=True)
+    df.loc[1, 'date'] = 'Friday, March 13, 2026'
+    df['service_date'] = ['2026-03-06', '2026-03-13']
+    load_dataframe_to_database(df, db_file)
+
+    assert prune_old_dates(db_file, retain_days=14, today=date(2026, 3, 20)) == 0  # nothing stale, no write
+    assert prune_old_dates(db_file, retain_days=3, today=date(2026, 3, 12)) == 1
+
+    conn = sqlite3.connect(db_file)
+    assert conn.execute('SELECT name, service_date FROM nutrition_data').fetchall() == [('Tofu', '2026-03-13')]
+    conn.close()
+
+
+def test_rows_without_service_date_are_pruned_by_display_date(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+    load_dataframe_to_database(make_frame(names=('Rice', 'Tofu')), db_file)
+    conn = sqlite3.connect(db_file)
+    conn.execute('UPDATE menu_appearances SET service_date = NULL')  # as loaded by an older version
+    conn.commit()
+    conn.close()
+
+    assert prune_old_dates(db_file, retain_days=3, today=date(2026, 3, 20)) == 2
+
+
+def test_foods_are_stored_once_across_halls_and_meals(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+    dinner = make_frame('Hall A')
+    dinner['meal_type'] = 'Dinner'
+    load_dataframe_to_database(pd.concat([make_frame('Hall A'), make_frame('Hall B'), dinner]), db_file)
+
+    changed = make_frame('Hall B')
+    changed.loc[0, 'calories'] = 250
+    stats = load_dataframe_to_database(changed, db_file)
+    assert (stats['updated'], stats['unchanged']) == (1, 1)
+
+    conn = sqlite3.connect(db_file)
+    assert conn.execute('SELECT COUNT(*) FROM food_items').fetchone()[0] == 3  # Rice twice, Tofu once
+    assert conn.execute('SELECT COUNT(*) FROM menu_appearances').fetchone()[0] == 6
+    assert conn.execute(
+        "SELECT dining_hall, calories FROM nutrition_data WHERE name = 'Rice' AND meal_type = 'Lunch' ORDER BY 1"
+    ).fetchall() == [('Hall A', 100.0), ('Hall B', 250.0)]
+    conn.close()
+
+
+def test_flat_table_is_migrated_into_the_catalog(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+    conn = sqlite3.connect(db_file)
+    conn.execute('''CREATE TABLE nutrition_data (id INTEGER PRIMARY KEY AUTOINCREMENT, dining_hall TEXT,
+                    service TEXT, date TEXT, meal_type TEXT, category TEXT, name TEXT, serving_size TEXT,
+                    calories REAL, protein REAL)''')
+    conn.executemany(
+        "INSERT INTO nutrition_data (dining_hall, service, date, meal_type, name, calories) VALUES (?, ?, ?, ?, ?, ?)",
+        [('Hall A (HA)', 'Main', 'Friday, March 6, 2026', 'Lunch', 'Rice', 90),
+         ('Hall A (HA)', 'Main', 'Friday, March 6, 2026', 'Lunch', 'Rice', 100),  # duplicate: last copy wins
+         ('Hall B', 'Main', 'Friday, March 6, 2026', 'Lunch', 'Rice', 100)])
+    conn.commit()
+    create_nutrition_table(conn)
+
+    assert conn.execute("SELECT type FROM sqlite_master WHERE name = 'nutrition_data'").fetchone() == ('view',)
+    assert conn.execute('SELECT COUNT(*) FROM food_items').fetchone()[0] == 1
+    assert conn.execute(
+        'SELECT id, hall_code, service_date, calories FROM nutrition_data ORDER BY id'
+    ).fetchall() == [(2, 'HA', '2026-03-06', 100.0), (3, 'HALL-B', '2026-03-06', 100.0)]
+    conn.close()
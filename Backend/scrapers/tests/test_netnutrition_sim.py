@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import date
+
+import pytest
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from netnutrition_sim import SimulatedSite, serve
+from nutrition_scraper import NutritionScraperComplete
+
+TODAY = date(2026, 3, 6)
+
+
+@pytest.fixture
+def site():
+    site = SimulatedSite(halls=5, services=2, days=3, items=12, today=TODAY)
+    server, url = serve(site)
+    site.url = url
+    yield site
+    server.shutdown()
+
+
+def get(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return BeautifulSoup(response.read().decode('utf-8'), 'html.parser')
+
+
+def test_scraper_parses_the_simulated_unit_selector(site, tmp_path):
+    (tmp_path / 'page.html').write_text(str(get(site.url + '/NetNutrition/1')), encoding='utf-8')
+    scraper = NutritionScraperComplete(playback_mode=True, fast_mode=False)
+    scraper.snapshots_dir = str(tmp_path)
+
+    halls = scraper.scrape_dining_structure()
+    assert [h['dining_hall'] for h in halls][:4] == [
+        "Pennsylvania Avenue Dining Hall (PAR)", "Lincoln Avenue Dining Hall (LAR)",
+        "Ikenberry Dining Center (Ike)", "Illinois Street Dining Center (ISR)"]
+    assert len(halls) == 5 and all(len(h['dining_services']) == 2 for h in halls)
+
+
+def test_fragments_match_the_scraper_selectors(site):
+    oid = site.halls[3][1][0]
+    dates = get(f'{site.url}/sim/unit/{oid}').select('#nav-date-selector a.dropdown-item[data-date]')
+    assert [a['data-date'] for a in dates] == ['Today', '03/07/2026', '03/08/2026', 'Show All Dates']
+
+    meals = get(f'{site.url}/sim/meals/{oid}/2026-03-07').select('#navBarResults li.list-group-item')
+    assert [li.get_text().rsplit('-', 1) for li in meals][0] == ['Saturday, March 7, 2026', 'Breakfast']
+
+    table = get(f'{site.url}/sim/items/{oid}/2026-03-07/Dinner')
+    assert len(table.select('a.cbo_nn_itemHover')) == 12
+    group = table.select_one('tr.cbo_nn_itemGroupRow')
+    assert group.find_next_sibling('tr')['data-categoryid']
+    assert get(f'{site.url}/sim/items/{oid}/2026-03-07/Dinner').get_text() == table.get_text()  # deterministic
+
+    item_id = table.select_one('a.cbo_nn_itemHover')['onclick'].split(',')[1].split(')')[0].strip()
+    label = get(f'{site.url}/sim/label/{item_id}').select_one("div.modal.show[role='dialog']")
+    lines = label.get_text('\n').split('\n')
+    scraper = NutritionScraperComplete(playback_mode=True)
+    calories = [scraper.extract_nutrition_value(line, 'calories') for line in lines if 'Calories' in line]
+    sodium = [scraper.extract_nutrition_value(line, 'sodium') for line in lines if 'Sodium' in line]
+    assert float(calories[0]) >= 50 and float(sodium[0]) <= 1.5  # mg converted to g
+    assert label.select_one("button.close")
+
+
+def test_latency_and_errors_are_injected(site):
+    site.latency, site.error_rate = 0.05, 1.0
+    started = time.perf_counter()
+    with pytest.raises(urllib.error.HTTPError) as error:
+        get(f'{site.url}/sim/unit/2')
+    assert error.value.code == 500 and time.perf_counter() - started >= 0.05
+    get(site.url + '/NetNutrition/1')  # the page itself never fails
+    assert site.stats() == {'requests': {'sim/unit': 1, 'NetNutrition': 1}, 'errors': 1}
@@ -0,0 +1,61 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from netnutrition_sim import SimulatedSite
+from page_parsers import parse_items, parse_meal_label, parse_meals, parse_structure
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'sample_snapshot.html')
+CLICK_MEAL = os.path.join(os.path.dirname(__file__), 'fixtures', '20260210_144913_click_meal.html')
+
+try:
+    import lxml  # noqa: F401
+    PARSERS = ['html.parser', 'lxml']
+except ImportError:
+    PARSERS = ['html.parser']
+
+
+@pytest.mark.parametrize('parser', PARSERS)
+def test_sample_snapshot(parser):
+    with open(SAMPLE, encoding='utf-8') as f:
+        html = f.read()
+    halls = parse_structure(html, parser)
+    assert [h['dining_hall'] for h in halls] == ['Dining Hall A']
+    assert len(halls[0]['dining_services']) == 1
+    assert parse_meals(html, parser) == [('Saturday, November 14, 2025', 'Breakfast')]
+    assert len(parse_items(html, parser)) == 1
+
+
+@pytest.mark.parametrize('parser', PARSERS)
+def test_real_click_meal_page(parser):
+    with open(CLICK_MEAL, encoding='utf-8') as f:
+        html = f.read()
+    halls = parse_structure(html, parser)
+    assert [h['dining_hall'] for h in halls][:4] == [
+        'Ikenberry Dining Center (Ike)', 'Illinois Street Dining Center (ISR)',
+        'Pennsylvania Avenue Dining Hall (PAR)', 'Lincoln Avenue Dining Hall (LAR)']
+    assert len(halls[1]['dining_services']) == 10
+    assert parse_meals(html, parser) == [('Tuesday, February 10, 2026', meal) for meal in ('Breakfast', 'Lunch', 'Dinner')]
+
+
+@pytest.mark.parametrize('parser', PARSERS)
+def test_simulated_pages(parser):
+    site = SimulatedSite(halls=4, services=3, items=15, seed=2)
+    oid = site.halls[0][1][0]
+    day = site.dates()[0]
+
+    halls = parse_structure(site.page(), parser)
+    assert len(halls) == 4 and all(len(h['dining_services']) == 3 for h in halls)
+    assert [meal for _, meal in parse_meals(site.meal_list(oid, day), parser)][:2] == ['Breakfast', 'Lunch']
+
+    items = parse_items(site.item_table(oid, day, 'Lunch'), parser)
+    assert len(items) == 15 and 'Unknown' not in {category for _, category in items}
+
+
+def test_meal_label():
+    assert parse_meal_label('Thursday, November 13, 2025-Late Night') == ('Thursday, November 13, 2025', 'Late Night')
+    assert parse_meal_label('Friday, November 14, 2025 - Snack Bar') == ('Friday, November 14, 2025', 'Snack Bar')
+    assert parse_meal_label('No meals today') is None
@@ -0,0 +1,54 @@
+import contextlib
+import io
+import json
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from export_to_json import export_all
+from load_to_db import load_dataframe_to_database
+from pipeline import parse_args, run
+from precompute import precompute
+
+
+def api_files(api):
+    """Every JSON file under an API directory, without the run-dependent timestamps"""
+    files = {}
+    for path in sorted(api.rglob('*.json')):
+        data = json.loads(path.read_text())
+        if isinstance(data, dict):
+            data.pop('last_updated', None)
+            data.pop('generated_at', None)
+        if path.name != 'manifest.json':
+            files[str(path.relative_to(api))] = data
+    return files
+
+
+def test_pipeline_replay_matches_the_sequential_scripts(tmp_path):
+    df = pd.DataFrame([
+        {'dining_hall': hall, 'service': 'Main', 'date': 'Friday, March 6, 2026', 'service_date': '2026-03-06',
+         'meal_type': meal, 'category': 'Entrees', 'name': name, 'serving_size': '1 each',
+         'calories': cal, 'protein': protein}
+        for hall in ('Hall A (HA)', 'Hall B (HB)') for meal in ('Lunch', 'Dinner')
+        for name, cal, protein in (('Chicken', 200, 40), ('Pasta', 300, 10))
+    ])
+    data_file = tmp_path / 'scrape.csv'
+    df.to_csv(data_file, index=False)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        code = run(parse_args(['--data-file', str(data_file), '--db', str(tmp_path / 'pipeline.db'),
+                               '--out', str(tmp_path / 'pipeline-api'), '--skip-images']))
+
+        sequential_db = str(tmp_path / 'sequential.db')
+        load_dataframe_to_database(pd.read_csv(data_file), sequential_db)
+        precompute(sequential_db)
+        export_all(sequential_db, [tmp_path / 'sequential-api'])
+
+    assert code == 0
+    pipeline_files = api_files(tmp_path / 'pipeline-api')
+    assert 'ha/2026-03-06/lunch.json' in pipeline_files
+    assert pipeline_files == api_files(tmp_path / 'sequential-api')
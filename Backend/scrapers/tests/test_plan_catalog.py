@@ -0,0 +1,81 @@
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'meal-planning'))
+
+from export_to_json import export_all
+from load_to_db import load_dataframe_to_database
+from plan_catalog import build_catalog
+
+
+FOODS = [('Grilled Chicken', 'Entrees', 250, 40, 8, 2), ('Brown Rice', 'Starches', 200, 4, 2, 44),
+         ('Broccoli', 'Vegetables', 50, 4, 0, 10), ('Apple', 'Fruit', 90, 0, 0, 24)]
+
+
+def menu(foods):
+    return pd.DataFrame([
+        {'dining_hall': 'Hall A (HA)', 'service': 'Main', 'date': 'Friday, March 6, 2026', 'meal_type': 'Lunch',
+         'category': category, 'name': name, 'serving_size': '1 each', 'calories': cal, 'protein': p,
+         'total_fat': f, 'total_carbohydrate': c, 'dietary_fiber': 1}
+        for name, category, cal, p, f, c in foods
+    ])
+
+
+def test_catalog_plans_are_stored_and_reproducible(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+    df = menu(FOODS)
+    grid = {'halls': ['HA', 'XX'], 'meals': ['Lunch'], 'goals': ['balanced'], 'diets': ['standard', 'vegan'],
+            'calories': [600], 'variants': 2}
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_dataframe_to_database(df, db_file)
+        stats = build_catalog(db_file, workers=1, **grid)
+        assert (stats['plans'], stats['changed']) == (4, True)  # XX isn't in the database
+        assert build_catalog(db_file, workers=1, **grid)['skipped']  # data version unchanged
+        rebuilt = build_catalog(db_file, workers=1, force=True, **grid)
+        assert (rebuilt['skipped'], rebuilt['changed']) == (False, False)  # same seeds, same plans
+
+    conn = sqlite3.connect(db_file)
+    plan = json.loads(conn.execute("SELECT plan FROM meal_plan_catalog WHERE diet = 'standard'").fetchone()[0])
+    variants = conn.execute("SELECT variant FROM meal_plan_catalog WHERE diet = 'vegan' ORDER BY 1").fetchall()
+    conn.close()
+    assert variants == [(0,), (1,)]
+    assert plan['dining_hall'] == 'Hall A (HA)' and plan['target_calories'] == 600
+    assert 'Grilled Chicken' in {item['name'] for item in plan['items']}
+
+
+def test_catalog_is_not_used_after_the_data_changes(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+    api = tmp_path / 'api'
+    plans_file = api / 'meal-plans' / 'ha' / 'lunch.json'
+    grid = {'halls': ['HA'], 'meals': ['Lunch'], 'goals': ['balanced'], 'diets': ['standard'], 'calories': [600],
+            'variants': 1}
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_dataframe_to_database(menu(FOODS), db_file)
+        build_catalog(db_file, workers=1, **grid)
+        export_all(db_file, [api])
+        assert plans_file.exists()
+
+        # New menu data loaded without rebuilding the catalog (pipeline.py without --plans)
+        load_dataframe_to_database(menu(FOODS + [('Salmon', 'Entrees', 300, 35, 15, 0)]), db_file)
+        export_all(db_file, [api])
+    assert not plans_file.exists()
+
+    conn = sqlite3.connect(db_file)
+    catalog, current = conn.execute(
+        "SELECT (SELECT version FROM consumer_versions WHERE consumer = 'meal_plan_catalog'), "
+        "(SELECT MAX(version) FROM data_version)").fetchone()
+    conn.close()
+    assert catalog < current  # what server.js compares before answering from the catalog
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_catalog(db_file, workers=1, **grid)
+        export_all(db_file, [api])
+    assert json.loads(plans_file.read_text())['plans']['balanced']['standard']['600']
@@ -0,0 +1,53 @@
+import contextlib
+import io
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'meal-planning'))
+
+from load_to_db import load_dataframe_to_database
+from meal_planner import MealPlanner
+from planner_snapshot import FIELDS, is_current, load_snapshot, write_snapshot
+
+
+def menu(hall, date, foods):
+    return pd.DataFrame([
+        {'dining_hall': hall, 'service': 'Main', 'date': date, 'meal_type': meal, 'category': 'Entrees',
+         'name': name, 'serving_size': '1 each', 'calories': cal, 'protein': 20, 'total_fat': 5,
+         'total_carbohydrate': 30, 'dietary_fiber': 2}
+        for meal in ('Lunch', 'Dinner') for name, cal in foods
+    ])
+
+
+def test_snapshot_matches_the_database_until_the_next_load(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+    df = pd.concat([
+        menu('Hall A (HA)', 'Friday, March 6, 2026', [('Chicken', 250), ('Water', 0), ('Rice', 200)]),
+        menu('Hall A (HA)', 'Saturday, March 7, 2026', [('Tofu', 180)]),
+        menu('Hall B (HB)', 'Friday, March 6, 2026', [('Pasta', 300)]),
+    ])
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_dataframe_to_database(df, db_file)
+    assert not is_current(db_file)
+    assert write_snapshot(db_file) == 10
+    assert is_current(db_file)
+
+    snapshot_planner = MealPlanner(db_file=db_file)
+    database_planner = MealPlanner(db_file=db_file, use_snapshot=False)
+    for args in [('hall a', 'Lunch'), ('HB', 'Dinner'), ('HA', 'Lunch', '2026-03-07'),
+                 ('HA', 'Lunch', 'march 6'), ('HC', 'Lunch')]:
+        items = snapshot_planner.filter_available_items(*args)
+        expected = database_planner.filter_available_items(*args)
+        assert items == [{field: item[field] for field in FIELDS} for item in expected]
+    assert snapshot_planner.snapshot is not None
+    assert [item['name'] for item in items] == []
+    assert [item['name'] for item in snapshot_planner.filter_available_items('Hall A', 'Lunch')] == \
+        ['Chicken', 'Rice', 'Tofu']  # id order, without the zero-calorie item
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_dataframe_to_database(menu('Hall B (HB)', 'Friday, March 6, 2026', [('Salad', 120)]), db_file)
+    assert load_snapshot(db_file) is None  # stale: the planner reads the database instead
+    assert 'Salad' in {item['name'] for item in snapshot_planner.filter_available_items('HB', 'Lunch')}
@@ -0,0 +1,69 @@
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from load_to_db import load_dataframe_to_database
+from precompute import precompute
+
+
+def test_rankings_and_summaries_are_precomputed_once(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+    foods = [('Chicken', 200, 40, 2, 0), ('Pasta', 300, 10, 5, 55), ('Bacon', 200, 10, 17, 0)]
+    df = pd.DataFrame([
+        {'dining_hall': 'Hall A (HA)', 'service': 'Main', 'date': 'Friday, March 6, 2026', 'meal_type': 'Lunch',
+         'category': 'Entrees', 'name': name, 'serving_size': '1 each', 'calories': cal, 'protein': p,
+         'total_fat': f, 'total_carbohydrate': c}
+        for name, cal, p, f, c in foods
+    ])
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_dataframe_to_database(df, db_file)
+        assert precompute(db_file) == ['food_densities', 'food_scores', 'meal_summaries', 'food_rankings']
+        assert precompute(db_file) == []
+
+    conn = sqlite3.connect(db_file)
+    names = dict(conn.execute('SELECT id, name FROM food_items'))
+
+    def ranking(service_date, meal_type, name):
+        row = conn.execute('SELECT food_ids FROM food_rankings WHERE service_date = ? AND meal_type = ? AND ranking = ?',
+                           (service_date, meal_type, name)).fetchone()
+        return [names[food_id] for food_id in json.loads(row[0])]
+
+    assert ranking('2026-03-06', 'Lunch', 'keto') == ['Bacon', 'Chicken', 'Pasta']
+    assert ranking('', '', 'protein') == ['Chicken', 'Bacon', 'Pasta']
+    assert conn.execute('SELECT items, max_protein FROM meal_summaries').fetchall() == [(3, 40.0)]
+    conn.close()
+
+
+def test_precompute_of_one_hall_at_a_time_matches_a_full_run(tmp_path):
+    def frame(hall, foods):
+        return pd.DataFrame([
+            {'dining_hall': hall, 'service': 'Main', 'date': 'Friday, March 6, 2026', 'meal_type': 'Lunch',
+             'category': 'Entrees', 'name': name, 'serving_size': '1 each', 'calories': cal, 'protein': p}
+            for name, cal, p in foods
+        ])
+
+    halls = [frame('Hall A (HA)', [('Chicken', 200, 40), ('Pasta', 300, 10)]),
+             frame('Hall B (HB)', [('Tofu', 150, 15), ('Pasta', 300, 10)])]
+    scoped_db, full_db = str(tmp_path / 'scoped.db'), str(tmp_path / 'full.db')
+    with contextlib.redirect_stdout(io.StringIO()):
+        for df in halls:
+            load_dataframe_to_database(df, scoped_db)
+            precompute(scoped_db, halls=[df['dining_hall'][0]])
+            load_dataframe_to_database(df, full_db)
+        precompute(full_db)
+
+    def tables(db_file):
+        conn = sqlite3.connect(db_file)
+        rows = {table: sorted(conn.execute(f'SELECT * FROM {table}'))
+                for table in ('food_scores', 'meal_summaries', 'food_rankings')}
+        conn.close()
+        return rows
+
+    assert tables(scoped_db) == tables(full_db)
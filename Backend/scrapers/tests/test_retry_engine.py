@@ -0,0 +1,88 @@
+import contextlib
+import io
+import os
+import sys
+from datetime import date
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from nutrition_scraper import NutritionScraperComplete
+from retry_engine import RetryEngine
+from scheduler import WorkSchedule
+
+TODAY = date(2026, 3, 6)
+GRILL = {'dining_hall': 'Main Hall', 'dining_services': [{'service_name': 'Grill', 'service_id': '1'}]}
+CAFE = {'dining_hall': 'Cafe', 'dining_services': [{'service_name': 'Cafe', 'service_id': '2'}]}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_backoff_grows_with_jitter_and_the_breaker_pauses_then_gives_up():
+    clock = Clock()
+    engine = RetryEngine(max_attempts=10, base_delay=4, max_delay=10, failure_threshold=2, cooldown=30, max_trips=1,
+                         clock=clock, rng=lambda: 1.0)
+    assert [engine.backoff(attempt) for attempt in (1, 2, 3, 4)] == [4, 8, 10, 10]
+    assert RetryEngine(base_delay=4, rng=lambda: 0.0).backoff(1) == 2  # half the delay is jitter
+
+    assert engine.failure('Grill', 'Grill dinner', 1) == 4
+    assert engine.failure('Grill', 'Grill dinner', 2) == 30  # tripped: waits for the pause, not the backoff
+    assert engine.paused_until('Grill') == 30 and engine.paused_until('Cafe') is None
+    clock.now = 31
+    engine.success('Grill')
+    assert engine.failure('Grill', 'Grill lunch', 1) == 35
+    assert engine.failure('Grill', 'Grill lunch', 2) is None  # second trip: the service is given up
+    assert engine.paused_until('Grill') == float('inf')
+    assert engine.summary() == {'retries': 3, 'trips': 2, 'given_up': 1, 'retry_wait': 38}
+
+
+def test_failed_unit_waits_while_healthy_units_keep_flowing():
+    clock = Clock()
+    engine = RetryEngine(base_delay=20, failure_threshold=5, clock=clock, rng=lambda: 1.0)
+    schedule = WorkSchedule(['Main Hall'], today=TODAY, clock=clock, sleep=clock.sleep,
+                            paused_until=lambda unit: engine.paused_until(unit['service']['service_name']))
+    for hall_index, hall in enumerate([GRILL, CAFE]):
+        schedule.add_date(hall, hall_index, hall['dining_services'][0], 0, '03/06/2026', 'Friday', TODAY)
+
+    first = schedule.next()
+    assert first['hall'] is GRILL
+    clock.now += 1
+    schedule.retry(first, engine.failure('Grill', 'Grill', first.get('attempt', 1)), 1)
+
+    second = schedule.next()
+    assert second['hall'] is CAFE and clock.now == 1  # no sleep while Cafe was ready
+    schedule.done(second, [], 1)
+    retried = schedule.next()
+    assert retried['hall'] is GRILL and retried['attempt'] == 2 and clock.now == 21  # slept only when nothing else
+    assert schedule.done(retried, [], 1) == ('Main Hall', [])
+
+
+def test_a_meal_that_runs_out_of_retries_holds_its_day(monkeypatch):
+    scraper = NutritionScraperComplete(playback_mode=True)
+    scraper.listing_store_file = None
+    scraper.retries = RetryEngine(max_attempts=2, base_delay=0, max_delay=0)
+    meals = [{'index': 0, 'type': 'Lunch', 'date_text': ''}, {'index': 1, 'type': 'Dinner', 'date_text': ''}]
+    monkeypatch.setattr(scraper, 'scrape_dining_structure', lambda: [GRILL])
+    monkeypatch.setattr(scraper, 'navigate_to_service', lambda *args: True)
+    monkeypatch.setattr(scraper, 'get_available_dates_for_next_n_days',
+                        lambda days: [{'date': TODAY, 'data_date': '03/06/2026', 'date_str': 'Friday'}])
+    monkeypatch.setattr(scraper, '_list_meals', lambda *args: meals)
+    monkeypatch.setattr(scraper, '_scrape_meal',
+                        lambda hall, service, service_id, date_str, service_date, script, meal_def, count:
+                        None if meal_def['type'] == 'Dinner' else [{'name': 'Rice', 'meal_type': 'Lunch'}])
+
+    released = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = scraper.scrape_all_with_complete_data(1, on_hall_complete=lambda *day: released.append(day))
+
+    assert results == [{'name': 'Rice', 'meal_type': 'Lunch'}]  # archived
+    assert released == []  # but not loaded over the stored Dinner
+    assert [unit for _, unit, _ in scraper.retries.given_up] == ['Main Hall / Grill 2026-03-06 Dinner']
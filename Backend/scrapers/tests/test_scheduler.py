@@ -0,0 +1,123 @@
+import os
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from load_to_db import load_dataframe_to_database
+from scheduler import WorkSchedule
+
+TODAY = date(2026, 3, 6)
+MAIN = {'dining_hall': 'Main Hall', 'dining_services': [{'service_name': 'Grill', 'service_id': '1'}]}
+OTHER = {'dining_hall': 'Cafe', 'dining_services': [{'service_name': 'Cafe', 'service_id': '2'}]}
+MEALS = [{'index': 0, 'type': 'Dinner', 'date_text': ''}, {'index': 1, 'type': 'Breakfast', 'date_text': ''}]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def plan(schedule, days=3):
+    for hall_index, hall in enumerate([OTHER, MAIN]):
+        service = hall['dining_services'][0]
+        for offset in range(days):
+            day = TODAY + timedelta(days=offset)
+            schedule.add_date(hall, hall_index, service, 0, day.strftime('%m/%d/%Y'), str(day), day)
+
+
+def run(schedule, clock, seconds=10):
+    """Work through the schedule; returns (order of (hall, service_date, meal)), released hall-days)"""
+    order, released = [], []
+    while (unit := schedule.next()) is not None:
+        clock.now += seconds
+        if unit['kind'] == 'date':
+            schedule.add_meals(unit, MEALS)
+            rows = []
+        else:
+            order.append((unit['hall']['dining_hall'], unit['service_date'], unit['meal_def']['type']))
+            rows = [order[-1]]
+        done = schedule.done(unit, rows, seconds)
+        if done:
+            released.append((done[0], done[1][0][1]))
+    return order, released
+
+
+def test_today_and_tomorrow_at_main_halls_come_first():
+    clock = Clock()
+    schedule = WorkSchedule(['Main Hall'], today=TODAY, clock=clock)
+    plan(schedule)
+    order, released = run(schedule, clock)
+
+    assert order[:4] == [('Main Hall', '2026-03-06', 'Breakfast'), ('Main Hall', '2026-03-06', 'Dinner'),
+                         ('Main Hall', '2026-03-07', 'Breakfast'), ('Main Hall', '2026-03-07', 'Dinner')]
+    assert order[4:6] == [('Cafe', '2026-03-06', 'Breakfast'), ('Cafe', '2026-03-06', 'Dinner')]
+    assert order[-2:] == [('Cafe', '2026-03-08', 'Breakfast'), ('Cafe', '2026-03-08', 'Dinner')]
+    assert released[0] == ('Main Hall', '2026-03-06') and len(released) == 6  # each hall-day once, when complete
+    assert not schedule.stopped_early
+
+
+def test_deadline_stops_before_a_unit_that_would_not_fit_and_holds_incomplete_days():
+    clock = Clock()
+    schedule = WorkSchedule(['Main Hall'], deadline=90, today=TODAY, clock=clock)
+    plan(schedule)
+    order, released = run(schedule, clock)
+
+    assert schedule.stopped_early and clock.now <= 90
+    assert released == [('Main Hall', '2026-03-06'), ('Main Hall', '2026-03-07')]
+    assert order[-1] == ('Cafe', '2026-03-06', 'Breakfast')  # started, but its day was never finished
+    assert schedule.incomplete_days() == [('Cafe', '2026-03-06')]
+
+
+def test_unreachable_service_drops_the_rest_of_its_day():
+    clock = Clock()
+    schedule = WorkSchedule(['Main Hall'], today=TODAY, clock=clock)
+    plan(schedule, days=1)
+    schedule.hold('Cafe')  # not fully planned: never released
+
+    unit = schedule.next()
+    schedule.add_meals(unit, MEALS)
+    assert schedule.done(unit, [], 1) is None
+    first_meal = schedule.next()
+    schedule.skip_rest(first_meal)
+    assert schedule.done(first_meal, [], 1) is None  # held: releasing it would wipe the stored day
+    assert run(schedule, clock)[1] == []
+    assert schedule.incomplete_days() == [('Cafe', '2026-03-06'), ('Main Hall', '2026-03-06')]
+
+
+def test_a_day_with_a_given_up_meal_keeps_its_stored_rows(tmp_path):
+    db_file = str(tmp_path / 'nutrition.db')
+
+    def frame(rows):
+        return pd.DataFrame([{'dining_hall': hall, 'service': 'Grill', 'date': 'Friday, March 6, 2026',
+                              'service_date': service_date, 'meal_type': meal, 'category': 'Entrees',
+                              'name': f'{meal} special', 'serving_size': '1 each', 'calories': 300}
+                             for hall, service_date, meal in rows])
+
+    stored = [('Main Hall', '2026-03-06', 'Breakfast'), ('Main Hall', '2026-03-06', 'Dinner')]
+    load_dataframe_to_database(frame(stored), db_file)
+
+    schedule = WorkSchedule(['Main Hall'], today=TODAY, clock=Clock())
+    schedule.add_date(MAIN, 0, MAIN['dining_services'][0], 0, '03/06/2026', 'Friday', TODAY)
+    date_unit = schedule.next()
+    schedule.add_meals(date_unit, MEALS)
+    schedule.done(date_unit, [], 1)
+    released = []
+    while (unit := schedule.next()) is not None:
+        if unit['meal_def']['type'] == 'Dinner':
+            released.append(schedule.give_up(unit, 1))  # out of retries
+        else:
+            released.append(schedule.done(unit, [('Main Hall', '2026-03-06', 'Breakfast')], 1))
+
+    assert released == [None, None]
+    for hall_rows in filter(None, released):
+        load_dataframe_to_database(frame(hall_rows[1]), db_file)
+    conn = sqlite3.connect(db_file)
+    assert sorted(conn.execute('SELECT meal_type FROM nutrition_data')) == [('Breakfast',), ('Dinner',)]
+    conn.close()
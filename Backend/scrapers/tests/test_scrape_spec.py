@@ -0,0 +1,59 @@
+import argparse
+import json
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from scrape_spec import ScrapeSpec, add_spec_arguments, spec_from_args
+
+TODAY = date(2026, 3, 6)
+
+
+def test_spec_matches_halls_services_dates_and_meals():
+    spec = ScrapeSpec(halls=['ISR', 'lincoln'], services=['diner'], dates=['tomorrow', '2026-03-10..2026-03-11'],
+                      meals=['Lunch'], today=TODAY)
+
+    assert spec.wants_hall('Illinois Street Dining Center (ISR)')
+    assert spec.wants_hall('Lincoln Avenue Dining Hall (LAR)')
+    assert not spec.wants_hall('Ikenberry Dining Center (Ike)')
+    assert spec.wants_service('Gregory Drive Diner') and not spec.wants_service('Field of Greens')
+    assert [spec.wants_date(date(2026, 3, d)) for d in (6, 7, 9, 10, 11, 12)] == [False, True, False, True, True, False]
+    assert spec.wants_meal('lunch') and not spec.wants_meal('Light Lunch')
+    assert spec.days_needed(5) == 6  # the selector has to reach 03-11
+    assert spec.partial_days
+    assert not ScrapeSpec(halls=['ISR'], dates=['today']).partial_days
+
+
+def test_empty_spec_matches_everything():
+    spec = ScrapeSpec(today=TODAY)
+    assert not spec and spec.describe() == 'everything'
+    assert spec.wants_hall('Any Hall') and spec.wants_date(date(2030, 1, 1)) and spec.days_needed(5) == 5
+    with pytest.raises(ValueError):
+        ScrapeSpec(dates=['2026-03-08..2026-03-07'])
+
+
+def test_flags_override_the_spec_file(tmp_path):
+    spec_file = tmp_path / 'rescrape.json'
+    spec_file.write_text(json.dumps({'halls': 'ISR', 'meals': ['Dinner'], 'dates': ['2026-03-06']}))
+    parser = argparse.ArgumentParser()
+    add_spec_arguments(parser)
+
+    spec = spec_from_args(parser.parse_args(['--spec', str(spec_file), '--meal', 'Breakfast', 'Lunch']))
+    assert spec.halls == ['ISR'] and spec.meals == ['Breakfast', 'Lunch'] and spec.dates == ['2026-03-06']
+    assert spec_from_args(parser.parse_args([])) is None
+
+    spec_file.write_text(json.dumps({'hall': 'ISR'}))
+    with pytest.raises(ValueError):
+        ScrapeSpec.from_file(str(spec_file))
+
+
+def test_yaml_spec_file(tmp_path):
+    pytest.importorskip('yaml')
+    spec_file = tmp_path / 'rescrape.yaml'
+    spec_file.write_text("halls: [Ike]\nservices: Gregory Drive Diner\n")
+    spec = ScrapeSpec.from_file(str(spec_file))
+    assert spec.halls == ['Ike'] and spec.services == ['Gregory Drive Diner']
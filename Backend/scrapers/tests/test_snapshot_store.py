@@ -0,0 +1,51 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from snapshot_store import SnapshotStore
+
+PAGE = '<html><body>' + '<div class="cbo_nn_itemHover">Food</div>' * 200 + '</body></html>'
+
+
+def test_identical_pages_are_stored_once_and_indexed_by_stage(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'store'))
+    store.save('click_meal', PAGE, 'timeout')
+    store.save('click_meal', PAGE, 'timeout again')
+    store.save('extract_item', PAGE, 'no modal', detail='3. Food')
+    store.save('select_date', '<html>other</html>', 'stale', playback_dir=str(tmp_path / 'playback'))
+    store.flush()
+
+    assert len(os.listdir(tmp_path / 'store' / 'blobs')) == 2
+    [(digest, entry)] = store.pages('click_meal')
+    assert entry['size'] < len(PAGE) / 10  # compressed
+    assert [(f['stage'], f['count']) for f in entry['failures']] == [('click_meal', 2), ('extract_item', 1)]
+    assert store.read(digest) == PAGE
+    assert os.listdir(tmp_path / 'playback')[0].startswith('select_date_')
+
+    # The index survives a restart and exports playback fixtures
+    reopened = SnapshotStore(str(tmp_path / 'store'))
+    [path] = reopened.export('extract_item', str(tmp_path / 'fixtures'))
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == PAGE
+
+
+def test_least_recently_seen_pages_are_evicted(tmp_path):
+    store = SnapshotStore(str(tmp_path), max_bytes=1)
+    store.save('click_meal', PAGE + 'a', 'x')
+    store.save('click_meal', PAGE + 'b', 'x')
+    store.flush()
+    [(digest, entry)] = store.pages()
+    assert store.read(digest).endswith('b')
+    assert len(os.listdir(tmp_path / 'blobs')) == 1
+
+
+def test_a_real_failure_page_round_trips(tmp_path):
+    with open(os.path.join(os.path.dirname(__file__), 'fixtures', '20260210_144913_click_meal.html'),
+              encoding='utf-8') as f:
+        page = f.read()
+    store = SnapshotStore(str(tmp_path))
+    store.save('click_meal', page, 'stale element')
+    store.flush()
+    [(digest, entry)] = store.pages('click_meal')
+    assert store.read(digest) == page and entry['size'] < len(page) / 4
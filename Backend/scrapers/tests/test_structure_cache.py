@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import nutrition_scraper
+from nutrition_scraper import NutritionScraperComplete
+from structure_cache import load_structure, nav_fingerprint, save_structure
+
+NAV = '''<div id="nav-unit-selector">
+  <div class="dropdown-item"><a class="text-primary" title="Hall A" data-unitoid="1" onclick="{click}">Hall A</a></div>
+  <div class="dropdown-item"><a class="text-muted pl-2" title="Grill" data-unitoid="2" onclick="{click}">Grill</a></div>
+</div>'''
+
+TREE = [{'dining_hall': 'Hall A', 'unit_id': '1', 'dining_services': [{'service_name': 'Grill', 'service_id': '2'}]}]
+
+
+class FakeDropdown:
+    """The nav-unit-selector element of a page whose tree must not be walked"""
+
+    def __init__(self, html):
+        self.html = html
+
+    def get_attribute(self, name):
+        return self.html if name == 'outerHTML' else None
+
+    def find_elements(self, *args):
+        raise AssertionError('dropdown walked although the fingerprint matched')
+
+
+class FakePage:
+    def __init__(self, html):
+        self.dropdown = FakeDropdown(html)
+        self.loads = 0
+
+    def get(self, url):
+        self.loads += 1
+
+    def until(self, condition):
+        return self.dropdown
+
+
+def cached_scraper(tmp_path, monkeypatch, page):
+    monkeypatch.setattr(nutrition_scraper.time, 'sleep', lambda seconds: None)
+    scraper = NutritionScraperComplete(playback_mode=True, fast_mode=False)
+    scraper.playback_mode = False
+    scraper.driver = scraper.wait = page
+    scraper.structure_cache_file = str(tmp_path / 'dining_structure.json')
+    return scraper
+
+
+def test_fingerprint_covers_the_unit_links_only():
+    assert nav_fingerprint(NAV.format(click='a()')) == nav_fingerprint(NAV.format(click='b()'))
+    assert nav_fingerprint(NAV.format(click='a()')) != nav_fingerprint(NAV.replace('Grill', 'Deli'))
+
+
+def test_fresh_cache_skips_the_page_and_a_stale_one_is_revalidated(tmp_path, monkeypatch):
+    page = FakePage(NAV.format(click='a()'))
+    scraper = cached_scraper(tmp_path, monkeypatch, page)
+    save_structure(TREE, nav_fingerprint(NAV.format(click='b()')), scraper.base_url, scraper.structure_cache_file)
+
+    assert scraper.scrape_dining_structure() == TREE
+    assert page.loads == 0 and scraper.structure_from_cache
+
+    scraper.structure_cache_ttl = 0
+    assert scraper.scrape_dining_structure() == TREE  # same links: cache kept, tree not walked
+    assert page.loads == 1
+    assert time.time() - load_structure(scraper.base_url, scraper.structure_cache_file)['checked_at'] < 60
+
+    # The site changed: the dropdown is walked again
+    scraper.driver = scraper.wait = FakePage(NAV.replace('Grill', 'Deli'))
+    scraper.structure_cache_ttl = 3600
+    assert scraper.scrape_dining_structure() == TREE  # cached tree is still fresh
+    scraper.structure_cache_ttl = 0
+    assert scraper.scrape_dining_structure() == []  # FakeDropdown raises: walk attempted, error handled
+    assert not scraper.structure_from_cache
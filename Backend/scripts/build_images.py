@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Build the images served from Docs/images: resized WebP/AVIF variants,
+thumbnails and a manifest
+
+    python3 build_images.py [--src DIR] [--workers N] [--force]
+
+The originals are the image files at the top of Docs/images (the pages link
+to them directly). --src, by default the Flutter app's assets/images when it
+exists, is copied in first; only files whose content changed are copied.
+
+For each original, variants/ gets one file per width in WIDTHS that is smaller
+than the image, plus a square thumbnail, in WebP and (if this Pillow can
+write it) AVIF. Variant names carry the original's content hash, so they can
+be cached forever and an unchanged original is not rebuilt. Variants no
+original refers to any more are deleted. manifest.json lists every original
+with its hash and size, and every variant with its format, size and bytes:
+
+    {"images": {"ISR.jpg": {"sha256": "...", "width": 1800, "height": 946, "bytes": 1202014,
+                            "variants": [{"file": "variants/ISR-3f9c0a1b2d4e-480.webp", "kind": "resized",
+                                          "format": "webp", "width": 480, "height": 252, "bytes": 21894}, ...]}}}
+
+so a page can pick the smallest file at least as wide as it is displayed.
+Images are built in a process pool; pipeline.py runs this alongside the scrape.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageOps, features
+
+ROOT = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT / 'Frontend' / 'flutter_easyeats' / 'assets' / 'images'
+DST_DIR = ROOT / 'Docs' / 'images'
+VARIANTS = 'variants'
+MANIFEST = 'manifest.json'
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+WIDTHS = [480, 960, 1600]
+THUMBNAIL = 160
+QUALITY = {'webp': 80, 'avif': 55}
+
+
+def _avif_supported():
+    try:
+        return features.check_module('avif')
+    except ValueError:  # Pillow < 11.2 doesn't know the module
+        return False
+
+
+FORMATS = ['webp', 'avif'] if _avif_supported() else ['webp']
+
+
+def file_hash(path):
+    """sha256 hex digest of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def settings():
+    """What the variants depend on besides the original; a change rebuilds everything"""
+    return {'widths': WIDTHS, 'thumbnail': THUMBNAIL, 'formats': FORMATS, 'quality': QUALITY}
+
+
+def originals(directory):
+    """Image files at the top of a directory, by name"""
+    if not directory.is_dir():
+        return []
+    return sorted(p for p in directory.iterdir() if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS)
+
+
+def copy_changed(src_dir, dst_dir):
+    """Copy the images from src_dir whose content differs from dst_dir's; returns the names copied"""
+    copied = []
+    for item in originals(src_dir):
+        target = dst_dir / item.name
+        if target.exists() and target.stat().st_size == item.stat().st_size and file_hash(target) == file_hash(item):
+            continue
+        shutil.copy(item, target)
+        copied.append(item.name)
+    return copied
+
+
+def _save(image, path, fmt):
+    """Write atomically, so an interrupted build never leaves a truncated variant behind"""
+    tmp = path.with_name(path.name + '.tmp')
+    image.save(tmp, format=fmt.upper(), quality=QUALITY[fmt])
+    os.replace(tmp, path)
+
+
+def build_image(job):
+    """
+    Write the variants of one original (runs in a worker process)
+
+    Args:
+        job: (original path, output directory, sha256 of the original)
+
+    Returns:
+        (name, manifest entry)
+    """
+    path, dst_dir, digest = job
+    variants_dir = dst_dir / VARIANTS
+    with Image.open(path) as opened:
+        image = ImageOps.exif_transpose(opened)
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    width, height = image.size
+    stem = f'{path.stem}-{digest[:12]}'
+
+    sizes = [('resized', w, image.resize((w, max(1, round(height * w / width))), Image.LANCZOS))
+             for w in WIDTHS if w < width]
+    sizes.append(('thumbnail', THUMBNAIL, ImageOps.fit(image, (THUMBNAIL, THUMBNAIL), Image.LANCZOS)))
+
+    entries = []
+    for kind, w, resized in sizes:
+        suffix = 'thumb' if kind == 'thumbnail' else str(w)
+        for fmt in FORMATS:
+            target = variants_dir / f'{stem}-{suffix}.{fmt}'
+            if not target.exists():
+                _save(resized, target, fmt)
+            entries.append({'file': f'{VARIANTS}/{target.name}', 'kind': kind, 'format': fmt,
+                            'width': resized.width, 'height': resized.height, 'bytes': target.stat().st_size})
+
+    return path.name, {'sha256': digest, 'width': width, 'height': height, 'bytes': path.stat().st_size,
+                       'variants': entries}
+
+
+def _is_current(entry, digest, dst_dir):
+    return (entry is not None and entry['sha256'] == digest
+            and all((dst_dir / v['file']).exists() for v in entry['variants']))
+
+
+def build(dst_dir=DST_DIR, src_dir=SRC_DIR, workers=None, force=False):
+    """
+    Bring dst_dir's variants and manifest up to date with its originals
+
+    Returns:
+        dict with images, built, skipped, copied (names), removed (stale variant files)
+    """
+    dst_dir = Path(dst_dir)
+    variants_dir = dst_dir / VARIANTS
+    variants_dir.mkdir(parents=True, exist_ok=True)
+    copied = copy_changed(Path(src_dir), dst_dir) if src_dir and Path(src_dir) != dst_dir else []
+
+    manifest_file = dst_dir / MANIFEST
+    previous = {}
+    if manifest_file.exists() and not force:
+        with open(manifest_file, encoding='utf-8') as f:
+            stored = json.load(f)
+        if stored.get('settings') == settings():
+            previous = stored['images']
+
+    images, jobs = {}, []
+    for path in originals(dst_dir):
+        digest = file_hash(path)
+        entry = previous.get(path.name)
+        if _is_current(entry, digest, dst_dir):
+            images[path.name] = entry
+        else:
+            jobs.append((path, dst_dir, digest))
+
+    workers = min(workers or os.cpu_count() or 1, max(1, len(jobs)))
+    if workers == 1:
+        built = [build_image(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            built = list(pool.map(build_image, jobs))
+    images.update(built)
+
+    referenced = {Path(v['file']).name for entry in images.values() for v in entry['variants']}
+    removed = 0
+    for stale in variants_dir.iterdir():
+        if stale.name not in referenced:
+            stale.unlink()
+            removed += 1
+
+    manifest = {'settings': settings(), 'images': dict(sorted(images.items()))}
+    tmp = manifest_file.with_name(MANIFEST + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+        f.write('\n')
+    os.replace(tmp, manifest_file)
+
+    return {'images': len(images), 'built': len(built), 'skipped': len(images) - len(built), 'copied': copied,
+            'removed': removed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build resized WebP/AVIF variants and a manifest for Docs/images')
+    parser.add_argument('--src', default=str(SRC_DIR), help='Copy changed images from here first')
+    parser.add_argument('--dst', default=str(DST_DIR), help='Directory of the served originals (default: Docs/images)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--force', action='store_true', help='Rebuild every variant')
+    args = parser.parse_args()
+
+    stats = build(Path(args.dst), Path(args.src), workers=args.workers, force=args.force)
+    for name in stats['copied']:
+        print('Copied', name)
+    print(f"✓ Images: {stats['images']} ({stats['built']} built, {stats['skipped']} unchanged), "
+          f"{stats['removed']} stale variants removed, formats: {', '.join(FORMATS)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,9 @@ print('Validating JSON files in', API_DIR)
 
 for path in glob.glob(os.path.join(API_DIR, '*.json')):
     name = os.path.basename(path)
+    if name == 'manifest.json':
+        # Written by artifact_writer.py: content hashes, not menu data
+        continue
     try:
         with open(path, 'r', encoding='utf-8') as f:
             data = json.load(f)
@@ -20,6 +23,9 @@ for path in glob.glob(os.path.join(API_DIR, '*.json')):
                 if name == 'dining-halls.json':
                     if not data.get('dining_halls'):
                         invalid.append((name, 'Empty dining_halls'))
+                elif name in ('index.json', 'summaries.json'):
+                    if not data.get('halls'):
+                        invalid.append((name, 'Empty halls'))
                 else:
                     if not data.get('foods') and not data.get('count'):
                         invalid.append((name, 'Missing foods/count'))
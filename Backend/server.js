@@ -19,7 +19,42 @@ app.use(express.json());
 
 // Serve static API files (for local testing matching GitHub Pages structure)
 // This allows requests to /api/dining-halls.json to serve the file from Docs/api/dining-halls.json
-app.use('/api', express.static(path.join(__dirname, '../Docs/api')));
+const staticApiDir = path.join(__dirname, '../Docs/api');
+const PRECOMPRESSED = [['br', '.br'], ['gzip', '.gz']];
+
+// Whether an Accept-Encoding header allows an encoding: whole tokens only, `q=0` refuses,
+// and `*` stands for any encoding the header doesn't name
+function acceptsEncoding(header, encoding) {
+    const qualities = new Map();
+    for (const part of (header || '').split(',')) {
+        const [token, ...params] = part.trim().toLowerCase().split(';');
+        if (!token) continue;
+        const q = params.map(p => p.trim()).find(p => p.startsWith('q='));
+        qualities.set(token.trim(), q === undefined ? 1 : parseFloat(q.slice(2)) || 0);
+    }
+    const q = qualities.has(encoding) ? qualities.get(encoding) : qualities.get('*');
+    return q !== undefined && q > 0;
+}
+
+// Send the exporter's precompressed .br/.gz sibling of a JSON file when the client accepts it
+app.use('/api', (req, res, next) => {
+    if (req.method !== 'GET' && req.method !== 'HEAD') return next();
+    if (!req.path.endsWith('.json')) return next();
+    for (const [encoding, suffix] of PRECOMPRESSED) {
+        if (!acceptsEncoding(req.headers['accept-encoding'], encoding)) continue;
+        const sibling = path.join(staticApiDir, decodeURIComponent(req.path) + suffix);
+        if (!sibling.startsWith(staticApiDir) || !fs.existsSync(sibling)) continue;
+        res.set({
+            'Content-Encoding': encoding,
+            'Content-Type': 'application/json; charset=utf-8',
+            'Vary': 'Accept-Encoding'
+        });
+        req.url = req.url.replace(/\.json(\?|$)/, `.json${suffix}$1`);
+        break;
+    }
+    next();
+});
+app.use('/api', express.static(staticApiDir));
 
 // API Endpoint
 app.get('/api/meal-plan', (req, res) => {
@@ -33,107 +68,118 @@ app.get('/api/meal-plan', (req, res) => {
         });
     }
 
-    // Path to Python script
-    const scriptPath = path.join(__dirname, 'meal-planning', 'meal_planner.py');
+    // Anything the catalog doesn't cover is planned by the Python script
+    const planLive = () => {
+        // Path to Python script
+        const scriptPath = path.join(__dirname, 'meal-planning', 'meal_planner.py');
 
-    // Build arguments
-    const args = [
-        scriptPath,
-        '--calories', calories,
-        '--hall', dining_hall,
-        '--json' // Force JSON output
-    ];
+        // Build arguments
+        const args = [
+            scriptPath,
+            '--calories', calories,
+            '--hall', dining_hall,
+            '--json' // Force JSON output
+        ];
 
-    if (meal_type) {
-        args.push('--meal', meal_type);
-    }
+        if (meal_type) {
+            args.push('--meal', meal_type);
+        }
 
-    if (req.query.goal) {
-        args.push('--goal', req.query.goal);
-    }
+        if (req.query.goal) {
+            args.push('--goal', req.query.goal);
+        }
 
-    if (protein) {
-        args.push('--protein', protein);
-    }
+        if (protein) {
+            args.push('--protein', protein);
+        }
 
-    if (req.query.date) {
-        args.push('--date', req.query.date);
-    }
+        if (req.query.date) {
+            args.push('--date', req.query.date);
+        }
 
-    if (req.query.vegetarian === 'true') {
-        args.push('--vegetarian');
-    }
+        if (req.query.vegetarian === 'true') {
+            args.push('--vegetarian');
+        }
 
-    if (req.query.vegan === 'true') {
-        args.push('--vegan');
-    }
+        if (req.query.vegan === 'true') {
+            args.push('--vegan');
+        }
 
-    // Spawn Python process
-    // Note: Using 'python3' - make sure it's in the path
-    const pythonProcess = spawn('python3', args);
+        // Spawn Python process
+        // Note: Using 'python3' - make sure it's in the path
+        const pythonProcess = spawn('python3', args);
 
-    let dataString = '';
-    let errorString = '';
+        let dataString = '';
+        let errorString = '';
 
-    // Collect data from stdout
-    pythonProcess.stdout.on('data', (data) => {
-        dataString += data.toString();
-    });
+        // Collect data from stdout
+        pythonProcess.stdout.on('data', (data) => {
+            dataString += data.toString();
+        });
 
-    // Collect errors from stderr
-    pythonProcess.stderr.on('data', (data) => {
-        errorString += data.toString();
-    });
+        // Collect errors from stderr
+        pythonProcess.stderr.on('data', (data) => {
+            errorString += data.toString();
+        });
 
-    // Handle process close
-    pythonProcess.on('close', (code) => {
-        if (code !== 0) {
-            console.error(`Python script exited with code ${code}`);
-            console.error(`Error: ${errorString}`);
-            return res.status(500).json({
-                error: 'Failed to generate meal plan',
-                details: errorString
-            });
-        }
+        // Handle process close
+        pythonProcess.on('close', (code) => {
+            if (code !== 0) {
+                console.error(`Python script exited with code ${code}`);
+                console.error(`Error: ${errorString}`);
+                return res.status(500).json({
+                    error: 'Failed to generate meal plan',
+                    details: errorString
+                });
+            }
 
-        try {
-            // Robust parsing: search for the last line that looks like a JSON object
-            const lines = dataString.trim().split('\n');
-            let mealPlan = null;
-
-            // Try parsing from the end backwards to find the JSON result
-            for (let i = lines.length - 1; i >= 0; i--) {
-                const line = lines[i].trim();
-                if (line.startsWith('{') && line.endsWith('}')) {
-                    try {
-                        mealPlan = JSON.parse(line);
-                        break;
-                    } catch (e) {
-                        // Not valid JSON, continue searching
+            try {
+                // Robust parsing: search for the last line that looks like a JSON object
+                const lines = dataString.trim().split('\n');
+                let mealPlan = null;
+
+                // Try parsing from the end backwards to find the JSON result
+                for (let i = lines.length - 1; i >= 0; i--) {
+                    const line = lines[i].trim();
+                    if (line.startsWith('{') && line.endsWith('}')) {
+                        try {
+                            mealPlan = JSON.parse(line);
+                            break;
+                        } catch (e) {
+                            // Not valid JSON, continue searching
+                        }
                     }
                 }
-            }
 
-            if (mealPlan) {
-                res.json(mealPlan);
-            } else {
-                console.error('No valid JSON found in output');
-                console.error('Raw output:', dataString);
+                if (mealPlan) {
+                    res.json(mealPlan);
+                } else {
+                    console.error('No valid JSON found in output');
+                    console.error('Raw output:', dataString);
+                    res.status(500).json({
+                        error: 'Invalid response from meal planner',
+                        raw_output: dataString
+                    });
+                }
+            } catch (e) {
+                console.error('Failed to process meal planner output:', e);
                 res.status(500).json({
-                    error: 'Invalid response from meal planner',
-                    raw_output: dataString
+                    error: 'Error processing meal plan',
+                    details: e.message
                 });
             }
-        } catch (e) {
-            console.error('Failed to process meal planner output:', e);
-            res.status(500).json({
-                error: 'Error processing meal plan',
-                details: e.message
-            });
+        });
+    };
+
+    lookupCatalogPlan(req.query, (plan) => {
+        if (plan) {
+            return res.json({ ...plan, dining_hall });
         }
+        planLive();
     });
 });
 
+
 // Authentication endpoints
 app.post('/api/auth/register', (req, res) => {
     const { email, password } = req.body;
@@ -249,9 +295,103 @@ app.delete('/api/user/:userId/favorites/:index', (req, res) => {
 
 // ============ NUTRITION DATA ENDPOINTS ============
 
+// Resolve a dining_hall query parameter ("ISR", "Ikenberry", or a full name)
+// to the indexed hall_code column. The hall list is tiny, so it is cached and
+// matched in memory instead of running LIKE '%hall%' over the whole table.
+const HALL_CACHE_TTL_MS = 5 * 60 * 1000;
+const ISO_DATE = /^\d{4}-\d{2}-\d{2}$/;
+let hallCache = { loadedAt: 0, halls: [] };
+
+function resolveHallCode(hall, callback) {
+    const match = (halls) => {
+        const needle = String(hall).trim().toLowerCase();
+        const found = halls.find(h => h.hall_code && h.hall_code.toLowerCase() === needle)
+            || halls.find(h => h.dining_hall.toLowerCase() === needle)
+            || halls.find(h => h.dining_hall.toLowerCase().includes(needle));
+        callback(null, found ? found.hall_code : null);
+    };
+
+    if (Date.now() - hallCache.loadedAt < HALL_CACHE_TTL_MS) {
+        return match(hallCache.halls);
+    }
+
+    db.all('SELECT dining_hall, hall_code FROM dining_halls', [], (err, rows) => {
+        if (err) {
+            return callback(err);
+        }
+        hallCache = { loadedAt: Date.now(), halls: rows };
+        match(rows);
+    });
+}
+
+// Pre-generated plans for common requests (meal-planning/plan_catalog.py), kept in memory.
+// Each request has a few differently seeded variants, served in turn so that asking again
+// gives another plan, as the live planner would. The catalog is only used while it was built
+// from the current data version; after a load without a rebuild every request is planned live.
+const CATALOG_CACHE_TTL_MS = 5 * 60 * 1000;
+let catalogCache = { loadedAt: 0, version: null, plans: new Map() };
+const catalogTurns = new Map();
+
+function catalogKey(hallCode, mealType, goal, diet, calories) {
+    return [hallCode, mealType, goal, diet, calories].join('|');
+}
+
+function loadPlanCatalog(callback) {
+    db.get('SELECT IFNULL(MAX(version), 0) AS version FROM data_version', [], (err, row) => {
+        const version = err ? null : row.version;
+        if (version === catalogCache.version && Date.now() - catalogCache.loadedAt < CATALOG_CACHE_TTL_MS) {
+            return callback(catalogCache.plans);
+        }
+        const query = `
+            SELECT hall_code, meal_type, goal, diet, calories, plan FROM meal_plan_catalog
+            WHERE (SELECT version FROM consumer_versions WHERE consumer = 'meal_plan_catalog') = ?
+            ORDER BY variant
+        `;
+        db.all(query, [version], (err, rows) => {
+            // No table yet (plan_catalog.py hasn't run) or a stale catalog: cache the empty catalog too
+            const plans = new Map();
+            for (const row of err ? [] : rows) {
+                const key = catalogKey(row.hall_code, row.meal_type, row.goal, row.diet, row.calories);
+                if (!plans.has(key)) {
+                    plans.set(key, []);
+                }
+                plans.get(key).push(row.plan);
+            }
+            catalogCache = { loadedAt: Date.now(), version, plans };
+            callback(plans);
+        });
+    });
+}
+
+// Calls back with the catalog plan for a /api/meal-plan query, or null if it has to be planned live
+function lookupCatalogPlan(query, callback) {
+    const { calories, dining_hall, meal_type, protein, date } = query;
+    if (protein || date || !meal_type || !/^\d+$/.test(String(calories))) {
+        return callback(null);
+    }
+    const goal = query.goal || 'balanced';
+    const diet = query.vegan === 'true' ? 'vegan' : (query.vegetarian === 'true' ? 'vegetarian' : 'standard');
+
+    resolveHallCode(dining_hall, (err, hallCode) => {
+        if (err || !hallCode) {
+            return callback(null);
+        }
+        loadPlanCatalog((plans) => {
+            const key = catalogKey(hallCode, meal_type, goal, diet, parseInt(calories, 10));
+            const variants = plans.get(key);
+            if (!variants) {
+                return callback(null);
+            }
+            const turn = catalogTurns.get(key) || 0;
+            catalogTurns.set(key, turn + 1);
+            callback(JSON.parse(variants[turn % variants.length]));
+        });
+    });
+}
+
 // Get all available dining halls
 app.get('/api/dining-halls', (req, res) => {
-    const query = `SELECT DISTINCT dining_hall FROM nutrition_data ORDER BY dining_hall`;
+    const query = `SELECT dining_hall FROM dining_halls ORDER BY dining_hall`;
 
     db.all(query, [], (err, rows) => {
         if (err) {
@@ -267,31 +407,41 @@ app.get('/api/dining-halls/:hall/foods', (req, res) => {
     const { hall } = req.params;
     const { meal_type, date } = req.query;
 
-    let query = `
-        SELECT DISTINCT name, category, serving_size, calories, protein,
-               total_fat, total_carbohydrate, dietary_fiber, sugars, sodium
-        FROM nutrition_data
-        WHERE dining_hall LIKE ?
-    `;
-    const params = [`%${hall}%`];
-
-    if (meal_type) {
-        query += ` AND meal_type = ?`;
-        params.push(meal_type);
-    }
+    resolveHallCode(hall, (err, hallCode) => {
+        if (err) {
+            return res.status(500).json({ error: 'Database error', details: err.message });
+        }
+        if (!hallCode) {
+            return res.json({ foods: [], count: 0 });
+        }
 
-    if (date) {
-        query += ` AND date = ?`;
-        params.push(date);
-    }
+        let query = `
+            SELECT DISTINCT name, category, serving_size, calories, protein,
+                   total_fat, total_carbohydrate, dietary_fiber, sugars, sodium
+            FROM nutrition_data
+            WHERE hall_code = ?
+        `;
+        const params = [hallCode];
 
-    query += ` GROUP BY name ORDER BY category, name`;
+        if (meal_type) {
+            query += ` AND meal_type = ?`;
+            params.push(meal_type);
+        }
 
-    db.all(query, params, (err, rows) => {
-        if (err) {
-            return res.status(500).json({ error: 'Database error', details: err.message });
+        if (date) {
+            // ISO dates hit idx_hall_meal_service_date; display strings are still accepted
+            query += ISO_DATE.test(date) ? ` AND service_date = ?` : ` AND date = ?`;
+            params.push(date);
         }
-        res.json({ foods: rows, count: rows.length });
+
+        query += ` GROUP BY name ORDER BY category, name`;
+
+        db.all(query, params, (err, rows) => {
+            if (err) {
+                return res.status(500).json({ error: 'Database error', details: err.message });
+            }
+            res.json({ foods: rows, count: rows.length });
+        });
     });
 });
 
@@ -312,43 +462,71 @@ app.get('/api/recommendations/:userId', (req, res) => {
 
         const targetCaloriesPerMeal = Math.floor((user.calories || 2000) / 3);
 
-        // Get foods from the dining hall
-        let query = `
-            SELECT DISTINCT name, category, serving_size, calories, protein,
-                   total_fat, total_carbohydrate, dietary_fiber, sugars, sodium,
-                   (protein * 4.0 / NULLIF(calories, 0)) as protein_ratio,
-                   (total_fat * 9.0 / NULLIF(calories, 0)) as fat_ratio
-            FROM nutrition_data
-            WHERE dining_hall LIKE ?
-            AND calories > 0
-        `;
-        const params = [`%${dining_hall}%`];
-
-        if (meal_type) {
-            query += ` AND meal_type = ?`;
-            params.push(meal_type);
-        }
-
-        // Score foods based on nutrition
-        query += `
-            GROUP BY name
-            ORDER BY
-                (protein * 4.0 / NULLIF(calories, 0)) DESC,
-                (total_fat * 9.0 / NULLIF(calories, 0)) ASC,
-                dietary_fiber DESC
-            LIMIT 20
-        `;
-
-        db.all(query, params, (err, foods) => {
+        resolveHallCode(dining_hall, (err, hallCode) => {
             if (err) {
                 return res.status(500).json({ error: 'Database error', details: err.message });
             }
 
-            res.json({
-                recommendations: foods,
-                user_target_calories: targetCaloriesPerMeal,
-                goal: user.goal,
-                count: foods.length
+            // Precomputed by scrapers/precompute.py: one primary-key lookup of the ranked food ids
+            const rankedQuery = `
+                SELECT f.name, json_extract(r.categories, '$[' || j.key || ']') AS category,
+                       NULLIF(f.serving_size, '') AS serving_size, f.calories, f.protein,
+                       f.total_fat, f.total_carbohydrate, f.dietary_fiber, f.sugars, f.sodium,
+                       d.protein_ratio, d.fat_ratio
+                FROM dining_halls h
+                JOIN food_rankings r ON r.hall_id = h.id
+                JOIN json_each(r.food_ids) j
+                JOIN food_items f ON f.id = j.value
+                JOIN food_densities d ON d.food_id = f.id
+                WHERE h.hall_code = ? AND r.service_date = '' AND r.meal_type = ? AND r.ranking = 'protein'
+                ORDER BY j.key
+            `;
+
+            // Ranked live when the tables haven't been precomputed (or miss this hall/meal)
+            let query = `
+                SELECT DISTINCT name, category, serving_size, calories, protein,
+                       total_fat, total_carbohydrate, dietary_fiber, sugars, sodium,
+                       (protein * 4.0 / NULLIF(calories, 0)) as protein_ratio,
+                       (total_fat * 9.0 / NULLIF(calories, 0)) as fat_ratio
+                FROM nutrition_data
+                WHERE hall_code = ?
+                AND calories > 0
+            `;
+            const params = [hallCode];
+
+            if (meal_type) {
+                query += ` AND meal_type = ?`;
+                params.push(meal_type);
+            }
+
+            // Score foods based on nutrition
+            query += `
+                GROUP BY name
+                ORDER BY
+                    (protein * 4.0 / NULLIF(calories, 0)) DESC,
+                    (total_fat * 9.0 / NULLIF(calories, 0)) ASC,
+                    dietary_fiber DESC
+                LIMIT 20
+            `;
+
+            const respond = (err, foods) => {
+                if (err) {
+                    return res.status(500).json({ error: 'Database error', details: err.message });
+                }
+
+                res.json({
+                    recommendations: foods,
+                    user_target_calories: targetCaloriesPerMeal,
+                    goal: user.goal,
+                    count: foods.length
+                });
+            };
+
+            db.all(rankedQuery, [hallCode, meal_type || ''], (err, ranked) => {
+                if (!err && ranked.length > 0) {
+                    return respond(null, ranked);
+                }
+                db.all(query, params, respond);
             });
         });
     });
@@ -87,6 +87,21 @@ function getSortedDates(items) {
     .map(({ raw }) => raw)
 }
 
+// Fetch the sharded menu files ({dir}/{service_date}/{meal}.json, listed in
+// index.json) for every meal type of a period on one day
+async function fetchMealShards(hallEntry, dateStr, period) {
+  const day = hallEntry.dates.find(d => d.date === dateStr)
+  if (!day) return []
+  const types = (MEAL_PERIOD_MAP[period] || [period]).filter(t => day.meals[t])
+  const shards = await Promise.all(types.map(async type => {
+    const res = await fetch(`${API_BASE}/${hallEntry.dir}/${day.service_date}/${day.meals[type]}.json`)
+    if (!res.ok) throw new Error('Could not load menu data')
+    const data = await res.json()
+    return (data.foods || []).map(item => ({ ...item, meal_type: type, date: dateStr }))
+  }))
+  return shards.flat()
+}
+
 function formatDateLabel(dateStr) {
   const parsed = parseMenuDate(dateStr)
   if (!parsed) return dateStr
@@ -150,6 +165,7 @@ function MealBuilder({ diningHall, onBack }) {
   const [isVegan, setIsVegan]           = useState(false)
   const [availableDates, setAvailableDates] = useState([])
   const [menuItems, setMenuItems]       = useState([])
+  const [hallIndex, setHallIndex]       = useState(null)
 
   useEffect(() => {
     const h = new Date().getHours()
@@ -161,12 +177,22 @@ function MealBuilder({ diningHall, onBack }) {
   useEffect(() => {
     async function fetchMenuData() {
       try {
-        const filename = diningHall.toLowerCase().replace(/\s+/g, '-').replace(/\//g, '-')
-        const res = await fetch(`${API_BASE}/${filename}.json`)
-        if (!res.ok) throw new Error('Could not load menu data')
-        const data = await res.json()
-        const items = data.foods || []
-        setMenuItems(items)
+        // The index lists this hall's dates and meal shards in a few KB; the
+        // full per-hall file is only needed when no index is published
+        const indexRes = await fetch(`${API_BASE}/index.json`)
+        const entry = indexRes.ok
+          ? ((await indexRes.json()).halls || []).find(h => h.dining_hall === diningHall)
+          : null
+        let items = entry ? entry.dates : []
+        if (entry) {
+          setHallIndex(entry)
+        } else {
+          const filename = diningHall.toLowerCase().replace(/\s+/g, '-').replace(/\//g, '-')
+          const res = await fetch(`${API_BASE}/${filename}.json`)
+          if (!res.ok) throw new Error('Could not load menu data')
+          items = (await res.json()).foods || []
+          setMenuItems(items)
+        }
         const dates = getUpcomingDates(items).length > 0
           ? getUpcomingDates(items)
           : getSortedDates(items)
@@ -274,7 +300,9 @@ function MealBuilder({ diningHall, onBack }) {
       const targetProt = clampNumber(parseInt(protein, 10) || 40, 5, 200)
 
       let items = menuItems
-      if (!items.length) {
+      if (hallIndex) {
+        items = await fetchMealShards(hallIndex, selectedDate, mealPeriod)
+      } else if (!items.length) {
         const filename = diningHall.toLowerCase().replace(/\s+/g, '-').replace(/\//g, '-')
         const res = await fetch(`${API_BASE}/${filename}.json`)
         if (!res.ok) throw new Error('Could not load menu data')